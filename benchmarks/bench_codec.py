@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark encoding and decoding of the largest trading responses.
+
+Payloads are produced by the worker's own handlers over a synthetic contract
+tree: GET_FUTURES_OVERVIEW (every product with all of its contracts) and
+GET_SYMBOLS. "legacy" replays the previous dataclasses.asdict + stdlib json
+path; "json" is the current encoder (orjson when it is installed).
+
+Usage:
+    python benchmarks/bench_codec.py [--products 250] [--contracts 8]
+"""
+import argparse
+import json
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from harness import measure, report
+from fixtures import FakeApi, make_futures
+
+import trading_queue
+from trading_queue import TradingOperation, TradingRequest, TradingResponse
+from trading_worker import TradingWorker
+
+
+@dataclass
+class LegacyResponse:
+    """TradingResponse as serialized before the direct encoder."""
+    request_id: str
+    success: bool
+    data: Optional[Any] = None
+    error: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> "LegacyResponse":
+        return cls(**json.loads(data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=250, help="futures products in the contract tree")
+    parser.add_argument("--contracts", type=int, default=8, help="contracts per product")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    worker = TradingWorker()
+    worker.api_clients[True] = FakeApi(make_futures(args.products, args.contracts))
+
+    json_engine = "orjson" if trading_queue.orjson is not None else "stdlib json"
+    print(f"Contract tree: {args.products} products x {args.contracts} contracts; json via {json_engine}")
+
+    for operation in (TradingOperation.GET_FUTURES_OVERVIEW, TradingOperation.GET_SYMBOLS):
+        response = worker._handle_request_inner(TradingRequest(
+            request_id=str(uuid.uuid4()),
+            operation=operation.value,
+            simulation=True,
+            params={},
+        ))
+        assert response.success, response.error
+
+        legacy = LegacyResponse(response.request_id, response.success, response.data, response.error)
+        legacy_payload = legacy.to_json()
+        print(f"\n{operation.value}: {len(legacy_payload) / 1024:.0f} KiB as JSON")
+        report("legacy encode", measure(legacy.to_json, args.iterations))
+        report("legacy decode", measure(lambda: LegacyResponse.from_json(legacy_payload), args.iterations))
+
+        payload = response.encode()
+        assert TradingResponse.decode(payload) == response, "json round trip differs"
+        report(f"json encode ({len(payload.encode()) / 1024:.0f} KiB on the wire)",
+               measure(response.encode, args.iterations))
+        report("json decode", measure(lambda: TradingResponse.decode(payload), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
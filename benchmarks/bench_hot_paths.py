@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Regression benchmarks for code that runs on every request.
+
+Cases:
+    trading.py        contract registry build and get_contract_from_symbol
+    trading_queue.py  TradingRequest / TradingResponse encode and decode
+    models.py         OrderHistory.to_dict over an /orders page
+    main.py           OrderHistoryResponse validation over an /orders page,
+                      and the /orders/export CSV writer
+
+Contracts and orders are synthesized (benchmarks/fixtures.py), so no broker,
+Redis or database is needed (main.py is imported with an in-memory SQLite URL,
+which needs `pip install aiosqlite`). Save a run per commit and compare against it
+later to verify a performance change:
+
+    python benchmarks/bench_hot_paths.py --save            # benchmarks/results/<commit>.json
+    python benchmarks/bench_hot_paths.py --compare benchmarks/results/<commit>.json
+
+Usage:
+    python benchmarks/bench_hot_paths.py [--products 250] [--contracts 8] [--page 500] [--filter codec]
+"""
+import argparse
+import os
+import uuid
+
+from harness import REPO_ROOT, git_commit, load_results, measure, report_comparison, save_results
+from fixtures import FakeApi, make_futures, make_orders
+
+# main creates its engine on import; no case touches the database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import main  # noqa: E402
+from trading import ContractRegistry, get_contract_from_symbol, get_contract_registry  # noqa: E402
+from trading_queue import TradingOperation, TradingRequest, TradingResponse  # noqa: E402
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+# Each case generator yields (name, fn, iterations divisor)
+
+
+def contract_cases(products: int, contracts: int):
+    api = FakeApi(make_futures(products, contracts))
+    registry = get_contract_registry(api)
+    symbols = registry.symbols
+    lookups = iter(symbols * 1_000_000)
+
+    yield "contracts: registry build", lambda: ContractRegistry(api), 1
+    yield "contracts: get_contract_from_symbol", lambda: get_contract_from_symbol(api, next(lookups)), 1
+
+
+def codec_cases():
+    request = TradingRequest(
+        request_id=str(uuid.uuid4()),
+        operation=TradingOperation.PLACE_ENTRY_ORDER.value,
+        simulation=True,
+        params={"symbol": "MXF202602", "quantity": 2, "action": "Buy"},
+        reply_to="trading:inbox:api-1",
+        deadline=1_800_000_000.0,
+        enqueued_at=1_800_000_000.0,
+        trace={"trace_id": "0" * 32, "span_id": "0" * 16, "stages": {"received": 1_800_000_000.0}},
+    )
+    response = TradingResponse(
+        request_id=request.request_id,
+        success=True,
+        data={
+            "order_id": "5f3c2a1b", "seqno": "000123", "ordno": "k0123", "action": "Buy",
+            "quantity": 2, "original_quantity": 2, "symbol": "MXF202602", "code": "MXFB6",
+        },
+    )
+    request_payload, response_payload = request.encode(), response.encode()
+
+    yield "codec: TradingRequest encode", request.encode, 1
+    yield "codec: TradingRequest decode", lambda: TradingRequest.decode(request_payload), 1
+    yield "codec: TradingResponse encode", response.encode, 1
+    yield "codec: TradingResponse decode", lambda: TradingResponse.decode(response_payload), 1
+
+
+def order_page_cases(page: int):
+    orders = make_orders(page)
+
+    def export_csv():
+        # The CSV writer fed one page-sized batch instead of a database cursor
+        original = main._export_rows
+        main._export_rows = lambda statement: iter([orders])
+        try:
+            for _ in main._export_csv_chunks(None):
+                pass
+        finally:
+            main._export_rows = original
+
+    # Whole-page cases run a tenth of the iterations to keep their runtime comparable
+    yield f"orders: OrderHistory.to_dict x{page}", lambda: [order.to_dict() for order in orders], 10
+    yield (
+        f"orders: OrderHistoryResponse x{page}",
+        lambda: [main.OrderHistoryResponse.model_validate(order) for order in orders],
+        10,
+    )
+    yield f"orders: export CSV x{page}", export_csv, 10
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=250, help="futures products in the contract tree")
+    parser.add_argument("--contracts", type=int, default=8, help="contracts per product")
+    parser.add_argument("--page", type=int, default=500, help="orders per /orders page")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--save", nargs="?", const="", metavar="PATH",
+                        help="save results as JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="PATH", help="results JSON of a baseline run")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        saved = load_results(args.compare)
+        baseline = saved["results"]
+        print(f"Baseline: commit {saved['commit']} ({saved['taken_at']}, Python {saved['python']})")
+
+    cases = [
+        *contract_cases(args.products, args.contracts),
+        *codec_cases(),
+        *order_page_cases(args.page),
+    ]
+    print(
+        f"Commit {git_commit()}: {args.products} products x {args.contracts} contracts, "
+        f"{args.page} orders per page"
+    )
+
+    results = {}
+    for name, fn, divisor in cases:
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, max(10, args.iterations // divisor))
+        report_comparison(name, results[name], baseline.get(name))
+
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{git_commit()}.json")
+        save_results(path, results)
+        print(f"\nSaved to {path}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET_POSITIONS handling in the trading worker (the /positions hot path).
+
+"before" replays the previous implementation, which walked every contract of
+every product in api.Contracts.Futures on each request to map position codes
+to symbols. "after" runs the worker handler, which reuses the per-session
+code-to-symbol map from ContractRegistry. Redis and the broker are left out
+so only the worker's own processing time is measured.
+
+Usage:
+    python benchmarks/bench_positions.py [--products 250] [--contracts 8] [--positions 4]
+"""
+import argparse
+import time
+import uuid
+
+from harness import measure, report
+from fixtures import FakeApi, make_futures, make_position
+
+from trading_queue import TradingOperation, TradingRequest
+from trading_worker import TradingWorker
+
+
+def legacy_get_positions(api) -> dict:
+    """GET_POSITIONS as implemented before the code-to-symbol map was cached."""
+    positions = api.list_positions(api.futopt_account)
+
+    code_to_symbol = {}
+    for product_name in dir(api.Contracts.Futures):
+        if product_name.startswith("_"):
+            continue
+        product = getattr(api.Contracts.Futures, product_name)
+        if hasattr(product, "__iter__"):
+            for contract in product:
+                if hasattr(contract, "code") and hasattr(contract, "symbol"):
+                    code_to_symbol[contract.code] = contract.symbol
+
+    positions_data = []
+    for p in positions:
+        symbol = code_to_symbol.get(p.code, p.code)
+        positions_data.append({
+            "id": getattr(p, "id", ""),
+            "symbol": symbol,
+            "code": p.code,
+            "direction": str(p.direction.value) if hasattr(p.direction, 'value') else str(p.direction),
+            "quantity": p.quantity,
+            "price": p.price,
+            "last_price": getattr(p, "last_price", p.price),
+            "pnl": p.pnl,
+            "yd_quantity": getattr(p, "yd_quantity", 0),
+            "cond": getattr(p, "cond", ""),
+        })
+    return {"positions": positions_data, "count": len(positions_data)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=250, help="futures products in the contract tree")
+    parser.add_argument("--contracts", type=int, default=8, help="contracts per product")
+    parser.add_argument("--positions", type=int, default=4, help="open positions")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    futures = make_futures(args.products, args.contracts)
+    contracts = futures.MXF + futures.TXF
+    positions = [make_position(c, long=i % 2 == 0) for i, c in enumerate(contracts[:args.positions])]
+    api = FakeApi(futures, positions)
+
+    worker = TradingWorker()
+    worker.api_clients[True] = api
+
+    def request():
+        return TradingRequest(
+            request_id=str(uuid.uuid4()),
+            operation=TradingOperation.GET_POSITIONS.value,
+            simulation=True,
+            params={},
+        )
+
+    print(f"Contract tree: {args.products} products x {args.contracts} contracts, {len(positions)} positions")
+
+    start = time.perf_counter()
+    response = worker._handle_request_inner(request())
+    assert response.success, response.error
+    assert response.data == legacy_get_positions(api), "worker and legacy results differ"
+    print(f"{'after (first request, builds map)':<40} {(time.perf_counter() - start) * 1e6:>15.1f}us")
+
+    report("before (walk contracts per request)", measure(lambda: legacy_get_positions(api), args.iterations))
+    report("after (per-session code_to_symbol)", measure(lambda: worker._handle_request_inner(request()), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
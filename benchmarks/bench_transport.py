@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark request round-trip latency of the list and streams transports.
+
+Runs the trading worker's status-lane dispatcher in-process against a fake
+broker session and times PING requests end to end through Redis: one at a
+time on the sync client, and --concurrency at a time on the asyncio client.
+
+Needs a Redis server at REDIS_URL. The request lanes and response keys of
+that database are used, so point it at a spare database index.
+
+Usage:
+    REDIS_URL=redis://localhost:6379/15 python benchmarks/bench_transport.py [--iterations 2000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from harness import measure, report, summarize
+from fixtures import FakeApi, make_futures
+
+from trading_queue import (
+    AsyncTradingQueueClient,
+    TradingOperation,
+    TradingQueueClient,
+    STATUS_QUEUE,
+    stream_for_queue,
+)
+from trading_worker import TradingWorker
+
+
+def start_worker(transport: str):
+    """A trading worker draining the status lane over the given transport."""
+    worker = TradingWorker(transport=transport)
+    worker.api_clients[True] = FakeApi(make_futures(2, 1))
+    worker.redis.delete(STATUS_QUEUE, stream_for_queue(STATUS_QUEUE))
+    worker.running = True
+
+    dispatch = worker._dispatch_stream if transport == "streams" else worker._dispatch_lane
+    thread = threading.Thread(target=dispatch, args=(STATUS_QUEUE,), daemon=True)
+    thread.start()
+    return worker, thread
+
+
+async def measure_concurrent(transport: str, total: int, concurrency: int):
+    """Round-trip latency with `concurrency` requests in flight."""
+    client = AsyncTradingQueueClient(transport=transport)
+    limit = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def ping():
+        async with limit:
+            start = time.perf_counter()
+            response = await client.submit_request(TradingOperation.PING, timeout=10)
+            samples.append((time.perf_counter() - start) * 1e6)
+            assert response.success, response.error
+
+    try:
+        await asyncio.gather(*(ping() for _ in range(total)))
+    finally:
+        await client.close()
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="in-flight requests for the asyncio run")
+    args = parser.parse_args()
+
+    for transport in ("list", "streams"):
+        worker, thread = start_worker(transport)
+        try:
+            client = TradingQueueClient(transport=transport)
+            report(
+                f"{transport}: sequential",
+                measure(lambda: client.submit_request(TradingOperation.PING, timeout=10), args.iterations),
+            )
+            report(
+                f"{transport}: {args.concurrency} concurrent",
+                asyncio.run(measure_concurrent(transport, args.iterations, args.concurrency)),
+            )
+        finally:
+            worker.running = False
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
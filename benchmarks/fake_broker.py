@@ -0,0 +1,239 @@
+"""
+Fake Shioaji broker for load tests of the full webhook -> fill path.
+
+FakeShioaji implements the subset of sj.Shioaji the trading worker uses
+(login, Contracts.Futures, list_accounts, list_positions, Order,
+place_order, update_status, list_trades, set_order_callback, quote.on_event)
+with configurable latency and fill behaviour. Orders are executed on timer
+threads a little after place_order returns and reported through the order
+callback, the same way the real SDK pushes order and deal events.
+
+Run a trading worker against it with benchmarks/fake_worker.py.
+"""
+import itertools
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import shioaji as sj
+
+from fixtures import make_futures, make_position
+
+
+@dataclass
+class BrokerProfile:
+    """Latency and fill behaviour of the fake broker (seconds and probabilities)."""
+    login_latency: float = 0.5
+    place_order_latency: float = 0.03  # mean api.place_order round trip
+    update_status_latency: float = 0.01
+    jitter: float = 0.5  # latencies vary uniformly by +/- this fraction
+    fill_delay: float = 0.2  # mean time from place_order to the first deal
+    fill_rate: float = 0.95  # IOC orders that fill completely
+    partial_rate: float = 0.03  # IOC orders that fill partially (the rest are cancelled)
+    reject_rate: float = 0.0  # orders rejected by the exchange
+    callbacks: bool = True  # push order/deal events (off: status polling only)
+    products: int = 250
+    contracts_per_product: int = 8
+    year: int = 2026
+
+    def delay(self, mean: float) -> float:
+        return max(0.0, mean * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+# Used by every FakeShioaji created without an explicit profile, i.e. by the
+# trading worker's sj.Shioaji(simulation=...) once patched (see fake_worker.py)
+PROFILE = BrokerProfile()
+
+
+class _FakeQuote:
+    def on_event(self, fn):
+        self.event_callback = fn
+        return fn
+
+
+class FakeShioaji:
+    """A broker session: contracts, positions and trades live in memory."""
+
+    def __init__(self, simulation: bool = True, profile: Optional[BrokerProfile] = None, **kwargs):
+        self.simulation = simulation
+        self.profile = profile or PROFILE
+        self.Contracts = SimpleNamespace(
+            Futures=make_futures(self.profile.products, self.profile.contracts_per_product, self.profile.year)
+        )
+        self.futopt_account = SimpleNamespace(account_id="F0000000", person_id="A123456789", signed=True)
+        self.quote = _FakeQuote()
+
+        self._order_callback = None
+        self._lock = threading.Lock()
+        self._seqno = itertools.count(1)
+        self._trades: List[SimpleNamespace] = []
+        self._positions: Dict[str, int] = {}  # contract code -> signed quantity
+        self._contracts: Dict[str, SimpleNamespace] = {}
+        self._timers: List[threading.Timer] = []
+
+    # Session
+
+    def login(self, api_key: str = "", secret_key: str = "", **kwargs):
+        time.sleep(self.profile.delay(self.profile.login_latency))
+        return [self.futopt_account]
+
+    def logout(self) -> bool:
+        with self._lock:
+            timers, self._timers = self._timers, []
+        for timer in timers:
+            timer.cancel()
+        return True
+
+    def list_accounts(self):
+        return [self.futopt_account]
+
+    def activate_ca(self, **kwargs) -> bool:
+        return True
+
+    def fetch_contracts(self, contract_download: bool = True, **kwargs):
+        time.sleep(self.profile.delay(self.profile.login_latency))
+
+    def set_order_callback(self, callback):
+        self._order_callback = callback
+
+    # Orders
+
+    def Order(self, **kwargs):
+        return SimpleNamespace(**kwargs)
+
+    def place_order(self, contract, order, timeout: int = 5000, **kwargs):
+        time.sleep(self.profile.delay(self.profile.place_order_latency))
+        seqno = f"{next(self._seqno):06d}"
+        trade = SimpleNamespace(
+            contract=contract,
+            order=SimpleNamespace(
+                id=uuid.uuid4().hex[:8],
+                seqno=seqno,
+                ordno=f"k{seqno[-4:]}",
+                action=order.action,
+                price=order.price,
+                quantity=order.quantity,
+                price_type=order.price_type,
+                order_type=order.order_type,
+                octype=order.octype,
+                account=order.account,
+            ),
+            status=SimpleNamespace(
+                id=seqno,
+                status=sj.constant.Status.PendingSubmit,
+                status_code="",
+                msg="",
+                order_quantity=order.quantity,
+                deal_quantity=0,
+                cancel_quantity=0,
+                deals=[],
+            ),
+        )
+        timer = threading.Timer(self.profile.delay(self.profile.fill_delay), self._execute, args=(trade,))
+        timer.daemon = True
+        with self._lock:
+            self._trades.append(trade)
+            self._contracts[contract.code] = contract
+            self._timers = [t for t in self._timers if t.is_alive()]
+            self._timers.append(timer)
+        timer.start()
+        return trade
+
+    def _execute(self, trade):
+        """Decide the outcome of an order, then report it like the exchange would."""
+        profile = self.profile
+        quantity = trade.order.quantity
+        roll = random.random()
+        if roll < profile.reject_rate:
+            filled, rejected = 0, True
+        elif roll < profile.reject_rate + profile.fill_rate:
+            filled, rejected = quantity, False
+        elif roll < profile.reject_rate + profile.fill_rate + profile.partial_rate and quantity > 1:
+            filled, rejected = random.randint(1, quantity - 1), False
+        else:
+            filled, rejected = 0, False
+
+        status = trade.status
+        if rejected:
+            status.status = sj.constant.Status.Failed
+            status.status_code = "88"
+            status.msg = "Rejected by fake broker"
+            self._emit_order(trade, "New", op_code="88", op_msg=status.msg)
+            return
+
+        status.status = sj.constant.Status.Submitted
+        self._emit_order(trade, "New")
+
+        if filled:
+            price = 20000.0 + random.randint(-20, 20)
+            deal = SimpleNamespace(seq=f"{trade.order.seqno}01", price=price, quantity=filled, ts=time.time())
+            status.deals.append(deal)
+            status.deal_quantity = filled
+            signed = filled if trade.order.action == sj.constant.Action.Buy else -filled
+            with self._lock:
+                self._positions[trade.contract.code] = self._positions.get(trade.contract.code, 0) + signed
+            self._emit_deal(trade, deal)
+
+        if filled == quantity:
+            status.status = sj.constant.Status.Filled
+        else:
+            # IOC: whatever did not fill right away is cancelled
+            status.cancel_quantity = quantity - filled
+            status.status = sj.constant.Status.Cancelled
+            self._emit_order(trade, "Cancel")
+
+    def _emit_order(self, trade, op_type: str, op_code: str = "00", op_msg: str = ""):
+        if not self.profile.callbacks or self._order_callback is None:
+            return
+        self._order_callback(sj.constant.OrderState.FuturesOrder, {
+            "operation": {"op_type": op_type, "op_code": op_code, "op_msg": op_msg},
+            "order": {
+                "id": trade.order.id,
+                "seqno": trade.order.seqno,
+                "ordno": trade.order.ordno,
+                "action": trade.order.action,
+                "price": trade.order.price,
+                "quantity": trade.order.quantity,
+            },
+            "status": {
+                "id": trade.status.id,
+                "exchange_ts": time.time(),
+                "order_quantity": trade.status.order_quantity,
+                "cancel_quantity": trade.status.cancel_quantity,
+            },
+            "contract": {"code": trade.contract.category, "full_code": trade.contract.code},
+        })
+
+    def _emit_deal(self, trade, deal):
+        if not self.profile.callbacks or self._order_callback is None:
+            return
+        self._order_callback(sj.constant.OrderState.FuturesDeal, {
+            "trade_id": trade.order.id,
+            "seqno": trade.order.seqno,
+            "ordno": trade.order.ordno,
+            "exchange_seq": deal.seq,
+            "action": trade.order.action,
+            "code": trade.contract.category,
+            "full_code": trade.contract.code,
+            "delivery_month": trade.contract.delivery_month,
+            "price": deal.price,
+            "quantity": deal.quantity,
+            "ts": deal.ts,
+        })
+
+    def update_status(self, account=None, trade=None, timeout: int = 5000, **kwargs):
+        # Trades are updated in place as they execute; only the round trip is simulated
+        time.sleep(self.profile.delay(self.profile.update_status_latency))
+
+    def list_trades(self):
+        with self._lock:
+            return list(self._trades)
+
+    def list_positions(self, account=None, **kwargs):
+        with self._lock:
+            positions = [(self._contracts[code], qty) for code, qty in self._positions.items() if qty]
+        return [make_position(contract, abs(qty), long=qty > 0) for contract, qty in positions]
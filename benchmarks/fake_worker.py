@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Run the trading worker against the fake broker (benchmarks/fake_broker.py).
+
+The worker is the real TradingWorker with sj.Shioaji replaced by FakeShioaji,
+so requests go through Redis, the request lanes, the position book, trade
+store and order callbacks exactly as in production. Start the API as usual
+(pointing at the same Redis) and drive it with benchmarks/load_test.py.
+
+Usage:
+    python benchmarks/fake_worker.py [--place-order-latency 0.03] [--fill-delay 0.2] [--fill-rate 0.95]
+"""
+import argparse
+import os
+
+import harness  # noqa: F401  (puts the repository root on sys.path)
+import shioaji as sj
+
+import fake_broker
+from fake_broker import BrokerProfile, FakeShioaji
+
+
+def main():
+    defaults = BrokerProfile()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login-latency", type=float, default=defaults.login_latency)
+    parser.add_argument("--place-order-latency", type=float, default=defaults.place_order_latency)
+    parser.add_argument("--update-status-latency", type=float, default=defaults.update_status_latency)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="latency variation (fraction of the mean)")
+    parser.add_argument("--fill-delay", type=float, default=defaults.fill_delay, help="mean seconds until the deal")
+    parser.add_argument("--fill-rate", type=float, default=defaults.fill_rate)
+    parser.add_argument("--partial-rate", type=float, default=defaults.partial_rate)
+    parser.add_argument("--reject-rate", type=float, default=defaults.reject_rate)
+    parser.add_argument("--no-callbacks", action="store_true", help="no order/deal events; fills are found by polling")
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--contracts", type=int, default=defaults.contracts_per_product)
+    args = parser.parse_args()
+
+    fake_broker.PROFILE = BrokerProfile(
+        login_latency=args.login_latency,
+        place_order_latency=args.place_order_latency,
+        update_status_latency=args.update_status_latency,
+        jitter=args.jitter,
+        fill_delay=args.fill_delay,
+        fill_rate=args.fill_rate,
+        partial_rate=args.partial_rate,
+        reject_rate=args.reject_rate,
+        callbacks=not args.no_callbacks,
+        products=args.products,
+        contracts_per_product=args.contracts,
+    )
+    sj.Shioaji = FakeShioaji
+
+    # The worker refuses to log in without credentials; the fake broker ignores them
+    os.environ.setdefault("API_KEY", "fake")
+    os.environ.setdefault("SECRET_KEY", "fake")
+
+    from trading_worker import TradingWorker
+    print(f"Trading worker using fake broker: {fake_broker.PROFILE}")
+    TradingWorker().run()
+
+
+if __name__ == "__main__":
+    main()
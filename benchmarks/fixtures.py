@@ -0,0 +1,122 @@
+"""
+Synthetic Shioaji-shaped data for benchmarks.
+
+Only the attributes the application reads are modelled. Sizes default to
+roughly what api.Contracts.Futures holds in production (a few hundred
+products with a handful of contracts each).
+"""
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+import shioaji as sj
+
+MONTH_CODES = "ABCDEFGHIJKL"
+
+
+def make_contract(product: str, year: int, month: int) -> SimpleNamespace:
+    """A futures contract, e.g. MXF 2026/01 -> symbol MXF202601, code MXFA6."""
+    return SimpleNamespace(
+        symbol=f"{product}{year}{month:02d}",
+        code=f"{product}{MONTH_CODES[month - 1]}{year % 10}",
+        name=f"{product}{month:02d}",
+        category=product,
+        delivery_month=f"{year}{month:02d}",
+        underlying_kind="I",
+        limit_up=0.0,
+        limit_down=0.0,
+        reference=0.0,
+    )
+
+
+def make_futures(products: int = 250, contracts_per_product: int = 8, year: int = 2026):
+    """
+    A stand-in for api.Contracts.Futures: one list attribute per product.
+
+    MXF and TXF are always included so the default SUPPORTED_FUTURES resolve.
+    """
+    names = ["MXF", "TXF"] + [f"{chr(65 + i // 26)}{chr(65 + i % 26)}F" for i in range(products - 2)]
+    futures = SimpleNamespace()
+    for name in names:
+        setattr(futures, name, [
+            make_contract(name, year + (m // 12), m % 12 + 1)
+            for m in range(contracts_per_product)
+        ])
+    return futures
+
+
+def make_position(contract, quantity: int = 1, long: bool = True) -> SimpleNamespace:
+    """A FuturePosition on a contract."""
+    return SimpleNamespace(
+        id=0,
+        code=contract.code,
+        direction=sj.constant.Action.Buy if long else sj.constant.Action.Sell,
+        quantity=quantity,
+        price=20000.0,
+        last_price=20010.0,
+        pnl=10.0,
+        yd_quantity=0,
+        cond="",
+    )
+
+
+class FakeApi:
+    """Just enough of sj.Shioaji for the worker's read paths."""
+
+    def __init__(self, futures, positions: List[SimpleNamespace] = ()):
+        self.Contracts = SimpleNamespace(Futures=futures)
+        self.futopt_account = None
+        self.positions = list(positions)
+
+    def list_positions(self, account=None):
+        return self.positions
+
+    def list_accounts(self):
+        return [SimpleNamespace(person_id="A123456789")]
+
+
+def make_orders(count: int = 500, start_id: int = 1) -> list:
+    """
+    OrderHistory rows as an /orders page would hold them, newest first.
+
+    A mix of filled, cancelled, failed and no-action orders with realistic
+    field lengths (order_result holds the worker's response dict as text).
+    """
+    from models import OrderHistory
+
+    rng = random.Random(start_id)
+    now = datetime(2026, 1, 15, 13, 30)
+    orders = []
+    for i in range(count):
+        order_id = start_id + count - 1 - i
+        status = rng.choice(["filled"] * 6 + ["cancelled", "failed", "no_action", "submitted"])
+        product = rng.choice(["MXF", "TXF"])
+        symbol, code = f"{product}202602", f"{product}B6"
+        action = rng.choice(["long_entry", "short_entry", "long_exit", "short_exit"])
+        quantity = rng.randint(1, 5)
+        placed = status not in ("failed", "no_action")
+        orders.append(OrderHistory(
+            id=order_id,
+            symbol=symbol,
+            code=code,
+            action=action,
+            quantity=quantity,
+            status=status,
+            order_result=str({
+                "order_id": f"{order_id:08x}", "seqno": f"{order_id:06d}", "ordno": f"k{order_id % 10000:04d}",
+                "action": "Buy" if action in ("long_entry", "short_exit") else "Sell",
+                "quantity": quantity, "symbol": symbol, "code": code,
+            }) if placed else None,
+            error_message="Contract not found" if status == "failed" else None,
+            created_at=now - timedelta(minutes=i),
+            order_id=f"{order_id:08x}" if placed else None,
+            seqno=f"{order_id:06d}" if placed else None,
+            ordno=f"k{order_id % 10000:04d}" if placed else None,
+            fill_status={"filled": "Filled", "cancelled": "Cancelled", "submitted": "Submitted"}.get(status),
+            fill_quantity=quantity if status == "filled" else 0,
+            fill_price=20000.0 + rng.randint(-50, 50) if status == "filled" else None,
+            cancel_quantity=quantity if status == "cancelled" else 0,
+            updated_at=now - timedelta(minutes=i) + timedelta(seconds=1) if placed else None,
+        ))
+    return orders
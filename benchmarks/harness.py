@@ -0,0 +1,96 @@
+"""
+Timing helpers shared by the benchmark scripts.
+
+Benchmarks are plain scripts run from the repository root, e.g.:
+
+    python benchmarks/bench_positions.py
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+# Make the application modules importable when run as a script
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 10) -> Dict[str, float]:
+    """Call fn repeatedly and return latency statistics in microseconds."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics for samples already measured in microseconds."""
+    samples = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max_us": samples[-1],
+    }
+
+
+def report(name: str, stats: Dict[str, float]):
+    """Print one line of benchmark results."""
+    print(
+        f"{name:<40} mean={stats['mean_us']:>10.1f}us "
+        f"p50={stats['p50_us']:>10.1f}us p99={stats['p99_us']:>10.1f}us "
+        f"(n={stats['iterations']})"
+    )
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit ("unknown" outside a git checkout)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(path: str, results: Dict[str, Dict[str, float]]):
+    """Write benchmark results with the commit and machine they were taken on."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "taken_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, f, indent=2)
+
+
+def load_results(path: str) -> Dict[str, object]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def report_comparison(name: str, stats: Dict[str, float], baseline: Optional[Dict[str, float]]):
+    """Print one line of results next to a baseline run's p50 (>1.00x means slower)."""
+    if baseline is None:
+        report(name, stats)
+        return
+    ratio = stats["p50_us"] / baseline["p50_us"] if baseline["p50_us"] else float("inf")
+    print(
+        f"{name:<40} p50={stats['p50_us']:>10.1f}us p99={stats['p99_us']:>10.1f}us "
+        f"baseline p50={baseline['p50_us']:>10.1f}us ({ratio:.2f}x)"
+    )
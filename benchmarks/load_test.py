@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Load test of the full webhook -> fill path.
+
+Sends TradingView-style signal bursts to POST /order: every --interval
+seconds a burst of --burst-size orders arrives at once (alerts of many
+strategies firing on the same bar close), spread over --symbols. Reports
+request throughput and latency, how the orders ended up (filled, cancelled,
+...) and the load the run put on Redis and PostgreSQL.
+
+Run it against a stack whose trading worker uses the fake broker:
+
+    python benchmarks/fake_worker.py &
+    uvicorn main:app --workers 4 &
+    python benchmarks/load_test.py --url http://localhost:8000 --bursts 30 --burst-size 20
+
+Redis and database load are read from REDIS_URL and DATABASE_URL (or
+--redis-url / --database-url); either is skipped when not reachable.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+import redis
+
+from harness import summarize
+
+ACTION_WEIGHTS = {"long_entry": 4, "short_entry": 4, "long_exit": 1, "short_exit": 1}
+
+
+def redis_stats(client: Optional[redis.Redis]) -> Optional[Dict[str, int]]:
+    """Commands processed so far, in total and per command."""
+    if client is None:
+        return None
+    stats = {"total": client.info("stats")["total_commands_processed"]}
+    for name, values in client.info("commandstats").items():
+        stats[name.replace("cmdstat_", "")] = values["calls"]
+    return stats
+
+
+def database_stats(engine) -> Optional[Dict[str, int]]:
+    """Transaction and row counters of the database (PostgreSQL only)."""
+    if engine is None or engine.dialect.name != "postgresql":
+        return None
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT xact_commit, xact_rollback, tup_fetched, tup_inserted, tup_updated "
+            "FROM pg_stat_database WHERE datname = current_database()"
+        )).mappings().one()
+    return dict(row)
+
+
+def order_outcomes(engine, since: datetime) -> Optional[Dict[str, object]]:
+    """Final status counts and fill latency of the orders created by this run."""
+    if engine is None:
+        return None
+    from sqlalchemy import select
+    from models import OrderHistory
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(OrderHistory.status, OrderHistory.created_at, OrderHistory.updated_at)
+            .where(OrderHistory.created_at >= since)
+        ).all()
+    statuses = Counter(row.status for row in rows)
+    fill_latency_us = [
+        (row.updated_at - row.created_at).total_seconds() * 1e6
+        for row in rows
+        if row.status == "filled" and row.updated_at
+    ]
+    return {"statuses": statuses, "fill_latency": summarize(fill_latency_us) if fill_latency_us else None}
+
+
+async def send_order(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, symbol: str, action: str,
+                     simulation: bool, latencies: List[float], codes: Counter):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                "/order",
+                params={"simulation": str(simulation).lower()},
+                json={"action": action, "quantity": random.randint(1, 3), "symbol": symbol},
+            )
+            codes[response.status_code] += 1
+        except httpx.HTTPError as e:
+            codes[type(e).__name__] += 1
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+
+async def run_load(args) -> Dict[str, object]:
+    symbols = args.symbols.split(",")
+    actions, weights = zip(*ACTION_WEIGHTS.items())
+    latencies: List[float] = []
+    codes: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        for burst in range(args.bursts):
+            # Bursts start on a fixed schedule whether or not earlier ones finished
+            await asyncio.sleep(max(0.0, start + burst * args.interval - time.perf_counter()))
+            for _ in range(args.burst_size):
+                tasks.append(asyncio.create_task(send_order(
+                    client, semaphore, random.choice(symbols), random.choices(actions, weights)[0],
+                    not args.real, latencies, codes,
+                )))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "latencies": latencies, "codes": codes}
+
+
+def print_counter_delta(title: str, before: Dict[str, int], after: Dict[str, int], elapsed: float, top: int = 0):
+    print(title)
+    deltas = {key: after.get(key, 0) - before.get(key, 0) for key in after}
+    ordered = sorted(deltas.items(), key=lambda item: -item[1])
+    for key, delta in ordered[:top] if top else ordered:
+        if delta:
+            print(f"  {key:<24} {delta:>10} ({delta / elapsed:>9.1f}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=10, help="orders per burst")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between bursts")
+    parser.add_argument("--concurrency", type=int, default=100, help="max requests in flight")
+    parser.add_argument("--symbols", default="MXF202601,TXF202601")
+    parser.add_argument("--real", action="store_true", help="send real-mode orders (default: simulation)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds to wait for fills after the last response")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    redis_client = redis.from_url(args.redis_url, decode_responses=True)
+    try:
+        redis_before = redis_stats(redis_client)
+    except redis.RedisError as e:
+        print(f"Redis stats unavailable: {e}")
+        redis_client = redis_before = None
+    engine = None
+    if args.database_url:
+        from sqlalchemy import create_engine
+        engine = create_engine(args.database_url)
+
+    started_at = datetime.utcnow()
+    db_before = database_stats(engine)
+
+    print(
+        f"Sending {args.bursts} bursts of {args.burst_size} orders every {args.interval}s "
+        f"to {args.url} (concurrency {args.concurrency})"
+    )
+    result = asyncio.run(run_load(args))
+    time.sleep(args.settle)
+    elapsed = result["elapsed"] + args.settle
+
+    redis_after, db_after = redis_stats(redis_client), database_stats(engine)
+
+    sent = len(result["latencies"])
+    stats = summarize(result["latencies"])
+    print(f"\nRequests: {sent} in {result['elapsed']:.2f}s ({sent / result['elapsed']:.1f} req/s)")
+    print(f"Responses: {dict(result['codes'])}")
+    print(
+        f"Latency: mean={stats['mean_us'] / 1000:.1f}ms p50={stats['p50_us'] / 1000:.1f}ms "
+        f"p99={stats['p99_us'] / 1000:.1f}ms max={stats['max_us'] / 1000:.1f}ms"
+    )
+
+    outcomes = order_outcomes(engine, started_at)
+    if outcomes is not None:
+        print(f"\nOrders after {args.settle:.0f}s settle: {dict(outcomes['statuses'])}")
+        fill = outcomes["fill_latency"]
+        if fill:
+            print(
+                f"Order created -> filled: p50={fill['p50_us'] / 1000:.1f}ms "
+                f"p99={fill['p99_us'] / 1000:.1f}ms max={fill['max_us'] / 1000:.1f}ms (n={fill['iterations']})"
+            )
+
+    if redis_before is not None:
+        print_counter_delta(f"\nRedis commands (over {elapsed:.1f}s):", redis_before, redis_after, elapsed, top=10)
+    if db_before is not None:
+        print_counter_delta(f"\nDatabase (over {elapsed:.1f}s):", db_before, db_after, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+-- Composite indexes for /orders filters and keyset pagination
+-- Version: 002
+--
+-- /orders lists newest first and pages by (created_at, id), optionally
+-- filtered by symbol, action and/or status. Each index leads with the
+-- equality filters and ends with the sort key so a page is a single
+-- index range scan no matter how deep it is.
+
+CREATE INDEX IF NOT EXISTS ix_order_history_created_at_id
+    ON order_history (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_order_history_status_created_at_id
+    ON order_history (status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_order_history_symbol_created_at_id
+    ON order_history (symbol, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_order_history_action_created_at_id
+    ON order_history (action, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_order_history_symbol_status_created_at_id
+    ON order_history (symbol, status, created_at DESC, id DESC);
+
+-- Fill events look orders up by (order_id, seqno)
+CREATE INDEX IF NOT EXISTS ix_order_history_order_id_seqno
+    ON order_history (order_id, seqno);
+
+-- Superseded by the composite indexes above (and the primary key)
+DROP INDEX IF EXISTS ix_order_history_id;
+DROP INDEX IF EXISTS ix_order_history_symbol;
+DROP INDEX IF EXISTS ix_order_history_created_at;
+DROP INDEX IF EXISTS ix_order_history_order_id;
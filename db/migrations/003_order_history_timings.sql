@@ -0,0 +1,8 @@
+-- Per-order latency breakdown
+-- Version: 003
+--
+-- JSON trace written by the API (see tracing.py): the time each stage of an
+-- order was reached, from webhook through the trading worker and broker to
+-- fill detection. Served by GET /orders/{id}/timings.
+
+ALTER TABLE order_history ADD COLUMN IF NOT EXISTS timings VARCHAR;
@@ -0,0 +1,298 @@
+"""
+Fill Verifier - fallback polling of order status for submitted orders.
+
+Fills are normally pushed by the trading worker's order callbacks. For the
+rare missed callback, every submitted order is re-checked on a schedule
+until it reaches a final status or runs out of checks.
+
+All orders are handled by one coroutine per API process. Next-check times
+are kept in a min-heap in memory and in a Redis sorted set, so the schedule
+survives API restarts and is shared by all uvicorn workers: a due order is
+atomically moved to a claimed set with a lease, and only the process that
+moved it checks it. Claims whose lease ran out (the process died) go back on
+the schedule. Due orders are checked with one CHECK_ORDER_STATUS_BATCH
+request per mode.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+VERIFY_SCHEDULE_KEY = "trading:verify:schedule"  # sorted set: order -> next check time
+VERIFY_STATE_KEY = "trading:verify:state"  # hash: order -> JSON state
+VERIFY_CLAIMED_KEY = "trading:verify:claimed"  # sorted set: order being checked -> lease expiry
+VERIFY_BATCH_SIZE = int(os.getenv("VERIFY_BATCH_SIZE", "50"))  # max orders checked per wakeup
+VERIFY_RESCAN_INTERVAL = 30  # seconds between scans for orders scheduled by other processes
+VERIFY_CLAIM_LEASE = 120  # seconds a claimed order may take to check (the status request times out at 60)
+
+# Move up to ARGV[3] orders due at ARGV[1] from the schedule to the claimed
+# set, leased until ARGV[2]. Returns the claimed members.
+_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('ZADD', KEYS[2], ARGV[2], member)
+end
+return due
+"""
+
+# Release claims (ARGV[2], ARGV[4], ... with states ARGV[3], ARGV[5], ...) and
+# schedule them again at ARGV[1], unless completed meanwhile (state removed) or
+# the claim was lost to an expired lease.
+_RESCHEDULE_SCRIPT = """
+for i = 2, #ARGV, 2 do
+    local member = ARGV[i]
+    if redis.call('ZREM', KEYS[3], member) == 1 and redis.call('HEXISTS', KEYS[1], member) == 1 then
+        redis.call('HSET', KEYS[1], member, ARGV[i + 1])
+        redis.call('ZADD', KEYS[2], ARGV[1], member)
+    end
+end
+return 0
+"""
+
+# Schedule at ARGV[1] the orders whose claim lease expired, and orders in
+# neither set. Returns {orders awaiting verification, orders restored}.
+_RESTORE_SCRIPT = """
+local restored = 0
+for _, member in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])) do
+    redis.call('ZREM', KEYS[3], member)
+    if redis.call('HEXISTS', KEYS[1], member) == 1 then
+        redis.call('ZADD', KEYS[2], ARGV[1], member)
+        restored = restored + 1
+    end
+end
+local members = redis.call('HKEYS', KEYS[1])
+for _, member in ipairs(members) do
+    if not redis.call('ZSCORE', KEYS[2], member) and not redis.call('ZSCORE', KEYS[3], member) then
+        redis.call('ZADD', KEYS[2], ARGV[1], member)
+        restored = restored + 1
+    end
+end
+return {#members, restored}
+"""
+
+# Exchange statuses after which an order receives no further updates
+FINAL_FILL_STATUSES = ("Filled", "Cancelled", "Failed", "Inactive")
+
+
+def verify_member(order_id: str, seqno: str, simulation: bool) -> str:
+    """Schedule member for a trade, e.g. "simulation:order_id:seqno"."""
+    return f"{'simulation' if simulation else 'real'}:{order_id}:{seqno}"
+
+
+class FillVerifier:
+    """
+    Schedules and runs fallback status checks for submitted orders.
+
+    apply_status is awaited with each CHECK_ORDER_STATUS result and persists
+    it, e.g. OrderUpdateCoalescer.submit.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        queue_client,
+        apply_status: Callable[[Dict[str, Any]], Awaitable[bool]],
+        delay: int,
+        interval: int,
+        max_checks: int,
+        batch_size: int = VERIFY_BATCH_SIZE,
+    ):
+        self.redis = redis_client
+        self.queue_client = queue_client
+        self.apply_status = apply_status
+        self.delay = delay
+        self.interval = interval
+        self.max_checks = max_checks
+        self.batch_size = batch_size
+
+        self._heap: List[Tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
+        self._claim = redis_client.register_script(_CLAIM_SCRIPT)
+        self._reschedule = redis_client.register_script(_RESCHEDULE_SCRIPT)
+        self._restore_claims = redis_client.register_script(_RESTORE_SCRIPT)
+
+    async def schedule(self, order_history_id: int, order_id: str, seqno: str, simulation: bool):
+        """Start verifying a newly submitted order."""
+        await self.schedule_many([(order_history_id, order_id, seqno)], simulation)
+
+    async def schedule_many(self, orders: List[Tuple[int, str, str]], simulation: bool):
+        """Start verifying (order_history_id, order_id, seqno) orders with one Redis round trip."""
+        if not orders:
+            return
+        due = time.time() + self.delay
+        members = {}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for order_history_id, order_id, seqno in orders:
+                member = verify_member(order_id, seqno, simulation)
+                state = {
+                    "id": order_history_id,
+                    "order_id": order_id,
+                    "seqno": seqno,
+                    "simulation": simulation,
+                    "checks": 0,
+                    "last_status": None,
+                }
+                pipe.hset(VERIFY_STATE_KEY, member, json.dumps(state))
+                members[member] = due
+            pipe.zadd(VERIFY_SCHEDULE_KEY, members)
+            await pipe.execute()
+        for (order_history_id, _, _), member in zip(orders, members):
+            self._push(due, member)
+            logger.info(f"[VERIFY] Scheduled order {order_history_id} ({member}), first check in {self.delay}s")
+
+    async def complete(self, order_id: str, seqno: str, simulation: bool):
+        """Stop verifying an order, e.g. once a fill event finalized it."""
+        member = verify_member(order_id, seqno, simulation)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(VERIFY_SCHEDULE_KEY, member)
+            pipe.zrem(VERIFY_CLAIMED_KEY, member)
+            pipe.hdel(VERIFY_STATE_KEY, member)
+            await pipe.execute()
+
+    def _push(self, due: float, member: str):
+        wake = not self._heap or due < self._heap[0][0]
+        heapq.heappush(self._heap, (due, member))
+        if wake:
+            self._wakeup.set()
+
+    async def _restore(self, startup: bool = True):
+        """Re-add orders whose claim lease ran out, i.e. the process checking them died."""
+        total, restored = await self._restore_claims(
+            keys=[VERIFY_STATE_KEY, VERIFY_SCHEDULE_KEY, VERIFY_CLAIMED_KEY], args=[time.time()]
+        )
+        if startup or restored:
+            logger.info(
+                f"[VERIFY] {total} orders awaiting verification"
+                + (f" ({restored} restored)" if restored else "")
+            )
+
+    async def _claim_due(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Claim up to batch_size due orders. Returns (member, state) pairs."""
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            heapq.heappop(self._heap)
+
+        claimed = await self._claim(
+            keys=[VERIFY_SCHEDULE_KEY, VERIFY_CLAIMED_KEY], args=[now, now + VERIFY_CLAIM_LEASE, self.batch_size]
+        )
+        if not claimed:
+            return []
+
+        states = await self.redis.hmget(VERIFY_STATE_KEY, claimed)
+        completed = [member for member, state in zip(claimed, states) if not state]
+        if completed:
+            await self.redis.zrem(VERIFY_CLAIMED_KEY, *completed)
+        return [(member, json.loads(state)) for member, state in zip(claimed, states) if state]
+
+    async def _check_batch(self, simulation: bool, states: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Fetch the status of one mode's orders in a single worker request."""
+        trade_keys = [f"{state['order_id']}:{state['seqno']}" for state in states]
+        try:
+            response = await self.queue_client.check_order_status_batch(trade_keys, simulation=simulation)
+        except (TimeoutError, ConnectionError) as e:
+            logger.warning(f"[VERIFY] Queue error checking {len(trade_keys)} orders: {e}")
+            return {}
+        if not response.success:
+            logger.warning(f"[VERIFY] Status check failed for {len(trade_keys)} orders: {response.error}")
+            return {}
+        for trade_key in response.data.get("missing", []):
+            logger.warning(f"[VERIFY] Trade not found in worker session: {trade_key}")
+        return response.data.get("statuses", {})
+
+    async def _apply_all(self, results: List[Optional[Dict[str, Any]]]):
+        found = [status_info for status_info in results if status_info is not None]
+        outcomes = await asyncio.gather(
+            *(self.apply_status(status_info) for status_info in found), return_exceptions=True
+        )
+        for status_info, outcome in zip(found, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"[VERIFY] Failed to update order {status_info.get('order_id')}: {outcome}")
+
+    async def _run_batch(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        # One request per mode, each covering all of that mode's due orders
+        modes = sorted({state["simulation"] for _, state in batch})
+        replies = await asyncio.gather(*(
+            self._check_batch(simulation, [state for _, state in batch if state["simulation"] == simulation])
+            for simulation in modes
+        ))
+        statuses = dict(zip(modes, replies))
+        results = [
+            statuses[state["simulation"]].get(f"{state['order_id']}:{state['seqno']}")
+            for _, state in batch
+        ]
+        await self._apply_all(results)
+
+        done, pending = [], []
+        due = time.time() + self.interval
+        for (member, state), status_info in zip(batch, results):
+            state["checks"] += 1
+            fill_status = status_info.get("status", "unknown") if status_info else state["last_status"]
+            if fill_status != state["last_status"]:
+                logger.info(f"[VERIFY] Order {state['id']} status changed: {state['last_status']} -> {fill_status}")
+                state["last_status"] = fill_status
+
+            if fill_status in FINAL_FILL_STATUSES:
+                done.append(member)
+            elif state["checks"] >= self.max_checks:
+                logger.warning(
+                    f"[VERIFY] ⚠ Order {state['id']} timeout: still '{fill_status}' "
+                    f"after {state['checks']} checks"
+                )
+                done.append(member)
+            else:
+                pending.extend((member, json.dumps(state)))
+                self._push(due, member)
+
+        if pending:
+            # Skips orders completed while they were being checked
+            await self._reschedule(keys=[VERIFY_STATE_KEY, VERIFY_SCHEDULE_KEY, VERIFY_CLAIMED_KEY], args=[due, *pending])
+        if done:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zrem(VERIFY_CLAIMED_KEY, *done)
+                pipe.hdel(VERIFY_STATE_KEY, *done)
+                await pipe.execute()
+
+    async def run(self):
+        """Check orders as they come due until cancelled."""
+        while True:
+            try:
+                await self._restore()
+                restored_at = time.time()
+                while True:
+                    if time.time() - restored_at > VERIFY_CLAIM_LEASE:
+                        await self._restore(startup=False)
+                        restored_at = time.time()
+
+                    batch = await self._claim_due()
+                    if batch:
+                        await self._run_batch(batch)
+                        if len(batch) == self.batch_size:
+                            continue
+
+                    # Sleep until the next local check, rescanning periodically
+                    # for orders scheduled by other API processes
+                    timeout = VERIFY_RESCAN_INTERVAL
+                    if self._heap:
+                        timeout = min(timeout, max(0.0, self._heap[0][0] - time.time()))
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+
+            except asyncio.CancelledError:
+                raise
+            except redis.RedisError as e:
+                logger.error(f"[VERIFY] Redis error: {e}")
+                await asyncio.sleep(5)
+            except Exception as e:
+                logger.exception(f"[VERIFY] Verifier error: {e}")
+                await asyncio.sleep(1)
@@ -1,30 +1,66 @@
+import asyncio
+import base64
 from contextlib import asynccontextmanager
 import csv
 from datetime import datetime
+import functools
 import io
+import json
 import logging
 import os
+import socket
 import time
-from typing import Literal, Optional
+import zlib
+from typing import List, Literal, Optional
 
-from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Header, Query
+from fastapi import Depends, FastAPI, HTTPException, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, model_validator
-from sqlalchemy import text
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError, OperationalError
-
-from database import get_db, SessionLocal
+import redis
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_engine, get_async_db, SessionLocal
+from fill_verifier import FillVerifier, FINAL_FILL_STATUSES, VERIFY_STATE_KEY
+from metrics import (
+    CONTENT_TYPE_LATEST,
+    DB_COMMIT_SECONDS,
+    OPEN_VERIFICATIONS,
+    WEBHOOK_SUBMIT_SECONDS,
+    render_metrics,
+)
 from models import OrderHistory
-from trading_queue import get_queue_client, TradingQueueClient
+from order_updates import OrderUpdateCoalescer
+from reference_cache import ReferenceCache
+from tracing import (
+    breakdown,
+    dump_trace,
+    export_order,
+    load_trace,
+    new_trace,
+    shutdown_tracing,
+    stamp,
+)
+from trading_queue import (
+    get_async_queue_client,
+    TradingOperation,
+    TradingQueueClient,
+    FILL_EVENTS_STREAM,
+    FILL_EVENTS_GROUP,
+)
 
 logger = logging.getLogger(__name__)
 
 
 ACCEPT_ACTIONS = Literal["long_entry", "long_exit", "short_entry", "short_exit"]
 AUTH_KEY = os.getenv("AUTH_KEY", "changeme")
+ORDER_BATCH_MAX_SIZE = int(os.getenv("ORDER_BATCH_MAX_SIZE", "20"))  # max orders per POST /orders/batch
+
+# Worker parameters of each action: entry side, or the direction of the position to exit
+ENTRY_ACTIONS = {"long_entry": "Buy", "short_entry": "Sell"}
+EXIT_DIRECTIONS = {"long_exit": "Buy", "short_exit": "Sell"}
 
 
 async def verify_auth_key(x_auth_key: str = Header(..., alias="X-Auth-Key")):
@@ -45,6 +81,20 @@ class OrderRequest(BaseModel):
         return self
 
 
+class BatchOrderRequest(BaseModel):
+    orders: List[OrderRequest] = Field(..., min_length=1, max_length=ORDER_BATCH_MAX_SIZE)
+
+    @model_validator(mode="after")
+    def validate_unique_symbols(self):
+        # Each order is sized from the position before the batch, which is
+        # only right for a symbol's first order: later ones must wait for its fill
+        symbols = [order.symbol for order in self.orders]
+        duplicates = sorted({symbol for symbol in symbols if symbols.count(symbol) > 1})
+        if duplicates:
+            raise ValueError(f"Each symbol may appear only once per batch: {', '.join(duplicates)}")
+        return self
+
+
 class OrderHistoryResponse(BaseModel):
     id: int
     symbol: str
@@ -68,8 +118,36 @@ class OrderHistoryResponse(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup - database migrations are handled by separate migration service
+    global fill_verifier, order_updates, reference_cache
+    queue_client = get_async_queue_client()
+    reference_cache = ReferenceCache(queue_client.redis)
+    order_updates = OrderUpdateCoalescer(async_engine)
+    fill_verifier = FillVerifier(
+        queue_client.redis,
+        queue_client,
+        functools.partial(order_updates.submit, source="poll"),
+        delay=ORDER_STATUS_CHECK_DELAY,
+        interval=ORDER_STATUS_CHECK_INTERVAL,
+        max_checks=ORDER_STATUS_MAX_RETRIES,
+    )
+    tasks = [
+        asyncio.create_task(consume_fill_events()),
+        asyncio.create_task(fill_verifier.run()),
+        asyncio.create_task(reference_cache.listen_for_invalidations()),
+        asyncio.create_task(order_updates.run()),
+    ]
     yield
-    # Shutdown (cleanup if needed)
+    # Shutdown - stop background consumers and release pooled Redis connections
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    try:
+        await order_updates.flush()
+    except Exception as e:
+        logger.error(f"Failed to write order updates on shutdown: {e}")
+    await queue_client.close()
+    await async_engine.dispose()
+    shutdown_tracing()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -80,244 +158,126 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
-# Background task configuration
-ORDER_STATUS_CHECK_DELAY = 2  # seconds to wait before first check
-ORDER_STATUS_CHECK_INTERVAL = 5  # seconds between retry checks
-ORDER_STATUS_MAX_RETRIES = 120  # max number of status checks (~10 minutes total)
-
-
-def verify_order_fill(
-    order_id: int,
-    trade_order_id: str,
-    trade_seqno: str,
-    simulation: bool,
-):
+# Fill verification configuration
+# Fills are normally pushed by the trading worker (see consume_fill_events);
+# polling by fill_verifier is only a fallback for missed callbacks, so it runs infrequently.
+ORDER_STATUS_CHECK_DELAY = int(os.getenv("ORDER_STATUS_CHECK_DELAY", "10"))  # seconds to wait before first check
+ORDER_STATUS_CHECK_INTERVAL = int(os.getenv("ORDER_STATUS_CHECK_INTERVAL", "30"))  # seconds between retry checks
+ORDER_STATUS_MAX_RETRIES = 600 // ORDER_STATUS_CHECK_INTERVAL  # max number of status checks (~10 minutes total)
+
+# Created in lifespan; one per API process
+fill_verifier: Optional[FillVerifier] = None
+order_updates: Optional[OrderUpdateCoalescer] = None
+reference_cache: Optional[ReferenceCache] = None
+
+# Fill event consumer configuration
+FILL_EVENTS_BATCH_SIZE = 100  # max events read per XREADGROUP
+FILL_EVENTS_BLOCK_MS = 5000  # milliseconds to block waiting for events
+FILL_EVENTS_CLAIM_IDLE_MS = 60000  # re-claim unacknowledged events after this long
+FILL_EVENTS_MAX_DELIVERIES = 5  # give up on an event after this many claims
+FILL_EVENTS_RETRY_DELAYS = (0.1, 0.25, 0.5, 1, 2, 5)  # seconds, while the order row is not committed yet
+
+async def _fill_event_applied(redis_client, entry_id: str, event: dict):
+    """Acknowledge an applied event; a final one also ends fallback polling."""
+    await redis_client.xack(FILL_EVENTS_STREAM, FILL_EVENTS_GROUP, entry_id)
+    if event.get("status") in FINAL_FILL_STATUSES and fill_verifier is not None:
+        await fill_verifier.complete(event.get("order_id"), event.get("seqno"), event.get("simulation", True))
+
+
+async def _apply_fill_event_with_retry(redis_client, entry_id: str, event: dict):
+    """Retry an event whose order row is not committed yet, then acknowledge it."""
+    for delay in FILL_EVENTS_RETRY_DELAYS:
+        await asyncio.sleep(delay)
+        if await order_updates.submit(event):
+            await _fill_event_applied(redis_client, entry_id, event)
+            return
+    # Left pending - it will be re-claimed after FILL_EVENTS_CLAIM_IDLE_MS
+    logger.warning(f"[FILL] No order found for {event.get('order_id')}:{event.get('seqno')}, will retry later")
+
+
+async def consume_fill_events():
     """
-    Background task to verify order fill status via Redis queue.
-    
-    According to Shioaji docs, after placing an order, the status is 'PendingSubmit'.
-    We need to call update_status to get the actual status from the exchange.
-    
-    Ref: https://sinotrade.github.io/zh/tutor/order/FutureOption/#_2
+    Consume fill events published by the trading worker's order callbacks.
+
+    All uvicorn workers join one consumer group, so each event is applied
+    exactly once. Unacknowledged events (e.g. from a crashed API process)
+    are re-claimed after FILL_EVENTS_CLAIM_IDLE_MS.
     """
-    logger.info(f"[BG] Starting order verification: order_id={order_id}, simulation={simulation}")
-    
-    # Wait before first check to allow order to reach exchange
-    logger.debug(f"[BG] Waiting {ORDER_STATUS_CHECK_DELAY}s before first check...")
-    time.sleep(ORDER_STATUS_CHECK_DELAY)
-    
-    # Database connection with retry logic
-    db = None
-    db_max_retries = 3
-    
-    def get_db_session():
-        """Get a new database session with retry logic."""
-        nonlocal db
-        for retry in range(db_max_retries):
-            try:
-                if db is not None:
-                    try:
-                        db.close()
-                    except Exception:
-                        pass
-                db = SessionLocal()
-                # Test connection
-                db.execute(text("SELECT 1"))
-                return db
-            except OperationalError as e:
-                logger.warning(f"[BG] DB connection failed (attempt {retry + 1}/{db_max_retries}): {e}")
-                time.sleep(2 ** retry)  # Exponential backoff: 1s, 2s, 4s
-        raise OperationalError("Failed to connect to database after retries", None, None)
-    
-    def safe_db_commit():
-        """Safely commit with error handling."""
-        nonlocal db
+    redis_client = get_async_queue_client().redis
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    claims: dict = {}
+    retry_tasks: set = set()
+
+    while True:
         try:
-            db.commit()
-            return True
-        except OperationalError as e:
-            logger.error(f"[BG] DB commit failed (connection error): {e}")
-            try:
-                db.rollback()
-            except Exception:
-                pass
-            # Try to reconnect
-            try:
-                db = get_db_session()
-                return False  # Caller should retry the operation
-            except Exception:
-                return False
-        except SQLAlchemyError as e:
-            logger.error(f"[BG] DB commit failed: {e}")
-            try:
-                db.rollback()
-            except Exception:
-                pass
-            return False
-    
-    last_status = None
-    order_record = None
-    
-    try:
-        # Initialize database connection
-        db = get_db_session()
-        logger.debug(f"[BG] Database connection established")
-        
-        # Get queue client for status checks
-        queue_client = get_queue_client()
-        logger.info(f"[BG] Queue client ready, starting status checks (max {ORDER_STATUS_MAX_RETRIES} checks, {ORDER_STATUS_CHECK_INTERVAL}s interval)")
-        
-        for attempt in range(ORDER_STATUS_MAX_RETRIES):
-            # Check order status via queue
             try:
-                response = queue_client.check_order_status(
-                    order_id=trade_order_id,
-                    seqno=trade_seqno,
-                    simulation=simulation,
+                await redis_client.xgroup_create(
+                    FILL_EVENTS_STREAM, FILL_EVENTS_GROUP, id="$", mkstream=True
                 )
-                
-                if not response.success:
-                    logger.warning(f"[BG] Status check failed: {response.error}")
-                    time.sleep(ORDER_STATUS_CHECK_INTERVAL)
-                    continue
-                    
-                status_info = response.data
-            except (TimeoutError, ConnectionError) as e:
-                logger.warning(f"[BG] Queue error during status check: {e}")
-                time.sleep(ORDER_STATUS_CHECK_INTERVAL)
-                continue
-            
-            fill_status = status_info.get("status", "unknown")
-            
-            # Log status change or periodic update (every 12 checks = ~1 minute)
-            if fill_status != last_status:
-                logger.info(f"[BG] Order {order_id} status changed: {last_status} -> {fill_status}")
-                last_status = fill_status
-            elif attempt % 12 == 0 and attempt > 0:
-                elapsed = attempt * ORDER_STATUS_CHECK_INTERVAL
-                logger.info(f"[BG] Order {order_id} still {fill_status} after {elapsed}s ({attempt}/{ORDER_STATUS_MAX_RETRIES} checks)")
-            
-            # Log detailed status info at debug level
-            logger.debug(
-                f"[BG] Check {attempt + 1}/{ORDER_STATUS_MAX_RETRIES}: "
-                f"status={fill_status}, "
-                f"deal_qty={status_info.get('deal_quantity', 0)}, "
-                f"cancel_qty={status_info.get('cancel_quantity', 0)}, "
-                f"order_qty={status_info.get('order_quantity', 0)}, "
-                f"seqno={status_info.get('seqno')}, "
-                f"ordno={status_info.get('ordno')}"
-            )
-            
-            # Log deals if any
-            deals = status_info.get("deals", [])
-            if deals:
-                for deal in deals:
-                    logger.info(f"[BG] Order {order_id} DEAL: qty={deal.get('quantity')}, price={deal.get('price')}, ts={deal.get('ts')}")
-            
-            # Update database record with error handling
-            try:
-                order_record = db.query(OrderHistory).filter(OrderHistory.id == order_id).first()
-            except OperationalError as e:
-                logger.warning(f"[BG] DB query failed, reconnecting: {e}")
-                try:
-                    db = get_db_session()
-                    order_record = db.query(OrderHistory).filter(OrderHistory.id == order_id).first()
-                except Exception as reconnect_error:
-                    logger.error(f"[BG] DB reconnect failed: {reconnect_error}")
-                    time.sleep(ORDER_STATUS_CHECK_INTERVAL)
-                    continue
-            
-            if order_record:
-                order_record.fill_status = fill_status
-                order_record.order_id = status_info.get("order_id")
-                order_record.seqno = status_info.get("seqno")
-                order_record.ordno = status_info.get("ordno")
-                order_record.fill_quantity = status_info.get("deal_quantity", 0)
-                order_record.fill_price = status_info.get("fill_avg_price")
-                order_record.cancel_quantity = status_info.get("cancel_quantity", 0)
-                order_record.updated_at = datetime.utcnow()
-                
-                # Update main status based on fill status
-                if fill_status == "Filled":
-                    order_record.status = "filled"
-                    if safe_db_commit():
-                        logger.info(
-                            f"[BG] ✓ Order {order_id} FILLED: "
-                            f"qty={status_info.get('deal_quantity')}, "
-                            f"avg_price={status_info.get('fill_avg_price')}, "
-                            f"deals={len(deals)}"
-                        )
-                        break
-                elif fill_status == "PartFilled":
-                    order_record.status = "partial_filled"
-                    if safe_db_commit():
-                        logger.info(
-                            f"[BG] ~ Order {order_id} PARTIAL: "
-                            f"filled={status_info.get('deal_quantity')}/{status_info.get('order_quantity')}, "
-                            f"avg_price={status_info.get('fill_avg_price')}"
-                        )
-                    # Continue checking for more fills
-                elif fill_status == "Cancelled":
-                    order_record.status = "cancelled"
-                    if safe_db_commit():
-                        logger.info(
-                            f"[BG] ✗ Order {order_id} CANCELLED: "
-                            f"cancel_qty={status_info.get('cancel_quantity')}, "
-                            f"msg={status_info.get('msg')}"
+                logger.info(f"Created consumer group '{FILL_EVENTS_GROUP}' on {FILL_EVENTS_STREAM}")
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+            logger.info(f"Consuming fill events from {FILL_EVENTS_STREAM} as {consumer}")
+            while True:
+                claimed = await redis_client.xautoclaim(
+                    FILL_EVENTS_STREAM,
+                    FILL_EVENTS_GROUP,
+                    consumer,
+                    min_idle_time=FILL_EVENTS_CLAIM_IDLE_MS,
+                    count=FILL_EVENTS_BATCH_SIZE,
+                )
+                entries = list(claimed[1])
+                for entry_id, _ in entries:
+                    claims[entry_id] = claims.get(entry_id, 0) + 1
+
+                result = await redis_client.xreadgroup(
+                    FILL_EVENTS_GROUP,
+                    consumer,
+                    {FILL_EVENTS_STREAM: ">"},
+                    count=FILL_EVENTS_BATCH_SIZE,
+                    block=FILL_EVENTS_BLOCK_MS,
+                )
+                for _, stream_entries in result or []:
+                    entries.extend(stream_entries)
+
+                events = []
+                for entry_id, fields in entries:
+                    if not fields or claims.get(entry_id, 0) > FILL_EVENTS_MAX_DELIVERIES:
+                        # Trimmed from the stream, or the order never showed up
+                        await redis_client.xack(FILL_EVENTS_STREAM, FILL_EVENTS_GROUP, entry_id)
+                        claims.pop(entry_id, None)
+                        continue
+                    events.append((entry_id, json.loads(fields["data"])))
+
+                # All events of the read are written by the same flush
+                applied = await asyncio.gather(*(order_updates.submit(event) for _, event in events))
+                for (entry_id, event), found in zip(events, applied):
+                    if found:
+                        await _fill_event_applied(redis_client, entry_id, event)
+                        claims.pop(entry_id, None)
+                    else:
+                        task = asyncio.create_task(
+                            _apply_fill_event_with_retry(redis_client, entry_id, event)
                         )
-                        break
-                elif fill_status == "Inactive":
-                    order_record.status = "cancelled"
-                    if safe_db_commit():
-                        logger.info(f"[BG] ✗ Order {order_id} INACTIVE (expired/rejected): msg={status_info.get('msg')}")
-                        break
-                elif fill_status in ("PendingSubmit", "PreSubmitted", "Submitted"):
-                    order_record.status = "submitted"
-                    safe_db_commit()
-                    # Already logged above
-                elif fill_status == "Failed":
-                    order_record.status = "failed"
-                    error_msg = status_info.get("msg") or status_info.get("error", "Order failed at exchange")
-                    order_record.error_message = error_msg
-                    if safe_db_commit():
-                        logger.error(f"[BG] ✗ Order {order_id} FAILED: {error_msg}, status_code={status_info.get('status_code')}")
-                        break
-                elif fill_status == "error":
-                    logger.error(f"[BG] Error checking order {order_id}: {status_info.get('error')}")
-                    safe_db_commit()
-                else:
-                    safe_db_commit()
-                    logger.warning(f"[BG] Order {order_id} unknown status: {fill_status}")
-            else:
-                logger.error(f"[BG] Order record not found in database: order_id={order_id}")
-            
-            # Wait before next check
-            time.sleep(ORDER_STATUS_CHECK_INTERVAL)
-        
-        # Final status after all retries
-        if order_record and order_record.status == "submitted":
-            total_time = ORDER_STATUS_CHECK_DELAY + (ORDER_STATUS_MAX_RETRIES * ORDER_STATUS_CHECK_INTERVAL)
-            logger.warning(
-                f"[BG] ⚠ Order {order_id} timeout: still '{fill_status}' after {total_time}s "
-                f"({ORDER_STATUS_MAX_RETRIES} checks). Last status_code={status_info.get('status_code')}"
-            )
-            
-    except OperationalError as e:
-        logger.error(f"[BG] Database connection error for order {order_id}: {e}")
-    except SQLAlchemyError as e:
-        logger.error(f"[BG] Database error for order {order_id}: {e}")
-    except Exception as e:
-        logger.exception(f"[BG] Error verifying order {order_id}: {e}")
-    finally:
-        if db is not None:
-            try:
-                db.close()
-            except Exception as e:
-                logger.debug(f"[BG] Error closing DB session: {e}")
-        logger.debug(f"[BG] Order {order_id} verification completed")
+                        retry_tasks.add(task)
+                        task.add_done_callback(retry_tasks.discard)
+
+        except asyncio.CancelledError:
+            for task in retry_tasks:
+                task.cancel()
+            raise
+        except redis.RedisError as e:
+            logger.error(f"Fill event consumer Redis error: {e}")
+            await asyncio.sleep(5)
+        except Exception as e:
+            logger.exception(f"Fill event consumer error: {e}")
+            await asyncio.sleep(1)
 
 
 @app.get("/futures")
@@ -331,8 +291,10 @@ async def list_futures_products(
     Use /futures/{code} to see all contracts for a specific product.
     """
     try:
-        queue_client = get_queue_client()
-        response = queue_client.get_futures_overview(simulation=simulation)
+        queue_client = get_async_queue_client()
+        response = await reference_cache.submit_request(
+            queue_client, TradingOperation.GET_FUTURES_OVERVIEW, simulation
+        )
         
         if not response.success:
             raise HTTPException(status_code=503, detail=response.error)
@@ -370,8 +332,10 @@ async def list_futures_contracts(
     Example: /futures/TXF returns all TXF contracts (TXFK5, TXFL5, etc.)
     """
     try:
-        queue_client = get_queue_client()
-        response = queue_client.get_product_contracts(product=code, simulation=simulation)
+        queue_client = get_async_queue_client()
+        response = await reference_cache.submit_request(
+            queue_client, TradingOperation.GET_PRODUCT_CONTRACTS, simulation, params={"product": code}
+        )
         
         if not response.success:
             if "not found" in (response.error or "").lower():
@@ -399,8 +363,8 @@ async def list_symbols(
 ):
     """Get list of valid trading symbols from SUPPORTED_FUTURES (configured in ENV)."""
     try:
-        queue_client = get_queue_client()
-        response = queue_client.get_symbols(simulation=simulation)
+        queue_client = get_async_queue_client()
+        response = await reference_cache.submit_request(queue_client, TradingOperation.GET_SYMBOLS, simulation)
         
         if not response.success:
             raise HTTPException(status_code=503, detail=response.error)
@@ -417,8 +381,10 @@ async def get_symbol_details(
 ):
     """Get detailed information about a specific symbol."""
     try:
-        queue_client = get_queue_client()
-        response = queue_client.get_symbol_info(symbol=symbol, simulation=simulation)
+        queue_client = get_async_queue_client()
+        response = await reference_cache.submit_request(
+            queue_client, TradingOperation.GET_SYMBOL_INFO, simulation, params={"symbol": symbol}
+        )
         
         if not response.success:
             if "not found" in (response.error or "").lower():
@@ -436,8 +402,8 @@ async def list_contracts(
 ):
     """Get list of valid contract codes."""
     try:
-        queue_client = get_queue_client()
-        response = queue_client.get_contract_codes(simulation=simulation)
+        queue_client = get_async_queue_client()
+        response = await reference_cache.submit_request(queue_client, TradingOperation.GET_CONTRACT_CODES, simulation)
         
         if not response.success:
             raise HTTPException(status_code=503, detail=response.error)
@@ -454,8 +420,8 @@ async def list_positions(
 ):
     """Get current futures/options positions. Ref: https://sinotrade.github.io/zh/tutor/accounting/position/"""
     try:
-        queue_client = get_queue_client()
-        response = queue_client.get_positions(simulation=simulation)
+        queue_client = get_async_queue_client()
+        response = await queue_client.get_positions(simulation=simulation)
         
         if not response.success:
             raise HTTPException(status_code=503, detail=response.error)
@@ -467,11 +433,87 @@ async def list_positions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def record_order_result(order_history: OrderHistory, result_data: dict):
+    """Update an order's row from the trading worker's placement result."""
+    # Check if it's a no-action response (no position to exit)
+    if result_data.get("order_id") is None and result_data.get("message"):
+        order_history.status = "no_action"
+        order_history.fill_status = None
+        return
+
+    # Extract order info from result
+    order_history.order_id = result_data.get("order_id")
+    order_history.seqno = result_data.get("seqno")
+    order_history.ordno = result_data.get("ordno")
+
+    # Update symbol/code with resolved values from trading worker
+    # (user may send code like MXFA6, but we store canonical symbol like MXF202601)
+    if result_data.get("symbol"):
+        order_history.symbol = result_data.get("symbol")
+    if result_data.get("code"):
+        order_history.code = result_data.get("code")
+
+    # For exit orders, update quantity with actual traded quantity from position
+    # (user's request quantity is ignored for exits - actual is determined by position size)
+    if order_history.action in EXIT_DIRECTIONS and result_data.get("quantity"):
+        order_history.quantity = result_data.get("quantity")
+
+    # Initial status is "submitted" (order accepted, pending verification)
+    order_history.status = "submitted"
+    order_history.order_result = str(result_data)
+
+
+class ModeNotConfiguredError(Exception):
+    """The trading worker does not serve a mode, e.g. real trading without a CA."""
+
+
+async def require_worker_ready(queue_client, mode: str):
+    """
+    Raise ConnectionError unless the worker heartbeat shows the mode ready for orders,
+    or ModeNotConfiguredError if the worker never logs the mode in.
+    """
+    heartbeat = await queue_client.get_worker_heartbeat()
+    if heartbeat is None:
+        raise ConnectionError("Trading worker is not running")
+    ready = heartbeat.get("ready") if isinstance(heartbeat, dict) else None
+    if not isinstance(ready, dict):
+        raise ConnectionError("Trading worker heartbeat has no readiness information")
+    modes = heartbeat.get("modes")
+    if isinstance(modes, list) and mode not in modes:
+        raise ModeNotConfiguredError(
+            f"Trading worker is not configured for {mode} trading (set CA_PATH and CA_PASSWORD)"
+        )
+    if not ready.get(mode):
+        raise ConnectionError(f"Trading worker {mode} connection is not ready")
+
+
+async def commit_and_schedule(db: AsyncSession, operation: str, placed: List[tuple], simulation: bool):
+    """
+    Commit new order rows while scheduling fallback verification of their fills.
+
+    placed holds (row id, order_id, seqno) of the flushed rows. The commit and
+    the Redis pipeline run concurrently; the first check is only due
+    ORDER_STATUS_CHECK_DELAY later, long after the commit.
+    """
+    async def commit():
+        with DB_COMMIT_SECONDS.labels(operation).time():
+            await db.commit()
+
+    committed, scheduled = await asyncio.gather(
+        commit(), fill_verifier.schedule_many(placed, simulation), return_exceptions=True
+    )
+    if isinstance(committed, BaseException):
+        raise committed
+    if isinstance(scheduled, redis.RedisError):
+        logger.error(f"Failed to schedule fill verification for orders {[p[0] for p in placed]}: {scheduled}")
+    elif isinstance(scheduled, BaseException):
+        raise scheduled
+
+
 @app.post("/order")
 async def create_order(
     order_request: OrderRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     simulation: bool = Query(True, description="Use simulation mode (default: True)"),
 ):
     """
@@ -483,6 +525,8 @@ async def create_order(
     
     Ref: https://sinotrade.github.io/zh/tutor/order/FutureOption/#_2
     """
+    received_at = time.perf_counter()
+    trace = new_trace()
     order_history = OrderHistory(
         symbol=order_request.symbol,
         action=order_request.action,
@@ -492,107 +536,94 @@ async def create_order(
     )
 
     try:
-        queue_client = get_queue_client()
-    except (ConnectionError, Exception) as e:
+        queue_client = get_async_queue_client()
+        # Fail fast instead of queueing behind a worker that is down or still logging in
+        mode = "simulation" if simulation else "real"
+        await require_worker_ready(queue_client, mode)
+    except (ConnectionError, ModeNotConfiguredError) as e:
         order_history.status = "failed"
         order_history.error_message = str(e)
         db.add(order_history)
-        db.commit()
-        raise HTTPException(status_code=503, detail=str(e))
+        await db.commit()
+        raise HTTPException(status_code=400 if isinstance(e, ModeNotConfiguredError) else 503, detail=str(e))
 
     response = None
     try:
         if order_request.action == "long_entry":
-            response = queue_client.place_entry_order(
+            response = await queue_client.place_entry_order(
                 symbol=order_request.symbol,
                 quantity=order_request.quantity,
                 action="Buy",
                 simulation=simulation,
+                trace=trace,
             )
         elif order_request.action == "short_entry":
-            response = queue_client.place_entry_order(
+            response = await queue_client.place_entry_order(
                 symbol=order_request.symbol,
                 quantity=order_request.quantity,
                 action="Sell",
                 simulation=simulation,
+                trace=trace,
             )
         elif order_request.action == "long_exit":
-            response = queue_client.place_exit_order(
+            response = await queue_client.place_exit_order(
                 symbol=order_request.symbol,
                 position_direction="Buy",
                 simulation=simulation,
+                trace=trace,
             )
         elif order_request.action == "short_exit":
-            response = queue_client.place_exit_order(
+            response = await queue_client.place_exit_order(
                 symbol=order_request.symbol,
                 position_direction="Sell",
                 simulation=simulation,
+                trace=trace,
             )
-            
+        if response is not None:
+            WEBHOOK_SUBMIT_SECONDS.labels(order_request.action, mode).observe(time.perf_counter() - received_at)
+            trace = response.trace or trace
+            stamp(trace, "response_received")
+            order_history.timings = dump_trace(trace)
+
         if response and not response.success:
             order_history.status = "failed"
             order_history.error_message = response.error
             db.add(order_history)
-            db.commit()
+            await db.commit()
             raise HTTPException(status_code=400, detail=response.error)
             
     except (TimeoutError, ConnectionError) as e:
         order_history.status = "failed"
         order_history.error_message = str(e)
         db.add(order_history)
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=503, detail=f"Trading service unavailable: {e}")
 
     if response is None or response.data is None:
         order_history.status = "failed"
         order_history.error_message = "No response from trading service"
         db.add(order_history)
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=500, detail="No response from trading service")
 
     result_data = response.data
-    
-    # Check if it's a no-action response (no position to exit)
-    if result_data.get("order_id") is None and result_data.get("message"):
-        order_history.status = "no_action"
-        order_history.fill_status = None
+    record_order_result(order_history, result_data)
+
+    if order_history.status == "no_action":
         db.add(order_history)
-        db.commit()
+        await db.commit()
         return {"status": "no_action", "message": result_data.get("message", "No position to exit or invalid action")}
 
-    # Extract order info from result
-    order_history.order_id = result_data.get("order_id")
-    order_history.seqno = result_data.get("seqno")
-    order_history.ordno = result_data.get("ordno")
-    
-    # Update symbol/code with resolved values from trading worker
-    # (user may send code like MXFA6, but we store canonical symbol like MXF202601)
-    if result_data.get("symbol"):
-        order_history.symbol = result_data.get("symbol")
-    if result_data.get("code"):
-        order_history.code = result_data.get("code")
-    
-    # For exit orders, update quantity with actual traded quantity from position
-    # (user's request quantity is ignored for exits - actual is determined by position size)
-    if order_request.action in ("long_exit", "short_exit") and result_data.get("quantity"):
-        order_history.quantity = result_data.get("quantity")
-
-    # Initial status is "submitted" (order accepted, pending verification)
-    order_history.status = "submitted"
-    order_history.order_result = str(result_data)
+    stamp(trace, "persisted")
+    order_history.timings = dump_trace(trace)
     db.add(order_history)
-    db.commit()
-    db.refresh(order_history)
-    
-    # Spawn background task to verify fill status
+    await db.flush()
+    placed = []
     if result_data.get("order_id") and result_data.get("seqno"):
-        background_tasks.add_task(
-            verify_order_fill,
-            order_id=order_history.id,
-            trade_order_id=result_data.get("order_id"),
-            trade_seqno=result_data.get("seqno"),
-            simulation=simulation,
-        )
+        placed.append((order_history.id, result_data.get("order_id"), result_data.get("seqno")))
+    await commit_and_schedule(db, "create_order", placed, simulation)
+    order_updates.track(order_history)
+    export_order(trace, order=order_history.id, action=order_request.action, mode=mode)
 
     return {
         "status": "submitted",
@@ -602,20 +633,134 @@ async def create_order(
     }
 
 
-@app.get("/orders", response_model=list[OrderHistoryResponse])
-async def get_orders(
-    db: Session = Depends(get_db),
-    _: str = Depends(verify_auth_key),
-    symbol: Optional[str] = Query(None, description="Filter by symbol"),
-    action: Optional[str] = Query(None, description="Filter by action"),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    start_date: Optional[datetime] = Query(None, description="Filter from date"),
-    end_date: Optional[datetime] = Query(None, description="Filter to date"),
-    limit: int = Query(100, ge=1, le=1000, description="Limit results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
+async def insert_orders(db: AsyncSession, rows: List[OrderHistory]) -> List[int]:
+    """Insert transient OrderHistory rows with one multi-row INSERT. Returns their ids in order."""
+    columns = [column.key for column in OrderHistory.__table__.columns if column.key != "id"]
+    # render_nulls keeps every row's column set identical, so the rows are not split into
+    # one INSERT per combination of unset columns
+    statement = (
+        insert(OrderHistory)
+        .returning(OrderHistory.id, sort_by_parameter_order=True)
+        .execution_options(render_nulls=True)
+    )
+    return list(await db.scalars(statement, [{key: getattr(row, key) for key in columns} for row in rows]))
+
+
+@app.post("/orders/batch")
+async def create_orders_batch(
+    batch: BatchOrderRequest,
+    db: AsyncSession = Depends(get_async_db),
+    simulation: bool = Query(True, description="Use simulation mode (default: True)"),
 ):
-    query = db.query(OrderHistory)
+    """
+    Place several orders at once, e.g. the legs of a multi-symbol rebalance.
+
+    The orders go to the trading worker as one PLACE_ORDERS_BATCH request,
+    which sizes them from a single position snapshot and places them
+    back-to-back, in the given order. Their OrderHistory rows are written
+    with one bulk insert. Each order succeeds or fails on its own; the
+    response lists one result per order.
+    """
+    received_at = time.perf_counter()
+    trace = new_trace()
+    mode = "simulation" if simulation else "real"
+    created_at = datetime.utcnow()
+    # Built as plain objects and inserted in bulk, never added to the session
+    rows = [
+        OrderHistory(
+            symbol=order.symbol,
+            action=order.action,
+            quantity=order.quantity,
+            status="pending",
+            fill_status="PendingSubmit",
+            created_at=created_at,
+        )
+        for order in batch.orders
+    ]
+
+    async def fail_all(error: str):
+        for row in rows:
+            row.status = "failed"
+            row.error_message = error
+        await insert_orders(db, rows)
+        await db.commit()
+
+    try:
+        queue_client = get_async_queue_client()
+        # Fail fast instead of queueing behind a worker that is down or still logging in
+        await require_worker_ready(queue_client, mode)
+    except (ConnectionError, ModeNotConfiguredError) as e:
+        await fail_all(str(e))
+        raise HTTPException(status_code=400 if isinstance(e, ModeNotConfiguredError) else 503, detail=str(e))
+
+    orders = [
+        {"symbol": order.symbol, "quantity": order.quantity, "action": ENTRY_ACTIONS[order.action]}
+        if order.action in ENTRY_ACTIONS
+        else {"symbol": order.symbol, "position_direction": EXIT_DIRECTIONS[order.action]}
+        for order in batch.orders
+    ]
+    try:
+        response = await queue_client.place_orders_batch(orders, simulation=simulation, trace=trace)
+    except (TimeoutError, ConnectionError) as e:
+        await fail_all(str(e))
+        raise HTTPException(status_code=503, detail=f"Trading service unavailable: {e}")
+
+    if not response.success:
+        await fail_all(response.error)
+        raise HTTPException(status_code=400, detail=response.error)
+    if response.data is None:
+        await fail_all("No response from trading service")
+        raise HTTPException(status_code=500, detail="No response from trading service")
+
+    WEBHOOK_SUBMIT_SECONDS.labels("batch", mode).observe(time.perf_counter() - received_at)
+    trace = response.trace or trace
+    stamp(trace, "response_received")
+
+    for row, result in zip(rows, response.data["results"]):
+        if result["success"]:
+            record_order_result(row, result["data"])
+        else:
+            row.status = "failed"
+            row.error_message = result["error"]
+    stamp(trace, "persisted")
+    timings = dump_trace(trace)
+    for row in rows:
+        row.timings = timings
+
+    for row, order_id in zip(rows, await insert_orders(db, rows)):
+        row.id = order_id
+    placed = [(row.id, row.order_id, row.seqno) for row in rows if row.order_id and row.seqno]
+    await commit_and_schedule(db, "create_orders_batch", placed, simulation)
+    for row in rows:
+        order_updates.track(row)
+    results = [
+        {
+            "order_id": row.id,
+            "status": row.status,
+            "error": row.error_message,
+            "order": result.get("data"),
+        }
+        for row, result in zip(rows, response.data["results"])
+    ]
+    export_order(trace, orders=[order_id for order_id, _, _ in placed], action="batch", mode=mode)
+
+    statuses = {result["status"] for result in results}
+    return {
+        "status": "submitted" if placed else "no_action" if "no_action" in statuses else "failed",
+        "message": f"{len(placed)} of {len(rows)} orders submitted. Fill status will be verified in background.",
+        "orders": results,
+    }
 
+
+def filter_orders(
+    query,
+    symbol: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """Apply the common /orders filters to an OrderHistory query."""
     if symbol:
         query = query.filter(OrderHistory.symbol == symbol)
     if action:
@@ -626,69 +771,217 @@ async def get_orders(
         query = query.filter(OrderHistory.created_at >= start_date)
     if end_date:
         query = query.filter(OrderHistory.created_at <= end_date)
+    return query
 
-    orders = query.order_by(OrderHistory.created_at.desc()).offset(offset).limit(limit).all()
-    return orders
 
+def encode_order_cursor(order: OrderHistory) -> str:
+    """Opaque keyset cursor pointing just past an order in (created_at, id) order."""
+    raw = json.dumps([order.created_at.isoformat(), order.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-@app.get("/orders/export")
-async def export_orders(
-    db: Session = Depends(get_db),
+
+def decode_order_cursor(cursor: str) -> tuple:
+    """Decode a cursor from encode_order_cursor into (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+@app.get("/orders", response_model=list[OrderHistoryResponse])
+async def get_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     _: str = Depends(verify_auth_key),
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
     action: Optional[str] = Query(None, description="Filter by action"),
     status: Optional[str] = Query(None, description="Filter by status"),
     start_date: Optional[datetime] = Query(None, description="Filter from date"),
     end_date: Optional[datetime] = Query(None, description="Filter to date"),
-    format: str = Query("csv", description="Export format: csv or json"),
+    limit: int = Query(100, ge=1, le=1000, description="Limit results"),
+    offset: int = Query(0, ge=0, description="Offset for pagination (ignored when 'after' is set)"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's X-Next-Cursor header"),
 ):
-    query = db.query(OrderHistory)
+    """
+    List orders, newest first.
 
-    if symbol:
-        query = query.filter(OrderHistory.symbol == symbol)
-    if action:
-        query = query.filter(OrderHistory.action == action)
-    if status:
-        query = query.filter(OrderHistory.status == status)
-    if start_date:
-        query = query.filter(OrderHistory.created_at >= start_date)
-    if end_date:
-        query = query.filter(OrderHistory.created_at <= end_date)
+    When a full page is returned, the X-Next-Cursor response header holds a
+    cursor for the next page; pass it back as 'after'. Cursor paging stays
+    fast at any depth, unlike offset.
+    """
+    query = filter_orders(select(OrderHistory), symbol, action, status, start_date, end_date)
+
+    if after:
+        created_at, order_id = decode_order_cursor(after)
+        query = query.filter(tuple_(OrderHistory.created_at, OrderHistory.id) < (created_at, order_id))
+    elif offset:
+        query = query.offset(offset)
+
+    orders = (await db.scalars(
+        query.order_by(OrderHistory.created_at.desc(), OrderHistory.id.desc()).limit(limit)
+    )).all()
+
+    if len(orders) == limit:
+        response.headers["X-Next-Cursor"] = encode_order_cursor(orders[-1])
+    return orders
 
-    orders = query.order_by(OrderHistory.created_at.desc()).all()
 
-    if format == "json":
-        return [order.to_dict() for order in orders]
+# Export configuration
+EXPORT_BATCH_SIZE = 1000  # rows fetched per server-side cursor batch (and per response chunk)
+EXPORT_CSV_COLUMNS = ["id", "symbol", "action", "quantity", "status", "order_result", "error_message", "created_at"]
 
-    # CSV export
+
+def _export_rows(statement):
+    """
+    Yield OrderHistory rows in batches through a server-side cursor.
+
+    Uses its own session: the response body is streamed after the request's
+    dependencies have been torn down.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        # The identity map is weak-referencing, so written batches are freed
+        for batch in result.scalars().partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def _export_csv_chunks(statement):
+    """Stream the export as CSV, one chunk per batch."""
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow(["id", "symbol", "action", "quantity", "status", "order_result", "error_message", "created_at"])
-
-    for order in orders:
-        writer.writerow([
-            order.id,
-            order.symbol,
-            order.action,
-            order.quantity,
-            order.status,
-            order.order_result,
-            order.error_message,
-            order.created_at.isoformat() if order.created_at else "",
-        ])
-
-    output.seek(0)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+
+    for batch in _export_rows(statement):
+        for order in batch:
+            writer.writerow([
+                order.id,
+                order.symbol,
+                order.action,
+                order.quantity,
+                order.status,
+                order.order_result,
+                order.error_message,
+                order.created_at.isoformat() if order.created_at else "",
+            ])
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+
+    # Header only when there are no rows
+    if output.tell():
+        yield output.getvalue()
+
+
+def _export_json_chunks(statement, ndjson: bool):
+    """Stream the export as a JSON array or as newline-delimited JSON."""
+    separator = "\n" if ndjson else ","
+    first = True
+    if not ndjson:
+        yield "["
+    for batch in _export_rows(statement):
+        chunk = separator.join(json.dumps(order.to_dict(), ensure_ascii=False) for order in batch)
+        if ndjson:
+            yield chunk + "\n"
+        else:
+            yield chunk if first else separator + chunk
+        first = False
+    if not ndjson:
+        yield "]"
+
+
+def _gzip_chunks(chunks):
+    """Gzip a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.get("/orders/export")
+async def export_orders(
+    _: str = Depends(verify_auth_key),
+    symbol: Optional[str] = Query(None, description="Filter by symbol"),
+    action: Optional[str] = Query(None, description="Filter by action"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    start_date: Optional[datetime] = Query(None, description="Filter from date"),
+    end_date: Optional[datetime] = Query(None, description="Filter to date"),
+    format: Literal["csv", "json", "ndjson"] = Query("csv", description="Export format: csv, json or ndjson"),
+    compress: bool = Query(False, description="Gzip the export (adds .gz to the filename)"),
+):
+    """
+    Export order history as a stream.
+
+    Rows are read through a server-side cursor and written in chunks, so
+    memory stays constant regardless of how much history matches.
+    """
+    statement = filter_orders(
+        select(OrderHistory), symbol, action, status, start_date, end_date
+    ).order_by(OrderHistory.created_at.desc(), OrderHistory.id.desc())
+
+    if format == "csv":
+        chunks = _export_csv_chunks(statement)
+        media_type = "text/csv"
+    else:
+        chunks = _export_json_chunks(statement, ndjson=format == "ndjson")
+        media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+
+    filename = f"order_history.{format}"
+    if compress:
+        chunks = _gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=order_history.csv"},
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
 
+@app.get("/orders/{order_id}/timings")
+async def get_order_timings(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _: str = Depends(verify_auth_key),
+):
+    """
+    Latency breakdown of an order from webhook to fill.
+
+    stages_ms are the times each stage was reached, in milliseconds after the
+    webhook was received; breakdown_ms is the time spent between stages.
+    """
+    order_record = await db.get(OrderHistory, order_id)
+    if not order_record:
+        raise HTTPException(status_code=404, detail=f"Order {order_id} not found")
+
+    trace = load_trace(order_record.timings)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"No timings recorded for order {order_id}")
+
+    received = trace["stages"]["received"]
+    return {
+        "order_id": order_record.id,
+        "trace_id": trace["trace_id"],
+        "fill_source": trace.get("fill_source"),
+        "stages_ms": {
+            name: round((at - received) * 1000, 3)
+            for name, at in sorted(trace["stages"].items(), key=lambda item: item[1])
+        },
+        "breakdown_ms": breakdown(trace),
+    }
+
+
 @app.post("/orders/{order_id}/recheck")
 async def recheck_order_status(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: str = Depends(verify_auth_key),
     simulation: bool = Query(True, description="Use simulation mode"),
 ):
@@ -699,7 +992,7 @@ async def recheck_order_status(
     Useful for orders where the background task may have timed out or for manual verification.
     """
     # Get order from database
-    order_record = db.query(OrderHistory).filter(OrderHistory.id == order_id).first()
+    order_record = await db.get(OrderHistory, order_id)
     if not order_record:
         raise HTTPException(status_code=404, detail=f"Order {order_id} not found")
     
@@ -709,10 +1002,12 @@ async def recheck_order_status(
             status_code=400, 
             detail="Order does not have seqno/order_id - cannot re-check status. This may be a failed or no_action order."
         )
-    
+    # Return the connection to the pool during the worker round trip (the row stays loaded)
+    await db.commit()
+
     try:
-        queue_client = get_queue_client()
-        response = queue_client.check_order_status(
+        queue_client = get_async_queue_client()
+        response = await queue_client.check_order_status(
             order_id=order_record.order_id,
             seqno=order_record.seqno,
             simulation=simulation,
@@ -762,7 +1057,9 @@ async def recheck_order_status(
         elif fill_status in ("PendingSubmit", "PreSubmitted", "Submitted"):
             order_record.status = "submitted"
         
-        db.commit()
+        await db.commit()
+        # Queued fill events continue from the state written here
+        order_updates.track(order_record)
         
         return {
             "order_id": order_id,
@@ -793,15 +1090,21 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 @app.get("/health")
 async def health_check():
-    """Check the health of the API and trading worker."""
+    """Check the health of the API and trading worker (from the worker heartbeat)."""
     try:
-        queue_client = get_queue_client()
-        worker_healthy = queue_client.check_worker_health()
-        
+        queue_client = get_async_queue_client()
+        heartbeat = await queue_client.get_worker_heartbeat()
+        ready = heartbeat["ready"] if heartbeat else {}
+
         return {
             "api": "healthy",
-            "trading_worker": "healthy" if worker_healthy else "unhealthy",
+            "trading_worker": "healthy" if heartbeat else "unhealthy",
             "redis": "connected",
+            "ready": {
+                "simulation": ready.get("simulation", False),
+                "real": ready.get("real", False),
+            },
+            "worker": heartbeat,
         }
     except Exception as e:
         return {
@@ -812,6 +1115,58 @@ async def health_check():
         }
 
 
+@app.get("/health/live")
+async def health_live(response: Response):
+    """Liveness: the trading worker has published a heartbeat recently. 503 otherwise."""
+    try:
+        heartbeat = await get_async_queue_client().get_worker_heartbeat()
+    except ConnectionError as e:
+        response.status_code = 503
+        return {"live": False, "error": str(e)}
+
+    if heartbeat is None:
+        response.status_code = 503
+        return {"live": False, "error": "No trading worker heartbeat"}
+    return {"live": True, "worker": heartbeat["worker"], "age": round(time.time() - heartbeat["updated"], 1)}
+
+
+@app.get("/health/ready")
+async def health_ready(
+    response: Response,
+    mode: Optional[Literal["simulation", "real"]] = Query(None, description="Mode to check; default: all modes the worker serves"),
+):
+    """Readiness: the trading worker has warmed up and is connected. 503 otherwise."""
+    try:
+        heartbeat = await get_async_queue_client().get_worker_heartbeat()
+    except ConnectionError as e:
+        response.status_code = 503
+        return {"ready": False, "error": str(e)}
+
+    if heartbeat is None:
+        response.status_code = 503
+        return {"ready": False, "error": "No trading worker heartbeat"}
+
+    modes = [mode] if mode else heartbeat["modes"]
+    status = {
+        m: heartbeat["ready"].get(m, False) and heartbeat["connections"][m]["connected"]
+        for m in modes
+    }
+    ready = all(status.values())
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "modes": status, "queue_depth": heartbeat["queue_depth"]}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of the API processes (the trading worker serves its own)."""
+    try:
+        OPEN_VERIFICATIONS.set(await get_async_queue_client().redis.hlen(VERIFY_STATE_KEY))
+    except redis.RedisError as e:
+        logger.warning(f"Could not read open verifications: {e}")
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/dashboard")
 async def dashboard():
     """Serve the dashboard HTML page."""
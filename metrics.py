@@ -0,0 +1,115 @@
+"""
+Metrics - Prometheus instrumentation shared by the API and the trading worker.
+
+The API serves these at /metrics. uvicorn runs several API processes, so when
+PROMETHEUS_MULTIPROC_DIR is set (see docker-compose.yaml) each process writes
+its samples there and /metrics aggregates them. The trading worker is a single
+process and serves its metrics on WORKER_METRICS_PORT.
+
+Latency histograms, by where the time is spent:
+
+    webhook -> broker submit   shioaji_webhook_submit_seconds   (API)
+    queue wait                 shioaji_queue_wait_seconds       (worker)
+    service time               shioaji_service_seconds          (worker)
+    api.place_order            shioaji_place_order_seconds      (worker)
+    submit -> fill recorded    shioaji_fill_detection_seconds   (API)
+    DB commit                  shioaji_db_commit_seconds        (API)
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9101"))
+
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+# Seconds; fine-grained below 100ms where broker round trips normally land
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25,
+    0.5, 0.75, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+FILL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# API
+WEBHOOK_SUBMIT_SECONDS = Histogram(
+    "shioaji_webhook_submit_seconds",
+    "Time from receiving an order webhook to the broker's submit result",
+    ["action", "mode"],
+    buckets=LATENCY_BUCKETS,
+)
+FILL_DETECTION_SECONDS = Histogram(
+    "shioaji_fill_detection_seconds",
+    "Time from order creation to its fill being recorded in order history",
+    ["source"],  # callback or poll
+    buckets=FILL_BUCKETS,
+)
+DB_COMMIT_SECONDS = Histogram(
+    "shioaji_db_commit_seconds",
+    "Duration of order history commits",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+OPEN_VERIFICATIONS = Gauge(
+    "shioaji_open_verifications",
+    "Orders awaiting fallback fill verification",
+    multiprocess_mode="mostrecent",  # read from Redis at scrape time
+)
+
+# Trading worker
+QUEUE_WAIT_SECONDS = Histogram(
+    "shioaji_queue_wait_seconds",
+    "Time from a request being enqueued to a worker thread starting on it",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+SERVICE_SECONDS = Histogram(
+    "shioaji_service_seconds",
+    "Time the trading worker spends handling a request",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+PLACE_ORDER_SECONDS = Histogram(
+    "shioaji_place_order_seconds",
+    "Duration of api.place_order",
+    ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_DEPTH = Gauge(
+    "shioaji_queue_depth",
+    "Requests waiting in each request queue",
+    ["queue"],
+)
+PENDING_TRADES = Gauge(
+    "shioaji_pending_trades",
+    "Trades held by the trading worker for status checks",
+    ["mode"],
+)
+IN_FLIGHT_REQUESTS = Gauge(
+    "shioaji_in_flight_requests",
+    "Requests being handled by the trading worker",
+)
+
+
+def render_metrics() -> bytes:
+    """Metrics of this process, or of all API processes in multiprocess mode."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def start_worker_exporter(port: int = WORKER_METRICS_PORT):
+    """Serve the trading worker's metrics over HTTP in a background thread."""
+    start_http_server(port)
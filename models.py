@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Enum, Index
 import enum
 
 from database import Base
@@ -25,18 +25,18 @@ class OrderStatus(str, enum.Enum):
 class OrderHistory(Base):
     __tablename__ = "order_history"
 
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, nullable=False, index=True)  # Shioaji symbol (e.g., MXF202601, MXFR1)
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, nullable=False)  # Shioaji symbol (e.g., MXF202601, MXFR1)
     code = Column(String, nullable=True, index=True)  # Exchange code (e.g., MXFA6)
     action = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
     status = Column(String, nullable=False)
     order_result = Column(String, nullable=True)
     error_message = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
     
     # Order tracking fields (from Shioaji Trade object)
-    order_id = Column(String, nullable=True, index=True)  # Trade.order.id
+    order_id = Column(String, nullable=True)  # Trade.order.id
     seqno = Column(String, nullable=True)  # Trade.order.seqno
     ordno = Column(String, nullable=True)  # Trade.order.ordno
     
@@ -47,6 +47,9 @@ class OrderHistory(Base):
     cancel_quantity = Column(Integer, nullable=True)  # Cancelled quantity
     updated_at = Column(DateTime, nullable=True)  # Last status update time
 
+    # Latency breakdown from webhook to fill (JSON trace, see tracing.py)
+    timings = Column(String, nullable=True)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -65,3 +68,17 @@ class OrderHistory(Base):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+
+# Composite indexes for /orders filters and keyset pagination (see db/migrations/002)
+Index("ix_order_history_created_at_id", OrderHistory.created_at.desc(), OrderHistory.id.desc())
+Index("ix_order_history_status_created_at_id", OrderHistory.status, OrderHistory.created_at.desc(), OrderHistory.id.desc())
+Index("ix_order_history_symbol_created_at_id", OrderHistory.symbol, OrderHistory.created_at.desc(), OrderHistory.id.desc())
+Index("ix_order_history_action_created_at_id", OrderHistory.action, OrderHistory.created_at.desc(), OrderHistory.id.desc())
+Index(
+    "ix_order_history_symbol_status_created_at_id",
+    OrderHistory.symbol,
+    OrderHistory.status,
+    OrderHistory.created_at.desc(),
+    OrderHistory.id.desc(),
+)
+Index("ix_order_history_order_id_seqno", OrderHistory.order_id, OrderHistory.seqno)
@@ -0,0 +1,289 @@
+"""
+Order Updates - write-behind coalescing of OrderHistory fill status updates.
+
+Fill events (order callbacks and fallback status polls) are queued in
+memory and applied every ORDER_UPDATE_FLUSH_INTERVAL seconds. A flush
+applies each order's events to its last known row state, writes only the
+orders whose state actually changed, and does so with one
+UPDATE ... FROM (VALUES ...) for all of them.
+
+Row state is cached per API process: orders created by this process are
+cached from the start, and orders it has not seen are loaded with one
+SELECT per flush. A row is only written if its updated_at still matches the
+cached state; otherwise another process (or a recheck) changed it, and its
+events are applied again to the reloaded row on the next flush.
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, cast, column, select, tuple_, update, values
+
+from fill_verifier import FINAL_FILL_STATUSES
+from metrics import DB_COMMIT_SECONDS, FILL_DETECTION_SECONDS
+from models import OrderHistory
+from tracing import dump_trace, export_fill, load_trace, stamp
+
+logger = logging.getLogger(__name__)
+
+ORDER_UPDATE_FLUSH_INTERVAL = float(os.getenv("ORDER_UPDATE_FLUSH_INTERVAL", "0.2"))  # seconds between flushes
+ORDER_UPDATE_MAX_BATCH = 500  # pending events that trigger an early flush
+ORDER_UPDATE_CACHE_SIZE = 10000  # order row states kept per process
+ORDER_UPDATE_MAX_CONFLICTS = 3  # flushes in a row an order may lose to concurrent writers before its events fail
+
+# Mapping from exchange fill status to order_history.status
+FILL_STATUS_TO_ORDER_STATUS = {
+    "Filled": "filled",
+    "PartFilled": "partial_filled",
+    "Cancelled": "cancelled",
+    "Inactive": "cancelled",
+    "Failed": "failed",
+    "PendingSubmit": "submitted",
+    "PreSubmitted": "submitted",
+    "Submitted": "submitted",
+}
+FINAL_ORDER_STATUSES = ("filled", "cancelled", "failed")
+
+# Columns a fill event can change
+UPDATE_COLUMNS = (
+    "status",
+    "fill_status",
+    "fill_quantity",
+    "fill_price",
+    "ordno",
+    "cancel_quantity",
+    "error_message",
+    "timings",
+    "updated_at",
+)
+STATE_COLUMNS = ("id", "order_id", "seqno", "created_at") + UPDATE_COLUMNS
+
+OrderKey = Tuple[str, str]  # (order_id, seqno)
+
+
+class OrderUpdateCoalescer:
+    """Queues fill events and writes the resulting order changes in batches."""
+
+    def __init__(
+        self,
+        engine,
+        interval: float = ORDER_UPDATE_FLUSH_INTERVAL,
+        max_batch: int = ORDER_UPDATE_MAX_BATCH,
+        cache_size: int = ORDER_UPDATE_CACHE_SIZE,
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[OrderKey, Dict[str, Any]]" = OrderedDict()
+        self._pending: List[Tuple[OrderKey, Dict[str, Any], str, asyncio.Future]] = []
+        self._conflicts: Dict[OrderKey, int] = {}  # consecutive flushes an order's row changed concurrently
+        self._wakeup = asyncio.Event()
+
+    def track(self, order: OrderHistory):
+        """Cache the state of a row just written, e.g. a newly created order."""
+        if order.order_id and order.seqno:
+            self._remember((order.order_id, order.seqno), {name: getattr(order, name) for name in STATE_COLUMNS})
+
+    def submit(self, event: dict, source: str = "callback") -> asyncio.Future:
+        """
+        Queue a fill event for its OrderHistory row.
+
+        source is "callback" for order callback events and "poll" for fallback
+        status checks. The returned future resolves after the next flush: to
+        False if the row does not exist yet (the callback can arrive before
+        create_order commits), to True once the event has been handled.
+        """
+        future = asyncio.get_running_loop().create_future()
+        key = (event.get("order_id"), event.get("seqno"))
+        self._pending.append((key, event, source, future))
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return future
+
+    def _remember(self, key: OrderKey, state: Dict[str, Any]):
+        self._cache[key] = state
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _load(self, conn, keys: Set[OrderKey]):
+        """Cache the rows of orders this process has not seen, in one SELECT."""
+        table = OrderHistory.__table__
+        result = await conn.execute(
+            select(*(table.c[name] for name in STATE_COLUMNS))
+            .where(tuple_(table.c.order_id, table.c.seqno).in_(list(keys)))
+        )
+        for row in result.mappings():
+            self._remember((row["order_id"], row["seqno"]), dict(row))
+
+    def _apply(self, key: OrderKey, state: Dict[str, Any], event: dict, source: str, effects: list):
+        """
+        Apply one fill event to a cached row state. Metrics and trace exports
+        are collected in effects, to be emitted once the row is written.
+        """
+        fill_status = event.get("status", "unknown")
+        new_status = FILL_STATUS_TO_ORDER_STATUS.get(fill_status)
+
+        # Events can be applied out of order; never move a final order back
+        if state["status"] in FINAL_ORDER_STATUSES and new_status not in FINAL_ORDER_STATUSES:
+            fill_status = state["fill_status"]
+            new_status = state["status"]
+
+        if fill_status == "Filled" and state["fill_status"] != "Filled" and state["created_at"]:
+            detection = (datetime.utcnow() - state["created_at"]).total_seconds()
+            effects.append((key, lambda: FILL_DETECTION_SECONDS.labels(source).observe(detection)))
+        if fill_status in FINAL_FILL_STATUSES and state["fill_status"] not in FINAL_FILL_STATUSES:
+            trace = load_trace(state["timings"])
+            if trace is not None:
+                stamp(trace, "fill_recorded")
+                trace["fill_source"] = source
+                state["timings"] = dump_trace(trace)
+                order = state["id"]
+                effects.append((key, lambda: export_fill(trace, order=order, source=source, fill_status=fill_status)))
+
+        deal_quantity = event.get("deal_quantity", 0)
+        if deal_quantity >= (state["fill_quantity"] or 0):
+            state["fill_quantity"] = deal_quantity
+            if event.get("fill_avg_price"):
+                state["fill_price"] = event.get("fill_avg_price")
+        state["fill_status"] = fill_status
+        state["ordno"] = event.get("ordno") or state["ordno"]
+        state["cancel_quantity"] = event.get("cancel_quantity", 0)
+        if new_status:
+            state["status"] = new_status
+        if fill_status == "Failed":
+            state["error_message"] = event.get("msg") or "Order failed at exchange"
+
+    async def _write(self, conn, rows: List[Tuple[Dict[str, Any], Optional[datetime]]]) -> Set[int]:
+        """
+        Write changed (state, cached updated_at) rows with one statement.
+        Rows changed since they were cached are skipped. Returns the ids written.
+        """
+        table = OrderHistory.__table__
+
+        if conn.dialect.name == "postgresql":
+            names = ("id", "seen") + UPDATE_COLUMNS
+            types = {"seen": table.c.updated_at.type, **{name: table.c[name].type for name in names[2:]}}
+            data = values(
+                column("id", table.c.id.type), *(column(name, types[name]) for name in names[1:]), name="v"
+            ).data([(state["id"], seen, *(state[name] for name in UPDATE_COLUMNS)) for state, seen in rows])
+            # NULLs in VALUES are typed as text; cast back to the column types
+            statement = (
+                update(table)
+                .where(
+                    table.c.id == data.c.id,
+                    table.c.updated_at.is_not_distinct_from(cast(data.c.seen, types["seen"])),
+                )
+                .values({name: cast(data.c[name], types[name]) for name in UPDATE_COLUMNS})
+                .returning(table.c.id)
+            )
+            return set((await conn.execute(statement)).scalars())
+
+        # Other databases (SQLite in local development): one UPDATE per row,
+        # since an executemany UPDATE cannot report which rows matched
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("v_id"), table.c.updated_at.is_not_distinct_from(bindparam("v_seen")))
+            .values({name: bindparam(f"v_{name}") for name in UPDATE_COLUMNS})
+        )
+        written = set()
+        for state, seen in rows:
+            params = {"v_id": state["id"], "v_seen": seen, **{f"v_{name}": state[name] for name in UPDATE_COLUMNS}}
+            if (await conn.execute(statement, params)).rowcount:
+                written.add(state["id"])
+        return written
+
+    async def flush(self):
+        """Apply all queued events and write the changed orders."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        originals: Dict[OrderKey, Dict[str, Any]] = {}
+        changed: Dict[OrderKey, Dict[str, Any]] = {}
+        effects: list = []
+        written: Set[int] = set()
+        try:
+            async with self.engine.begin() as conn:
+                missing = {key for key, _, _, _ in pending if key not in self._cache}
+                if missing:
+                    await self._load(conn, missing)
+
+                for key, event, source, _ in pending:
+                    state = self._cache.get(key)
+                    if state is not None:
+                        originals.setdefault(key, dict(state))
+                        self._apply(key, state, event, source, effects)
+
+                changed = {key: self._cache[key] for key, original in originals.items() if self._cache[key] != original}
+                if changed:
+                    now = datetime.utcnow()
+                    for state in changed.values():
+                        state["updated_at"] = now
+                    with DB_COMMIT_SECONDS.labels("fill_flush").time():
+                        written = await self._write(
+                            conn, [(state, originals[key]["updated_at"]) for key, state in changed.items()]
+                        )
+        except Exception as e:
+            # Cached states may now be ahead of the database; reload them next time
+            for key in changed:
+                self._cache.pop(key, None)
+            for _, _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+        # Rows changed elsewhere since they were cached: reload them and
+        # apply their events again on the next flush
+        stale = {key for key, state in changed.items() if state["id"] not in written}
+        for key in changed.keys() - stale:
+            self._conflicts.pop(key, None)
+        for key in stale:
+            self._cache.pop(key, None)
+            self._conflicts[key] = self._conflicts.get(key, 0) + 1
+        if stale:
+            logger.info(f"[FILL] {len(stale)} orders changed by another process, retrying their events")
+        for item in pending:
+            key, future = item[0], item[3]
+            if key not in stale:
+                continue
+            if self._conflicts[key] <= ORDER_UPDATE_MAX_CONFLICTS:
+                self._pending.append(item)
+            elif not future.done():
+                future.set_exception(RuntimeError(f"Order {key[0]}:{key[1]} kept changing concurrently"))
+        for key in stale:
+            if self._conflicts[key] > ORDER_UPDATE_MAX_CONFLICTS:
+                del self._conflicts[key]
+
+        for key, state in changed.items():
+            if key not in stale:
+                logger.info(
+                    f"[FILL] Order {state['id']} -> {state['status']} "
+                    f"(fill_status={state['fill_status']}, qty={state['fill_quantity']}, price={state['fill_price']})"
+                )
+        for key, emit in effects:
+            if key not in stale:
+                emit()
+        logger.debug(f"[FILL] Flushed {len(pending)} events, {len(changed) - len(stale)} orders changed")
+
+        for key, _, _, future in pending:
+            if key not in stale and not future.done():
+                future.set_result(key in originals)
+
+    async def run(self):
+        """Flush queued events every interval (sooner when max_batch is reached) until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write order updates: {e}")
@@ -0,0 +1,161 @@
+"""
+Reference Cache - read-through cache of reference-data responses in the API.
+
+Symbols, contract codes and futures products change at most once per trading
+day, so their worker responses are cached in each API process (LRU with TTL)
+and shared between uvicorn workers through a Redis hash. When the trading
+worker reloads contracts it calls invalidate_reference_cache, which bumps a
+generation counter, clears the hash and notifies every API process.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import redis
+
+from trading_queue import TradingOperation, TradingResponse
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CACHE_KEY = "trading:refdata:cache"  # hash: cache key -> JSON entry
+REFERENCE_GENERATION_KEY = "trading:refdata:generation"  # bumped on every contract reload
+REFERENCE_INVALIDATE_CHANNEL = "trading:refdata:invalidate"
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "600"))  # seconds
+REFERENCE_CACHE_MAX_ENTRIES = 256  # per API process
+
+
+def invalidate_reference_cache(redis_client: redis.Redis) -> int:
+    """
+    Drop cached reference data in all API processes (called by the worker).
+
+    Returns the new cache generation.
+    """
+    with redis_client.pipeline(transaction=True) as pipe:
+        pipe.incr(REFERENCE_GENERATION_KEY)
+        pipe.delete(REFERENCE_CACHE_KEY)
+        generation, _ = pipe.execute()
+    redis_client.publish(REFERENCE_INVALIDATE_CHANNEL, generation)
+    return generation
+
+
+class ReferenceCache:
+    """Two-level (process LRU, then Redis hash) cache of reference responses."""
+
+    def __init__(self, redis_client, ttl: int = REFERENCE_CACHE_TTL, max_entries: int = REFERENCE_CACHE_MAX_ENTRIES):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # key -> (expires_at, data), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation: Optional[int] = None
+
+    @staticmethod
+    def cache_key(operation: TradingOperation, simulation: bool, params: dict) -> str:
+        mode = "simulation" if simulation else "real"
+        return f"{operation.value}:{mode}:{json.dumps(params, sort_keys=True)}"
+
+    def clear(self):
+        self._entries.clear()
+
+    async def submit_request(
+        self,
+        queue_client,
+        operation: TradingOperation,
+        simulation: bool = True,
+        params: Optional[dict] = None,
+    ) -> TradingResponse:
+        """
+        Answer a reference-data request from cache, asking the worker on a miss.
+
+        Only successful responses are cached. Raises like
+        AsyncTradingQueueClient.submit_request.
+        """
+        params = params or {}
+        key = self.cache_key(operation, simulation, params)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            return TradingResponse(request_id=key, success=True, data=entry[1])
+
+        generation = await self._current_generation()
+        data = await self._get_shared(key, generation, now)
+        if data is None:
+            response = await queue_client.submit_request(operation, simulation, params=params)
+            if not response.success:
+                return response
+            data = response.data
+            await self._set_shared(key, generation, now + self.ttl, data)
+            expires_at = now + self.ttl
+        else:
+            data, expires_at = data
+
+        # An invalidation may have arrived while we were waiting
+        if generation == self._generation:
+            self._entries[key] = (expires_at, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return TradingResponse(request_id=key, success=True, data=data)
+
+    async def _current_generation(self) -> int:
+        if self._generation is None:
+            try:
+                self._generation = int(await self.redis.get(REFERENCE_GENERATION_KEY) or 0)
+            except redis.RedisError as e:
+                logger.warning(f"Reference cache generation unavailable: {e}")
+                return -1
+        return self._generation
+
+    async def _get_shared(self, key: str, generation: int, now: float) -> Optional[tuple]:
+        """(data, expires_at) from the Redis hash, if present and current."""
+        try:
+            raw = await self.redis.hget(REFERENCE_CACHE_KEY, key)
+        except redis.RedisError as e:
+            logger.warning(f"Reference cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if entry["generation"] != generation or entry["expires_at"] <= now:
+            return None
+        return entry["data"], entry["expires_at"]
+
+    async def _set_shared(self, key: str, generation: int, expires_at: float, data: Any):
+        if generation < 0:
+            return
+        entry = {"generation": generation, "expires_at": expires_at, "data": data}
+        try:
+            await self.redis.hset(REFERENCE_CACHE_KEY, key, json.dumps(entry))
+        except redis.RedisError as e:
+            logger.warning(f"Reference cache write failed: {e}")
+
+    async def listen_for_invalidations(self):
+        """Clear this process's entries whenever the worker reloads contracts."""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(REFERENCE_INVALIDATE_CHANNEL)
+                # Anything cached before (re)subscribing may have missed a message
+                self._generation = None
+                self.clear()
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        self._generation = int(message["data"])
+                        self.clear()
+                        logger.info(f"Reference cache invalidated (generation {self._generation})")
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except redis.RedisError as e:
+                logger.error(f"Reference cache invalidation listener error: {e}")
+                await asyncio.sleep(5)
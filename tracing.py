@@ -0,0 +1,172 @@
+"""
+Tracing - per-order latency breakdown from webhook to fill.
+
+create_order starts a trace for each order. Every stage it passes through
+(API, Redis queue, trading worker, broker, DB, fill detection) stamps the
+epoch time it reached into the trace's "stages". The trace travels to the
+worker in TradingRequest.trace and back in TradingResponse.trace, and is
+persisted in OrderHistory.timings.
+
+When OTEL_EXPORTER_OTLP_ENDPOINT is set and the OpenTelemetry SDK is
+installed (`pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http`),
+the API also exports each order's stages as spans to that collector.
+"""
+import json
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Optional OpenTelemetry export; traces are always persisted without it
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+except ImportError:
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "shioaji-api")
+
+# Spans derived from a trace: (name, start stage, end stage). A span is
+# exported / reported only if both of its stages were stamped.
+TRACE_SPANS = (
+    ("api.validate", "received", "enqueued"),
+    ("redis.queue_wait", "enqueued", "dequeued"),
+    ("worker.handle", "dequeued", "responded"),
+    ("worker.get_position", "position_start", "position_end"),
+    ("broker.place_order", "place_order_start", "place_order_end"),
+    ("redis.response", "responded", "response_received"),
+    ("api.persist", "response_received", "persisted"),
+    ("fill.detect", "response_received", "fill_recorded"),
+)
+
+
+def new_trace() -> Dict[str, Any]:
+    """Start a trace for an incoming order (stamps "received")."""
+    return {
+        "trace_id": secrets.token_hex(16),
+        "span_id": secrets.token_hex(8),
+        "stages": {"received": time.time()},
+    }
+
+
+def stamp(trace: Optional[Dict[str, Any]], stage: str, at: Optional[float] = None):
+    """Record the time a trace reached a stage. No-op without a trace."""
+    if trace is not None:
+        trace["stages"][stage] = at if at is not None else time.time()
+
+
+@contextmanager
+def stage(trace: Optional[Dict[str, Any]], name: str):
+    """Stamp "<name>_start" and "<name>_end" around a block."""
+    stamp(trace, f"{name}_start")
+    try:
+        yield
+    finally:
+        stamp(trace, f"{name}_end")
+
+
+def breakdown(trace: Dict[str, Any]) -> Dict[str, float]:
+    """Milliseconds spent in each span of a trace."""
+    stages = trace.get("stages", {})
+    return {
+        name: round((stages[end] - stages[start]) * 1000, 3)
+        for name, start, end in TRACE_SPANS
+        if start in stages and end in stages
+    }
+
+
+def dump_trace(trace: Dict[str, Any]) -> str:
+    """Serialize a trace for OrderHistory.timings."""
+    return json.dumps(trace)
+
+
+def load_trace(timings: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Trace from OrderHistory.timings, or None for orders without one."""
+    return json.loads(timings) if timings else None
+
+
+class _OtelExporter:
+    """Turns stamped traces into OpenTelemetry spans after the fact."""
+
+    def __init__(self):
+        provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        self.provider = provider
+        self.tracer = provider.get_tracer(__name__)
+
+    def _parent(self, trace: Dict[str, Any]):
+        # The webhook caller has no trace context, so the trace's own ids act
+        # as the remote parent; later spans (fill detection) join the same trace
+        span_context = otel_trace.SpanContext(
+            trace_id=int(trace["trace_id"], 16),
+            span_id=int(trace["span_id"], 16),
+            is_remote=True,
+            trace_flags=otel_trace.TraceFlags(otel_trace.TraceFlags.SAMPLED),
+        )
+        return otel_trace.set_span_in_context(otel_trace.NonRecordingSpan(span_context))
+
+    def export(self, trace: Dict[str, Any], root: Optional[str], spans, attributes: Dict[str, Any]):
+        stages = trace["stages"]
+        context = self._parent(trace)
+        if root is not None:
+            start, end = min(stages.values()), max(stages.values())
+            root_span = self.tracer.start_span(
+                root, context=context, start_time=int(start * 1e9), attributes=attributes
+            )
+            context = otel_trace.set_span_in_context(root_span)
+        for name, start_stage, end_stage in spans:
+            if start_stage not in stages or end_stage not in stages:
+                continue
+            span = self.tracer.start_span(
+                name, context=context, start_time=int(stages[start_stage] * 1e9), attributes=attributes
+            )
+            span.end(end_time=int(stages[end_stage] * 1e9))
+        if root is not None:
+            root_span.end(end_time=int(end * 1e9))
+
+    def shutdown(self):
+        self.provider.shutdown()
+
+
+_exporter: Optional[_OtelExporter] = None
+if OTEL_EXPORTER_OTLP_ENDPOINT:
+    if otel_trace is None:
+        logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but the OpenTelemetry SDK is not installed")
+    else:
+        _exporter = _OtelExporter()
+
+
+def export_order(trace: Optional[Dict[str, Any]], **attributes):
+    """Export the submit part of an order's trace (everything but fill detection)."""
+    if _exporter is None or trace is None:
+        return
+    try:
+        _exporter.export(
+            trace, "create_order", [s for s in TRACE_SPANS if s[0] != "fill.detect"], attributes
+        )
+    except Exception as e:
+        logger.warning(f"Failed to export trace {trace.get('trace_id')}: {e}")
+
+
+def export_fill(trace: Optional[Dict[str, Any]], **attributes):
+    """Export an order's fill detection span into its existing trace."""
+    if _exporter is None or trace is None:
+        return
+    try:
+        _exporter.export(trace, None, [s for s in TRACE_SPANS if s[0] == "fill.detect"], attributes)
+    except Exception as e:
+        logger.warning(f"Failed to export trace {trace.get('trace_id')}: {e}")
+
+
+def shutdown_tracing():
+    """Flush pending spans (API shutdown)."""
+    if _exporter is not None:
+        _exporter.shutdown()
@@ -0,0 +1,178 @@
+"""
+Trade Store - bounded, Redis-backed registry of trades placed by the worker.
+
+The trading worker needs the Shioaji Trade object of an order to check its
+status. Trades are kept in memory with a size bound, a TTL and eviction once
+an order reaches a final status. A compact descriptor of every open trade is
+persisted to Redis so a restarted worker can find its trades again through
+api.update_status / api.list_trades.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+TRADE_KEY_PREFIX = "trading:trades:"
+TRADE_STORE_MAX_SIZE = int(os.getenv("TRADE_STORE_MAX_SIZE", "5000"))  # trades kept in memory per mode
+TRADE_STORE_TTL = int(os.getenv("TRADE_STORE_TTL", "86400"))  # seconds an open trade is remembered
+TRADE_STORE_TERMINAL_TTL = 600  # seconds a final trade stays available for rechecks
+
+# Exchange statuses after which an order receives no further updates
+TERMINAL_STATUSES = ("Filled", "Cancelled", "Failed", "Inactive")
+
+
+def trade_key(order_id: str, seqno: str) -> str:
+    """Key identifying a trade: "order_id:seqno"."""
+    return f"{order_id}:{seqno}"
+
+
+def _status_value(trade) -> str:
+    status = trade.status.status
+    return status.value if hasattr(status, "value") else str(status)
+
+
+class TradeStore:
+    """
+    Trades of one mode (simulation or real), bounded in memory and
+    persisted to Redis as descriptors.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        simulation: bool,
+        max_size: int = TRADE_STORE_MAX_SIZE,
+        ttl: int = TRADE_STORE_TTL,
+        terminal_ttl: int = TRADE_STORE_TERMINAL_TTL,
+    ):
+        self.redis = redis_client
+        self.simulation = simulation
+        self.max_size = max_size
+        self.ttl = ttl
+        self.terminal_ttl = terminal_ttl
+        self._prefix = f"{TRADE_KEY_PREFIX}{'simulation' if simulation else 'real'}:"
+
+        # key -> (trade, expires_at), oldest first
+        self._trades: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._trades)
+
+    def add(self, trade, symbol: str = "", code: str = ""):
+        """Remember a newly placed trade and persist its descriptor."""
+        key = trade_key(trade.order.id, trade.order.seqno)
+        descriptor = {
+            "order_id": trade.order.id,
+            "seqno": trade.order.seqno,
+            "ordno": getattr(trade.order, "ordno", ""),
+            "symbol": symbol,
+            "code": code,
+            "quantity": trade.order.quantity,
+            "placed_at": time.time(),
+        }
+
+        self._remember(key, trade)
+
+        try:
+            self.redis.set(self._prefix + key, json.dumps(descriptor), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to persist trade {key}: {e}")
+
+    def _remember(self, key: str, trade):
+        """Keep a trade in memory, evicting the oldest beyond max_size."""
+        with self._lock:
+            self._trades[key] = (trade, time.time() + self.ttl)
+            self._trades.move_to_end(key)
+            while len(self._trades) > self.max_size:
+                evicted, _ = self._trades.popitem(last=False)
+                logger.debug(f"Trade store full, evicted {evicted}")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a trade by key, or None if unknown or expired."""
+        with self._lock:
+            entry = self._trades.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._trades[key]
+                return None
+            return entry[0]
+
+    def replace(self, key: str, trade):
+        """Swap in another session's Trade object for a known trade, keeping its expiry."""
+        with self._lock:
+            entry = self._trades.get(key)
+            if entry is not None:
+                self._trades[key] = (trade, entry[1])
+
+    def mark_status(self, key: str, status: str):
+        """Record a trade's latest status; final trades expire after terminal_ttl."""
+        if status not in TERMINAL_STATUSES:
+            return
+
+        with self._lock:
+            entry = self._trades.get(key)
+            if entry is not None:
+                self._trades[key] = (entry[0], min(entry[1], time.time() + self.terminal_ttl))
+
+        try:
+            self.redis.delete(self._prefix + key)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to remove trade {key}: {e}")
+
+    def is_known(self, key: str) -> bool:
+        """Whether a trade has a persisted descriptor (e.g. from before a restart)."""
+        try:
+            return bool(self.redis.exists(self._prefix + key))
+        except redis.RedisError:
+            return False
+
+    def purge(self) -> int:
+        """Drop expired trades from memory. Returns the number removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._trades.items() if expires_at < now]
+            for key in expired:
+                del self._trades[key]
+        return len(expired)
+
+    def rehydrate(self, api) -> int:
+        """
+        Reload persisted open trades from the broker after a (re)login.
+
+        Calls api.update_status for the account, then matches api.list_trades
+        against the persisted descriptors. Returns the number of trades restored.
+        """
+        try:
+            keys = {
+                key[len(self._prefix):]
+                for key in self.redis.scan_iter(match=self._prefix + "*", count=500)
+            }
+        except redis.RedisError as e:
+            logger.warning(f"Failed to load persisted trades: {e}")
+            return 0
+
+        keys -= set(self._trades)
+        if not keys:
+            return 0
+
+        api.update_status(api.futopt_account)
+        restored = 0
+        for trade in api.list_trades():
+            key = trade_key(trade.order.id, trade.order.seqno)
+            if key not in keys:
+                continue
+            self._remember(key, trade)
+            self.mark_status(key, _status_value(trade))
+            restored += 1
+
+        logger.info(f"Rehydrated {restored}/{len(keys)} persisted trades")
+        return restored
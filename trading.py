@@ -1,6 +1,10 @@
 import logging
 import os
-from typing import TYPE_CHECKING, List
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import shioaji as sj
 from shioaji.contracts import Contract
@@ -22,6 +26,12 @@ SUPPORTED_FUTURES = os.getenv("SUPPORTED_FUTURES", "MXF,TXF").split(",")
 SUPPORTED_FUTURES = [f.strip().upper() for f in SUPPORTED_FUTURES if f.strip()]
 logger.info(f"Supported futures: {SUPPORTED_FUTURES}")
 
+# Position book: re-sync from the broker when older than this (seconds)
+POSITION_MAX_STALENESS = float(os.getenv("POSITION_MAX_STALENESS", "120"))
+# A code with an order or deal this recently keeps its book position on sync:
+# the broker's snapshot may or may not include its latest deals yet
+POSITION_SETTLE_SECONDS = 10
+
 
 class ShioajiError(Exception):
     """Base exception for Shioaji operations."""
@@ -108,9 +118,154 @@ def _get_futures_contracts(api: sj.Shioaji) -> List[Contract]:
     return contracts
 
 
+class ContractRegistry:
+    """
+    Indexed view of the supported futures contracts of one Shioaji session.
+
+    Built once per login (see get_contract_registry) so contract resolution
+    on the order path is a dict lookup instead of a scan over every contract.
+    Listing payloads are serialized once and shared between requests.
+    """
+
+    def __init__(self, api: sj.Shioaji):
+        self._api = api
+        self.trading_day = date.today()
+        self.contracts = _get_futures_contracts(api)
+
+        self.by_symbol: Dict[str, Contract] = {c.symbol: c for c in self.contracts}
+        self.by_code: Dict[str, Contract] = {c.code: c for c in self.contracts}
+        self.by_product: Dict[str, List[Contract]] = {
+            product: [c for c in self.contracts if c.symbol.startswith(product)]
+            for product in SUPPORTED_FUTURES
+        }
+
+        # Precomputed payloads for the symbols/contracts listings
+        self.symbols = [c.symbol for c in self.contracts]
+        self.contract_codes = [c.code for c in self.contracts]
+        self.symbols_info = [
+            {"symbol": c.symbol, "code": c.code, "name": c.name}
+            for c in self.contracts
+        ]
+
+        # Payloads covering all futures products, built on first use
+        self._futures_overview: Optional[List[dict]] = None
+        self._product_contracts: Dict[str, Optional[List[dict]]] = {}
+        self._code_to_symbol: Optional[Dict[str, str]] = None
+
+        logger.info(f"Contract registry built: {len(self.contracts)} contracts for {SUPPORTED_FUTURES}")
+
+    def is_stale(self) -> bool:
+        """Whether the registry was built on a previous trading day (possible rollover)."""
+        return self.trading_day != date.today()
+
+    def get_by_symbol(self, symbol: str) -> Contract:
+        """Find a contract by its symbol."""
+        try:
+            return self.by_symbol[symbol]
+        except KeyError:
+            raise ValueError(f"Contract {symbol} not found in supported futures: {SUPPORTED_FUTURES}") from None
+
+    def get_by_code(self, contract_code: str) -> Contract:
+        """Find a contract by its contract code."""
+        try:
+            return self.by_code[contract_code]
+        except KeyError:
+            raise ValueError(f"Contract {contract_code} not found in supported futures: {SUPPORTED_FUTURES}") from None
+
+    def code_to_symbol(self) -> Dict[str, str]:
+        """Contract code to symbol for every futures contract (not only supported ones)."""
+        if self._code_to_symbol is None:
+            futures = self._api.Contracts.Futures
+            mapping = {}
+            for product_name in dir(futures):
+                if product_name.startswith("_"):
+                    continue
+                product = getattr(futures, product_name)
+                if hasattr(product, "__iter__"):
+                    for contract in product:
+                        if hasattr(contract, "code") and hasattr(contract, "symbol"):
+                            mapping[contract.code] = contract.symbol
+            self._code_to_symbol = mapping
+        return self._code_to_symbol
+
+    def futures_overview(self) -> List[dict]:
+        """All futures products with their contracts (symbol, name, code)."""
+        if self._futures_overview is None:
+            futures = self._api.Contracts.Futures
+            products = []
+            for product_name in dir(futures):
+                if product_name.startswith("_"):
+                    continue
+                product = getattr(futures, product_name)
+                if hasattr(product, "__iter__"):
+                    contracts = [
+                        {"symbol": c.symbol, "name": c.name, "code": c.code}
+                        for c in product
+                        if hasattr(c, "symbol")
+                    ]
+                    if contracts:
+                        products.append({
+                            "product": product_name,
+                            "contracts": contracts,
+                            "count": len(contracts),
+                        })
+            self._futures_overview = products
+        return self._futures_overview
+
+    def product_contracts(self, product: str) -> Optional[List[dict]]:
+        """Contracts of any futures product, or None if the product does not exist."""
+        product = product.upper()
+        if product not in self._product_contracts:
+            product_contracts = getattr(self._api.Contracts.Futures, product, None)
+            self._product_contracts[product] = [
+                {
+                    "symbol": c.symbol,
+                    "code": c.code,
+                    "name": c.name,
+                    "delivery_month": c.delivery_month,
+                    "category": c.category,
+                }
+                for c in product_contracts
+                if hasattr(c, "symbol")
+            ] if product_contracts else None
+        return self._product_contracts[product]
+
+
+# Registries of the most recent sessions, keyed by id(api). Shioaji clients
+# do not support weak references, so old sessions are evicted by count.
+MAX_CONTRACT_REGISTRIES = 4
+_registries: "OrderedDict[int, Tuple[sj.Shioaji, ContractRegistry]]" = OrderedDict()
+_registries_lock = threading.Lock()
+
+
+def get_contract_registry(api: sj.Shioaji, rebuild: bool = False) -> ContractRegistry:
+    """Get the contract registry for a session, building it on first use."""
+    with _registries_lock:
+        entry = _registries.get(id(api))
+        if entry is None or entry[0] is not api or rebuild:
+            entry = (api, ContractRegistry(api))
+            _registries[id(api)] = entry
+            while len(_registries) > MAX_CONTRACT_REGISTRIES:
+                _registries.popitem(last=False)
+        _registries.move_to_end(id(api))
+        return entry[1]
+
+
+def refresh_contracts(api: sj.Shioaji) -> ContractRegistry:
+    """
+    Re-download contracts from the exchange and rebuild the registry.
+
+    Needed for long-lived sessions when front-month contracts roll over;
+    the SDK only downloads contracts at login.
+    """
+    logger.info("Refreshing futures contracts...")
+    api.fetch_contracts(contract_download=True)
+    return get_contract_registry(api, rebuild=True)
+
+
 def get_valid_symbols(api: sj.Shioaji) -> List[str]:
     """Get all valid trading symbols from supported futures."""
-    return [contract.symbol for contract in _get_futures_contracts(api)]
+    return get_contract_registry(api).symbols
 
 
 def get_valid_symbols_with_info(api: sj.Shioaji) -> List[dict]:
@@ -122,55 +277,136 @@ def get_valid_symbols_with_info(api: sj.Shioaji) -> List[dict]:
     - code: MXFA6 (month letter + year digit format)
     - name: Contract name (e.g., 小型臺指01)
     """
-    return [
-        {
-            "symbol": contract.symbol,
-            "code": contract.code,
-            "name": contract.name,
-        }
-        for contract in _get_futures_contracts(api)
-    ]
+    return get_contract_registry(api).symbols_info
 
 
 def get_valid_contract_codes(api: sj.Shioaji) -> List[str]:
     """Get all valid contract codes from supported futures."""
-    return [contract.code for contract in _get_futures_contracts(api)]
+    return get_contract_registry(api).contract_codes
 
 
 def get_contract_from_symbol(api: sj.Shioaji, symbol: str) -> Contract:
     """Find a contract by its symbol."""
-    for contract in _get_futures_contracts(api):
-        if contract.symbol == symbol:
-            return contract
-    raise ValueError(f"Contract {symbol} not found in supported futures: {SUPPORTED_FUTURES}")
+    return get_contract_registry(api).get_by_symbol(symbol)
 
 
 def get_contract_from_contract_code(api: sj.Shioaji, contract_code: str) -> Contract:
     """Find a contract by its contract code."""
-    for contract in _get_futures_contracts(api):
-        if contract.code == contract_code:
-            return contract
-    raise ValueError(f"Contract {contract_code} not found in supported futures: {SUPPORTED_FUTURES}")
+    return get_contract_registry(api).get_by_code(contract_code)
+
+
+def _signed_quantity(position) -> int:
+    """Net quantity of a futures position: positive for long, negative for short."""
+    # FuturePosition uses 'direction' not 'side'
+    direction = position.direction
+    if direction == sj.constant.Action.Buy:
+        return position.quantity
+    elif direction == sj.constant.Action.Sell:
+        return -position.quantity
+    raise ValueError(f"Position {position.code} has invalid direction: {direction}")
 
 
 def get_current_position(api: sj.Shioaji, contract: Contract):
     logger.debug(f"Getting current position for contract: {contract.code}")
     for position in api.list_positions(api.futopt_account):
         if contract.code == position.code:
-            # FuturePosition uses 'direction' not 'side'
-            direction = position.direction
-            if direction == sj.constant.Action.Buy:
-                logger.debug(f"Found long position: {position.quantity}")
-                return position.quantity
-            elif direction == sj.constant.Action.Sell:
-                logger.debug(f"Found short position: {-position.quantity}")
-                return -position.quantity
-            else:
-                raise ValueError(f"Position {position.code} has invalid direction: {direction}")
+            quantity = _signed_quantity(position)
+            logger.debug(f"Found {'long' if quantity > 0 else 'short'} position: {quantity}")
+            return quantity
     logger.debug("No position found")
     return None
 
 
+class PositionBook:
+    """
+    In-memory net positions of one session's futures account, keyed by code.
+
+    Seeded from list_positions and kept current from deal callbacks, so order
+    sizing does not need a broker round trip. Positions older than
+    max_staleness are re-synced on read; callers should also call sync()
+    periodically to reconcile drift (e.g. from missed callbacks). Callers
+    report orders with note_order, so a sync racing their deals leaves the
+    code to the callbacks.
+    """
+
+    def __init__(self, api: sj.Shioaji, max_staleness: float = POSITION_MAX_STALENESS):
+        self.api = api
+        self.max_staleness = max_staleness
+        self._positions: Dict[str, int] = {}
+        self._active: Dict[str, float] = {}  # code -> time of its last order or deal
+        self._lock = threading.Lock()
+        self.synced_at = 0.0
+
+    def sync(self, positions: Optional[list] = None) -> Dict[str, int]:
+        """
+        Replace the book with the broker's positions.
+
+        Codes with an order or deal within POSITION_SETTLE_SECONDS before the
+        sync keep their book position, which the deal callbacks keep exact:
+        the broker's snapshot may miss a deal applied meanwhile, or include
+        one whose callback is still to come.
+
+        Pass positions already fetched with list_positions to avoid another
+        round trip. Returns the codes whose quantity changed.
+        """
+        cutoff = time.time() - POSITION_SETTLE_SECONDS
+        if positions is None:
+            positions = self.api.list_positions(self.api.futopt_account)
+        fresh = {p.code: _signed_quantity(p) for p in positions if p.quantity}
+
+        with self._lock:
+            self._active = {code: at for code, at in self._active.items() if at >= cutoff}
+            for code in self._active:
+                fresh.pop(code, None)
+                if self._positions.get(code):
+                    fresh[code] = self._positions[code]
+            drift = {
+                code: fresh.get(code, 0)
+                for code in set(fresh) | set(self._positions)
+                if fresh.get(code, 0) != self._positions.get(code, 0)
+            }
+            self._positions = fresh
+            self.synced_at = time.time()
+        return drift
+
+    def is_stale(self) -> bool:
+        """Whether the book is older than max_staleness."""
+        return time.time() - self.synced_at > self.max_staleness
+
+    def get(self, code: str) -> int:
+        """Net position for a contract code (0 if flat)."""
+        if self.is_stale():
+            logger.debug("Position book is stale, syncing from broker")
+            self.sync()
+        with self._lock:
+            return self._positions.get(code, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Copy of all net positions, e.g. to size several orders from one read."""
+        if self.is_stale():
+            logger.debug("Position book is stale, syncing from broker")
+            self.sync()
+        with self._lock:
+            return dict(self._positions)
+
+    def note_order(self, code: str):
+        """Record an order about to be placed for a code (see sync)."""
+        with self._lock:
+            self._active[code] = time.time()
+
+    def apply_deal(self, code: str, action: str, quantity: int):
+        """Apply a filled deal ("Buy"/"Sell") to the book."""
+        delta = quantity if action == "Buy" else -quantity
+        with self._lock:
+            self._active[code] = time.time()
+            position = self._positions.get(code, 0) + delta
+            if position:
+                self._positions[code] = position
+            else:
+                self._positions.pop(code, None)
+        logger.debug(f"Position book: {code} {action} {quantity} -> {position}")
+
+
 def place_entry_order(
     api: sj.Shioaji, symbol: str, quantity: int, action: sj.constant.Action
 ):
@@ -3,25 +3,70 @@ Trading Queue - Redis-based communication interface for Shioaji operations.
 
 This module provides a request/response pattern using Redis for communication
 between FastAPI workers and the dedicated trading worker that maintains
-the Shioaji connection.
+the Shioaji connection. Requests travel over Redis lists (default) or Redis
+Streams, selected with QUEUE_TRANSPORT.
 """
+import asyncio
 import json
 import logging
 import os
+import socket
+import time
 import uuid
-from dataclasses import dataclass, asdict
-from typing import Any, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 from enum import Enum
 
 import redis
+import redis.asyncio as aioredis
+
+# Optional faster JSON codec; plain json is always available
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 REQUEST_QUEUE = "trading:requests"
+
+# Per-priority request lanes; the worker drains each with its own threads so
+# orders never wait behind status checks or reference-data reads
+ORDER_QUEUE = f"{REQUEST_QUEUE}:orders"
+STATUS_QUEUE = f"{REQUEST_QUEUE}:status"
+REFERENCE_QUEUE = f"{REQUEST_QUEUE}:reference"
+REQUEST_QUEUES = (ORDER_QUEUE, STATUS_QUEUE, REFERENCE_QUEUE)  # highest priority first
 RESPONSE_PREFIX = "trading:response:"
 REQUEST_TIMEOUT = 30  # seconds to wait for response
 
+# Request transport shared by the API and the trading worker:
+#   "list"    - RPUSH/BLPOP on the lanes, one response list per request
+#   "streams" - XADD/XREADGROUP on "<lane>:stream"; entries are acknowledged
+#               after handling, so requests of a crashed worker are reclaimed
+QUEUE_TRANSPORT = os.getenv("QUEUE_TRANSPORT", "list")
+REQUEST_GROUP = "workers"
+REQUEST_STREAM_MAXLEN = 10000  # approximate cap on retained request entries
+RESPONSE_STREAM_MAXLEN = 1000  # approximate cap on entries per response stream
+
+# Reply inboxes: one per asyncio client, shared by all of its in-flight requests
+RESPONSE_INBOX_TTL = 300  # seconds an inbox outlives its last response
+INBOX_BATCH_SIZE = 100  # max responses taken from an inbox per read
+
+# Order/deal callbacks from the trading worker are published to this stream
+# and consumed by the API (one consumer group shared by all uvicorn workers)
+FILL_EVENTS_STREAM = "trading:fills"
+FILL_EVENTS_GROUP = "api"
+FILL_EVENTS_MAXLEN = 10000  # approximate cap on retained events
+
+# Heartbeat record of the trading worker: which modes finished their startup
+# warm-up (login, contract index, round trip through the queue), connection
+# state per mode and queue depth. It expires unless the worker keeps
+# refreshing it, so a missing key means no worker.
+WORKER_HEARTBEAT_KEY = "trading:worker:heartbeat"
+WORKER_HEARTBEAT_INTERVAL = int(os.getenv("WORKER_HEARTBEAT_INTERVAL", "5"))  # seconds
+WORKER_HEARTBEAT_TTL = 30  # seconds
+
 
 class TradingOperation(str, Enum):
     """Supported trading operations."""
@@ -33,52 +78,237 @@ class TradingOperation(str, Enum):
     GET_PRODUCT_CONTRACTS = "get_product_contracts"
     PLACE_ENTRY_ORDER = "place_entry_order"
     PLACE_EXIT_ORDER = "place_exit_order"
+    PLACE_ORDERS_BATCH = "place_orders_batch"
     CHECK_ORDER_STATUS = "check_order_status"
+    CHECK_ORDER_STATUS_BATCH = "check_order_status_batch"
     PING = "ping"
 
 
-@dataclass
+ORDER_OPERATIONS = (
+    TradingOperation.PLACE_ENTRY_ORDER,
+    TradingOperation.PLACE_EXIT_ORDER,
+    TradingOperation.PLACE_ORDERS_BATCH,
+)
+STATUS_OPERATIONS = (
+    TradingOperation.CHECK_ORDER_STATUS,
+    TradingOperation.CHECK_ORDER_STATUS_BATCH,
+    TradingOperation.PING,
+)
+
+
+def stream_for_queue(queue: str) -> str:
+    """Stream key of a request lane when using the streams transport."""
+    return f"{queue}:stream"
+
+
+def queue_for_operation(operation: TradingOperation) -> str:
+    """Get the request lane an operation is submitted to."""
+    if operation in ORDER_OPERATIONS:
+        return ORDER_QUEUE
+    if operation in STATUS_OPERATIONS:
+        return STATUS_QUEUE
+    return REFERENCE_QUEUE
+
+
+def encode_message(message: dict) -> str:
+    """Serialize a message dict to JSON (with orjson when it is installed)."""
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message)
+
+
+def decode_message(payload: str) -> dict:
+    """Deserialize a JSON message."""
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+@dataclass(slots=True)
 class TradingRequest:
     """Request message for trading operations."""
     request_id: str
     operation: str
     simulation: bool
     params: dict
-
-    def to_json(self) -> str:
-        return json.dumps(asdict(self))
+    reply_to: Optional[str] = None  # caller's reply inbox; None for a per-request response key
+    deadline: Optional[float] = None  # epoch seconds after which the caller has given up
+    enqueued_at: Optional[float] = None  # epoch seconds the caller queued the request
+    trace: Optional[dict] = None  # tracing.py trace the worker stamps its stages into
+
+    def encode(self) -> str:
+        return encode_message({
+            "request_id": self.request_id,
+            "operation": self.operation,
+            "simulation": self.simulation,
+            "params": self.params,
+            "reply_to": self.reply_to,
+            "deadline": self.deadline,
+            "enqueued_at": self.enqueued_at,
+            "trace": self.trace,
+        })
 
     @classmethod
-    def from_json(cls, data: str) -> "TradingRequest":
-        d = json.loads(data)
-        return cls(**d)
+    def decode(cls, payload: str) -> "TradingRequest":
+        return cls(**decode_message(payload))
 
 
-@dataclass
+@dataclass(slots=True)
 class TradingResponse:
     """Response message from trading operations."""
     request_id: str
     success: bool
     data: Optional[Any] = None
     error: Optional[str] = None
+    trace: Optional[dict] = None  # the request's trace, with the worker's stages added
 
-    def to_json(self) -> str:
-        return json.dumps(asdict(self))
+    def encode(self) -> str:
+        return encode_message({
+            "request_id": self.request_id,
+            "success": self.success,
+            "data": self.data,
+            "error": self.error,
+            "trace": self.trace,
+        })
 
     @classmethod
-    def from_json(cls, data: str) -> "TradingResponse":
-        d = json.loads(data)
-        return cls(**d)
+    def decode(cls, payload: str) -> "TradingResponse":
+        return cls(**decode_message(payload))
+
+
+class _TradingOperationsMixin:
+    """
+    Operation helpers shared by the sync and async queue clients.
+
+    Each helper simply forwards to ``submit_request``, so on the async client
+    they return an awaitable ``TradingResponse``.
+    """
+
+    def get_symbols(self, simulation: bool = True):
+        """Get valid trading symbols."""
+        return self.submit_request(TradingOperation.GET_SYMBOLS, simulation)
+
+    def get_symbol_info(self, symbol: str, simulation: bool = True):
+        """Get detailed info for a specific symbol."""
+        return self.submit_request(
+            TradingOperation.GET_SYMBOL_INFO,
+            simulation,
+            params={"symbol": symbol},
+        )
+
+    def get_contract_codes(self, simulation: bool = True):
+        """Get valid contract codes."""
+        return self.submit_request(TradingOperation.GET_CONTRACT_CODES, simulation)
+
+    def get_positions(self, simulation: bool = True):
+        """Get current positions."""
+        return self.submit_request(TradingOperation.GET_POSITIONS, simulation)
+
+    def get_futures_overview(self, simulation: bool = True):
+        """Get overview of all futures products."""
+        return self.submit_request(TradingOperation.GET_FUTURES_OVERVIEW, simulation)
+
+    def get_product_contracts(self, product: str, simulation: bool = True):
+        """Get all contracts for a specific product."""
+        return self.submit_request(
+            TradingOperation.GET_PRODUCT_CONTRACTS,
+            simulation,
+            params={"product": product},
+        )
+
+    def place_entry_order(
+        self,
+        symbol: str,
+        quantity: int,
+        action: str,
+        simulation: bool = True,
+        trace: Optional[dict] = None,
+    ):
+        """Place an entry order."""
+        return self.submit_request(
+            TradingOperation.PLACE_ENTRY_ORDER,
+            simulation,
+            params={"symbol": symbol, "quantity": quantity, "action": action},
+            trace=trace,
+        )
+
+    def place_exit_order(
+        self,
+        symbol: str,
+        position_direction: str,
+        simulation: bool = True,
+        trace: Optional[dict] = None,
+    ):
+        """Place an exit order."""
+        return self.submit_request(
+            TradingOperation.PLACE_EXIT_ORDER,
+            simulation,
+            params={"symbol": symbol, "position_direction": position_direction},
+            trace=trace,
+        )
+
+    def place_orders_batch(
+        self,
+        orders: List[dict],
+        simulation: bool = True,
+        trace: Optional[dict] = None,
+    ):
+        """
+        Place several orders with one request.
+
+        Each order is {"symbol", "quantity", "action"} for an entry or
+        {"symbol", "position_direction"} for an exit. The response data lists
+        one {"success", "data" or "error"} result per order under "results",
+        in the same order.
+        """
+        return self.submit_request(
+            TradingOperation.PLACE_ORDERS_BATCH,
+            simulation,
+            params={"orders": list(orders)},
+            trace=trace,
+        )
+
+    def check_order_status(
+        self,
+        order_id: str,
+        seqno: str,
+        simulation: bool = True,
+    ):
+        """Check status of an order."""
+        return self.submit_request(
+            TradingOperation.CHECK_ORDER_STATUS,
+            simulation,
+            params={"order_id": order_id, "seqno": seqno},
+            timeout=60,  # Order status checks may take longer
+        )
+
+    def check_order_status_batch(
+        self,
+        trade_keys: List[str],
+        simulation: bool = True,
+    ):
+        """
+        Check status of many orders with one broker refresh.
+
+        trade_keys are "order_id:seqno" strings. The response data maps each
+        found key to the same payload as check_order_status under "statuses",
+        and lists unknown keys under "missing".
+        """
+        return self.submit_request(
+            TradingOperation.CHECK_ORDER_STATUS_BATCH,
+            simulation,
+            params={"trade_keys": list(trade_keys)},
+            timeout=60,  # Order status checks may take longer
+        )
 
 
-class TradingQueueClient:
+class TradingQueueClient(_TradingOperationsMixin):
     """
     Client for submitting trading requests to the queue.
     Used by FastAPI workers to communicate with the trading worker.
     """
 
-    def __init__(self, redis_url: str = REDIS_URL):
+    def __init__(self, redis_url: str = REDIS_URL, transport: str = QUEUE_TRANSPORT):
         self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.transport = transport
         self._check_connection()
 
     def _check_connection(self):
@@ -90,12 +320,17 @@ class TradingQueueClient:
             logger.error(f"Failed to connect to Redis: {e}")
             raise
 
+    def close(self):
+        """Close the Redis connection pool."""
+        self.redis.close()
+
     def submit_request(
         self,
         operation: TradingOperation,
         simulation: bool = True,
         params: Optional[dict] = None,
         timeout: int = REQUEST_TIMEOUT,
+        trace: Optional[dict] = None,
     ) -> TradingResponse:
         """
         Submit a trading request and wait for response.
@@ -105,6 +340,7 @@ class TradingQueueClient:
             simulation: Whether to use simulation mode
             params: Operation-specific parameters
             timeout: Seconds to wait for response
+            trace: Trace (see tracing.py) for the worker to stamp its stages into
 
         Returns:
             TradingResponse with the result
@@ -119,13 +355,18 @@ class TradingQueueClient:
             operation=operation.value,
             simulation=simulation,
             params=params or {},
+            enqueued_at=time.time(),
+            trace=trace,
         )
 
         response_key = f"{RESPONSE_PREFIX}{request_id}"
 
+        if self.transport == "streams":
+            return self._submit_stream(request, queue_for_operation(operation), response_key, timeout)
+
         try:
-            # Push request to queue
-            self.redis.rpush(REQUEST_QUEUE, request.to_json())
+            # Push request to the operation's priority lane
+            self.redis.rpush(queue_for_operation(operation), request.encode())
             logger.debug(f"Submitted request {request_id}: {operation.value}")
 
             # Wait for response with blocking pop
@@ -136,7 +377,7 @@ class TradingQueueClient:
                 raise TimeoutError(f"Trading request timed out after {timeout}s")
 
             _, response_data = result
-            response = TradingResponse.from_json(response_data)
+            response = TradingResponse.decode(response_data)
             logger.debug(f"Received response for {request_id}: success={response.success}")
 
             return response
@@ -145,6 +386,37 @@ class TradingQueueClient:
             logger.error(f"Redis connection error: {e}")
             raise ConnectionError(f"Failed to communicate with trading queue: {e}")
 
+    def _submit_stream(self, request: TradingRequest, queue: str, response_key: str, timeout: int) -> TradingResponse:
+        """Submit over the streams transport, with a response stream per request."""
+        request.reply_to = response_key
+        request.deadline = time.time() + timeout
+
+        try:
+            self.redis.xadd(
+                stream_for_queue(queue),
+                {"data": request.encode()},
+                maxlen=REQUEST_STREAM_MAXLEN,
+                approximate=True,
+            )
+            logger.debug(f"Submitted request {request.request_id}: {request.operation}")
+
+            result = self.redis.xread({response_key: "0-0"}, count=1, block=timeout * 1000)
+            self.redis.delete(response_key)
+
+            if not result:
+                logger.error(f"Request {request.request_id} timed out after {timeout}s")
+                raise TimeoutError(f"Trading request timed out after {timeout}s")
+
+            _, entries = result[0]
+            response = TradingResponse.decode(entries[0][1]["data"])
+            logger.debug(f"Received response for {request.request_id}: success={response.success}")
+
+            return response
+
+        except redis.ConnectionError as e:
+            logger.error(f"Redis connection error: {e}")
+            raise ConnectionError(f"Failed to communicate with trading queue: {e}")
+
     def check_worker_health(self) -> bool:
         """Check if the trading worker is healthy by sending a ping."""
         try:
@@ -157,80 +429,163 @@ class TradingQueueClient:
         except (TimeoutError, ConnectionError):
             return False
 
-    def get_symbols(self, simulation: bool = True) -> TradingResponse:
-        """Get valid trading symbols."""
-        return self.submit_request(TradingOperation.GET_SYMBOLS, simulation)
 
-    def get_symbol_info(self, symbol: str, simulation: bool = True) -> TradingResponse:
-        """Get detailed info for a specific symbol."""
-        return self.submit_request(
-            TradingOperation.GET_SYMBOL_INFO,
-            simulation,
-            params={"symbol": symbol},
-        )
+class AsyncTradingQueueClient(_TradingOperationsMixin):
+    """
+    asyncio client for submitting trading requests to the queue.
 
-    def get_contract_codes(self, simulation: bool = True) -> TradingResponse:
-        """Get valid contract codes."""
-        return self.submit_request(TradingOperation.GET_CONTRACT_CODES, simulation)
+    Used by FastAPI endpoints so that waiting on the trading worker does not
+    block the event loop.
 
-    def get_positions(self, simulation: bool = True) -> TradingResponse:
-        """Get current positions."""
-        return self.submit_request(TradingOperation.GET_POSITIONS, simulation)
+    Each client owns one reply inbox (a list, or a stream with the streams
+    transport) that the worker pushes every response to. A background task
+    reads the inbox and resolves the waiting request by request_id, so any
+    number of in-flight requests share the reader's Redis connection instead
+    of each pinning one on its own BLPOP.
+    """
 
-    def get_futures_overview(self, simulation: bool = True) -> TradingResponse:
-        """Get overview of all futures products."""
-        return self.submit_request(TradingOperation.GET_FUTURES_OVERVIEW, simulation)
+    def __init__(self, redis_url: str = REDIS_URL, transport: str = QUEUE_TRANSPORT):
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.transport = transport
 
-    def get_product_contracts(
-        self, product: str, simulation: bool = True
-    ) -> TradingResponse:
-        """Get all contracts for a specific product."""
-        return self.submit_request(
-            TradingOperation.GET_PRODUCT_CONTRACTS,
-            simulation,
-            params={"product": product},
-        )
+        self._inbox = f"{RESPONSE_PREFIX}{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
 
-    def place_entry_order(
-        self,
-        symbol: str,
-        quantity: int,
-        action: str,
-        simulation: bool = True,
-    ) -> TradingResponse:
-        """Place an entry order."""
-        return self.submit_request(
-            TradingOperation.PLACE_ENTRY_ORDER,
-            simulation,
-            params={"symbol": symbol, "quantity": quantity, "action": action},
-        )
+    async def check_connection(self):
+        """Verify Redis connection is working."""
+        try:
+            await self.redis.ping()
+        except redis.ConnectionError as e:
+            logger.error(f"Failed to connect to Redis: {e}")
+            raise
 
-    def place_exit_order(
+    async def submit_request(
         self,
-        symbol: str,
-        position_direction: str,
+        operation: TradingOperation,
         simulation: bool = True,
+        params: Optional[dict] = None,
+        timeout: int = REQUEST_TIMEOUT,
+        trace: Optional[dict] = None,
     ) -> TradingResponse:
-        """Place an exit order."""
-        return self.submit_request(
-            TradingOperation.PLACE_EXIT_ORDER,
-            simulation,
-            params={"symbol": symbol, "position_direction": position_direction},
-        )
+        """
+        Submit a trading request and await the response.
 
-    def check_order_status(
-        self,
-        order_id: str,
-        seqno: str,
-        simulation: bool = True,
-    ) -> TradingResponse:
-        """Check status of an order."""
-        return self.submit_request(
-            TradingOperation.CHECK_ORDER_STATUS,
-            simulation,
-            params={"order_id": order_id, "seqno": seqno},
-            timeout=60,  # Order status checks may take longer
+        Same semantics as ``TradingQueueClient.submit_request``.
+
+        Raises:
+            TimeoutError: If no response received within timeout
+            ConnectionError: If Redis connection fails
+        """
+        request_id = str(uuid.uuid4())
+        request = TradingRequest(
+            request_id=request_id,
+            operation=operation.value,
+            simulation=simulation,
+            params=params or {},
+            reply_to=self._inbox,
+            deadline=time.time() + timeout,
+            enqueued_at=time.time(),
+            trace=trace,
         )
+        queue = queue_for_operation(operation)
+
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_inbox())
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        try:
+            if self.transport == "streams":
+                await self.redis.xadd(
+                    stream_for_queue(queue),
+                    {"data": request.encode()},
+                    maxlen=REQUEST_STREAM_MAXLEN,
+                    approximate=True,
+                )
+            else:
+                await self.redis.rpush(queue, request.encode())
+            logger.debug(f"Submitted request {request_id}: {operation.value}")
+
+            response = await asyncio.wait_for(future, timeout)
+            logger.debug(f"Received response for {request_id}: success={response.success}")
+            return response
+
+        except asyncio.TimeoutError:
+            logger.error(f"Request {request_id} timed out after {timeout}s")
+            raise TimeoutError(f"Trading request timed out after {timeout}s")
+        except redis.ConnectionError as e:
+            logger.error(f"Redis connection error: {e}")
+            raise ConnectionError(f"Failed to communicate with trading queue: {e}")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_inbox(self):
+        """Resolve pending requests from responses arriving in this client's inbox."""
+        last_id = "0-0"
+        while True:
+            payloads = []
+            try:
+                if self.transport == "streams":
+                    result = await self.redis.xread({self._inbox: last_id}, count=INBOX_BATCH_SIZE, block=5000)
+                    for _, entries in result or []:
+                        for entry_id, fields in entries:
+                            last_id = entry_id
+                            payloads.append(fields.get("data"))
+                else:
+                    result = await self.redis.blpop(self._inbox, timeout=5)
+                    if result is not None:
+                        # Drain whatever else has arrived in the same round trip
+                        payloads = [result[1]] + (await self.redis.lpop(self._inbox, INBOX_BATCH_SIZE) or [])
+            except redis.RedisError as e:
+                logger.error(f"Reply inbox read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for payload in payloads:
+                # One bad payload must not stop the reader every other request waits on
+                try:
+                    response = TradingResponse.decode(payload)
+                    future = self._pending.get(response.request_id)
+                    # No waiter: the request already timed out
+                    if future is not None and not future.done():
+                        future.set_result(response)
+                except Exception as e:
+                    logger.error(f"Skipping malformed reply in inbox {self._inbox}: {e}")
+
+    async def get_worker_heartbeat(self) -> Optional[dict]:
+        """Heartbeat record published by the trading worker, or None if no worker is running."""
+        try:
+            record = await self.redis.get(WORKER_HEARTBEAT_KEY)
+        except redis.ConnectionError as e:
+            raise ConnectionError(f"Failed to communicate with trading queue: {e}")
+        return json.loads(record) if record else None
+
+    async def check_worker_health(self) -> bool:
+        """Check if the trading worker is healthy by sending a ping."""
+        try:
+            response = await self.submit_request(
+                TradingOperation.PING,
+                simulation=True,
+                timeout=5,
+            )
+            return response.success
+        except (TimeoutError, ConnectionError):
+            return False
+
+    async def close(self):
+        """Stop the inbox reader, remove the inbox and close the Redis connection pool."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            try:
+                await self.redis.delete(self._inbox)
+            except redis.RedisError:
+                pass
+        await self.redis.aclose()
 
 
 # Singleton instance for FastAPI workers
@@ -244,3 +599,13 @@ def get_queue_client() -> TradingQueueClient:
         _queue_client = TradingQueueClient()
     return _queue_client
 
+
+_async_queue_client: Optional[AsyncTradingQueueClient] = None
+
+
+def get_async_queue_client() -> AsyncTradingQueueClient:
+    """Get or create the singleton asyncio queue client."""
+    global _async_queue_client
+    if _async_queue_client is None:
+        _async_queue_client = AsyncTradingQueueClient()
+    return _async_queue_client
@@ -7,18 +7,25 @@ one for real trading) and processes trading requests from the Redis queue.
 
 Features:
 - Single connection point for all Shioaji operations
-- Automatic reconnection on connection loss
+- Priority request lanes (orders > status checks > reference data) drained
+  concurrently, with orders serialized per account/symbol
+- Both modes logged in and warmed up at startup
+- Heartbeat record in Redis (readiness, connection state, queue depth) that
+  the API gates orders and health checks on
+- Sessions refreshed in the background before they expire, and automatic
+  reconnection on connection loss
 - Graceful shutdown handling
-- Health monitoring
 """
 import json
 import logging
 import os
 import signal
+import socket
 import sys
 import threading
 import time
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_for_futures
+from typing import Optional, Dict, Any, List
 
 import redis
 import shioaji as sj
@@ -32,20 +39,50 @@ from shioaji.error import (
 )
 
 from trading_queue import (
+    TradingQueueClient,
     TradingRequest,
     TradingResponse,
     TradingOperation,
-    REQUEST_QUEUE,
+    ORDER_QUEUE,
+    STATUS_QUEUE,
+    REFERENCE_QUEUE,
+    REQUEST_QUEUES,
     RESPONSE_PREFIX,
     REDIS_URL,
+    ORDER_OPERATIONS,
+    QUEUE_TRANSPORT,
+    REQUEST_GROUP,
+    RESPONSE_STREAM_MAXLEN,
+    RESPONSE_INBOX_TTL,
+    stream_for_queue,
+    FILL_EVENTS_STREAM,
+    FILL_EVENTS_MAXLEN,
+    WORKER_HEARTBEAT_KEY,
+    WORKER_HEARTBEAT_INTERVAL,
+    WORKER_HEARTBEAT_TTL,
 )
+from metrics import (
+    IN_FLIGHT_REQUESTS,
+    PENDING_TRADES,
+    PLACE_ORDER_SECONDS,
+    QUEUE_DEPTH,
+    QUEUE_WAIT_SECONDS,
+    SERVICE_SECONDS,
+    WORKER_METRICS_PORT,
+    start_worker_exporter,
+)
+from reference_cache import invalidate_reference_cache
+from trade_store import TradeStore, TERMINAL_STATUSES, trade_key as make_trade_key
+from tracing import stage, stamp
 from trading import (
     SUPPORTED_FUTURES,
     get_valid_symbols,
     get_valid_symbols_with_info,
     get_valid_contract_codes,
     get_contract_from_symbol,
-    get_current_position,
+    get_contract_registry,
+    refresh_contracts,
+    PositionBook,
 )
 
 # Configure logging
@@ -61,9 +98,49 @@ RECONNECT_DELAY = 5  # seconds between reconnection attempts
 MAX_RECONNECT_ATTEMPTS = 10
 QUEUE_POLL_TIMEOUT = 5  # seconds to wait for queue items
 HEALTH_CHECK_INTERVAL = 300  # 5 minutes - check connection health periodically
+SESSION_REFRESH_AGE = int(os.getenv("SESSION_REFRESH_AGE", "21600"))  # seconds before a session is replaced
+SUPERVISOR_INTERVAL = 10  # seconds between connection supervisor passes
+SESSION_RETIRE_GRACE = 30  # seconds a replaced session stays logged in for in-flight requests
+WARM_UP_PING_TIMEOUT = 30  # seconds to wait for the warm-up round trip through the queue
+WARM_UP_RETRY_INTERVAL = 60  # seconds between warm-up attempts of a mode that failed
 CONNECTION_LOGOUT_TIMEOUT = 3  # seconds to wait for logout before giving up
 MAX_REQUEST_RETRIES = 3  # max retries for requests on connection errors
 REQUEST_RETRY_DELAY = 1  # seconds between request retries
+FILL_STATE_TTL = 3600  # seconds to keep callback fill state after last event
+
+# Threads per request lane. Order threads each own a FIFO so orders for the
+# same account/symbol stay serialized while different symbols run in parallel.
+ORDER_LANE_THREADS = int(os.getenv("ORDER_LANE_THREADS", "4"))
+STATUS_LANE_THREADS = int(os.getenv("STATUS_LANE_THREADS", "2"))
+REFERENCE_LANE_THREADS = int(os.getenv("REFERENCE_LANE_THREADS", "2"))
+
+# Streams transport: requests left unacknowledged this long (e.g. by a worker
+# that crashed mid-request) are claimed and handled again
+REQUEST_CLAIM_IDLE_MS = int(os.getenv("REQUEST_CLAIM_IDLE_MS", "30000"))
+REQUEST_CLAIM_INTERVAL = 5  # seconds between reclaim scans per lane
+
+# Seconds between position book reconciliations against list_positions
+POSITION_RECONCILE_INTERVAL = int(os.getenv("POSITION_RECONCILE_INTERVAL", "30"))
+
+# Exception messages that mean the Shioaji session is no longer usable
+CONNECTION_ERROR_PATTERNS = (
+    "token is expired",
+    "token expired",
+    "status_code': 401",
+    "statuscode: 401",
+    "not ready",
+    "session down",
+    "connection refused",
+    "connection reset",
+)
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Whether an exception means the connection must be re-established."""
+    if isinstance(error, (TokenError, SystemMaintenance, SjTimeoutError)):
+        return True
+    error_str = str(error).lower()
+    return any(pattern in error_str for pattern in CONNECTION_ERROR_PATTERNS)
 
 
 class TradingWorker:
@@ -76,14 +153,30 @@ class TradingWorker:
     - Periodic health checks to detect stale connections
     """
 
-    def __init__(self):
+    def __init__(self, transport: str = QUEUE_TRANSPORT):
         self.redis = redis.from_url(REDIS_URL, decode_responses=True)
+        self.transport = transport
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
         self.running = False
         self.api_clients: Dict[bool, Optional[sj.Shioaji]] = {
             True: None,   # simulation
             False: None,  # real trading
         }
-        self.pending_trades: Dict[str, Any] = {}  # Store trades for status checking
+        # Trades for status checking: bounded in memory, persisted to Redis
+        self.trade_stores: Dict[bool, TradeStore] = {
+            True: TradeStore(self.redis, simulation=True),
+            False: TradeStore(self.redis, simulation=False),
+        }
+
+        # Net positions per mode, kept current from deal callbacks
+        self.position_books: Dict[bool, Optional[PositionBook]] = {
+            True: None,
+            False: None,
+        }
+
+        # Fill state accumulated from order/deal callbacks, keyed by "order_id:seqno"
+        self._fill_states: Dict[str, Dict[str, Any]] = {}
+        self._fill_lock = threading.Lock()
         
         # Track connection health
         self._last_successful_request: Dict[bool, float] = {
@@ -91,13 +184,56 @@ class TradingWorker:
             False: 0.0,
         }
         self._connection_lock = threading.Lock()
+        self._login_locks: Dict[bool, threading.Lock] = {
+            True: threading.Lock(),
+            False: threading.Lock(),
+        }
         
+        # Session lifecycle, managed by the connection supervisor thread
+        self._session_started: Dict[bool, float] = {True: 0.0, False: 0.0}
+        self._session_resumed: Dict[bool, bool] = {True: False, False: False}
+        self._retiring: List[tuple] = []  # (api, mode_str, logout_at) of replaced sessions
+        self._supervise_after: Dict[bool, float] = {True: 0.0, False: 0.0}  # backoff after a failed refresh
+
         # Track if connections are being invalidated (to avoid concurrent cleanup)
         self._invalidating: Dict[bool, bool] = {
             True: False,
             False: False,
         }
 
+        # Request lanes: executors and free-slot semaphores per priority queue.
+        # A dispatcher only pops from Redis when its lane has a free thread, so
+        # queued work keeps its place in Redis instead of piling up locally.
+        self._lanes: Dict[str, List[ThreadPoolExecutor]] = {
+            ORDER_QUEUE: [
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"orders-{i}")
+                for i in range(ORDER_LANE_THREADS)
+            ],
+            STATUS_QUEUE: [
+                ThreadPoolExecutor(max_workers=STATUS_LANE_THREADS, thread_name_prefix="status")
+            ],
+            REFERENCE_QUEUE: [
+                ThreadPoolExecutor(max_workers=REFERENCE_LANE_THREADS, thread_name_prefix="reference")
+            ],
+        }
+        self._lane_slots: Dict[str, threading.Semaphore] = {
+            ORDER_QUEUE: threading.Semaphore(ORDER_LANE_THREADS),
+            STATUS_QUEUE: threading.Semaphore(STATUS_LANE_THREADS),
+            REFERENCE_QUEUE: threading.Semaphore(REFERENCE_LANE_THREADS),
+        }
+        # Order lanes: last order request dispatched per (simulation, symbol). A
+        # batch spans several symbols' executors, so it and the orders around
+        # it wait for these to keep per-symbol FIFO order.
+        self._order_tails: Dict[str, Dict[tuple, Future]] = {queue: {} for queue in self._lanes}
+        self._in_flight = 0
+
+        # Startup warm-up per mode; the API only sends orders to warmed modes
+        self._warmed: Dict[bool, bool] = {True: False, False: False}
+        self._warming: set = set()
+        self._last_warm_up: Dict[bool, float] = {True: 0.0, False: 0.0}
+        self._stream_entries_in_flight: set = set()  # streams transport entry ids being handled
+        self._in_flight_lock = threading.Lock()
+
         # Register signal handlers for graceful shutdown
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -131,8 +267,10 @@ class TradingWorker:
                     logger.warning(f"[{mode_str}] SDK session disconnected, reconnecting...")
                 elif event_code == 13:
                     logger.info(f"[{mode_str}] SDK session reconnected")
-                    # After SDK reconnection, we should verify the token is still valid
-                    # This will be checked on the next request
+                    # After SDK reconnection the token may no longer be valid;
+                    # have the supervisor check it before the next request does
+                    if self.api_clients.get(simulation) is api:
+                        self._session_resumed[simulation] = True
                 elif event_code == 16:
                     logger.debug(f"[{mode_str}] Subscribe/Unsubscribe operation completed")
                 else:
@@ -143,6 +281,194 @@ class TradingWorker:
             # Event callbacks are optional - don't fail if they can't be set up
             logger.debug(f"Could not set up event callbacks: {e}")
 
+    def _setup_order_callbacks(self, api: sj.Shioaji, simulation: bool):
+        """
+        Register order/deal callbacks that publish fill events to Redis.
+
+        The API consumes FILL_EVENTS_STREAM to update order history as soon as
+        the exchange reports, instead of polling CHECK_ORDER_STATUS.
+        """
+        mode_str = "simulation" if simulation else "real"
+
+        def order_callback(stat, msg: dict):
+            # While a replacement session is being set up both sessions may
+            # receive the same events; only the installed one is applied
+            current = self.api_clients.get(simulation)
+            if current is not None and current is not api:
+                return
+            try:
+                self._handle_order_event(stat, msg, simulation)
+            except Exception as e:
+                logger.exception(f"[{mode_str}] Error handling order callback: {e}")
+
+        try:
+            api.set_order_callback(order_callback)
+            logger.debug(f"Order callbacks set up for {mode_str} connection")
+        except Exception as e:
+            # Fill verification falls back to polling if callbacks are unavailable
+            logger.warning(f"Could not set up order callbacks for {mode_str} connection: {e}")
+
+    def _new_fill_state(self, order_id: str, seqno: str) -> Dict[str, Any]:
+        """Create an empty fill state for a trade seen in a callback."""
+        return {
+            "order_id": order_id,
+            "seqno": seqno,
+            "ordno": "",
+            "status": "PendingSubmit",
+            "status_code": "",
+            "msg": "",
+            "order_quantity": 0,
+            "deal_quantity": 0,
+            "cancel_quantity": 0,
+            "deals": [],
+            "updated": time.time(),
+        }
+
+    def _handle_order_event(self, stat, msg: dict, simulation: bool):
+        """
+        Fold a Shioaji order/deal callback into the trade's fill state and
+        publish the resulting status.
+
+        Ref: https://sinotrade.github.io/zh/tutor/order/order_deal_event/futures/
+        """
+        if stat == sj.constant.OrderState.FuturesOrder:
+            order = msg.get("order", {})
+            operation = msg.get("operation", {})
+            status = msg.get("status", {})
+            order_id = order.get("id", "")
+            seqno = order.get("seqno", "")
+            trade_key = make_trade_key(order_id, seqno)
+
+            with self._fill_lock:
+                state = self._fill_states.setdefault(trade_key, self._new_fill_state(order_id, seqno))
+                state["ordno"] = order.get("ordno") or state["ordno"]
+                state["order_quantity"] = (
+                    status.get("order_quantity") or order.get("quantity") or state["order_quantity"]
+                )
+                state["cancel_quantity"] = status.get("cancel_quantity", state["cancel_quantity"])
+                state["status_code"] = operation.get("op_code", "")
+                state["msg"] = operation.get("op_msg", "")
+
+                if operation.get("op_code") not in (None, "", "00"):
+                    state["status"] = "Failed"
+                elif operation.get("op_type") == "Cancel":
+                    state["status"] = "Cancelled"
+                elif state["status"] not in ("Filled", "PartFilled"):
+                    state["status"] = "Submitted"
+                event = self._fill_event(state, simulation)
+
+        elif stat == sj.constant.OrderState.FuturesDeal:
+            order_id = msg.get("trade_id", "")
+            seqno = msg.get("seqno", "")
+            trade_key = make_trade_key(order_id, seqno)
+
+            with self._fill_lock:
+                state = self._fill_states.setdefault(trade_key, self._new_fill_state(order_id, seqno))
+                state["ordno"] = msg.get("ordno") or state["ordno"]
+                state["deals"].append({
+                    "seq": msg.get("exchange_seq", ""),
+                    "price": msg.get("price", 0.0),
+                    "quantity": msg.get("quantity", 0),
+                    "ts": msg.get("ts", 0),
+                })
+                state["deal_quantity"] += msg.get("quantity", 0)
+
+                # Deal callbacks may arrive before the order callback
+                if not state["order_quantity"]:
+                    trade = self.trade_stores[simulation].get(trade_key)
+                    if trade is not None:
+                        state["order_quantity"] = trade.order.quantity
+
+                if state["order_quantity"] and state["deal_quantity"] >= state["order_quantity"]:
+                    state["status"] = "Filled"
+                elif state["status"] not in TERMINAL_STATUSES:
+                    state["status"] = "PartFilled"
+                event = self._fill_event(state, simulation)
+
+            self._apply_deal_to_position_book(msg, simulation)
+
+        else:
+            logger.debug(f"Ignoring order callback: stat={stat}")
+            return
+
+        logger.info(
+            f"Order event: {trade_key} -> {event['status']} "
+            f"(deal_qty={event['deal_quantity']}/{event['order_quantity']})"
+        )
+        self.trade_stores[simulation].mark_status(trade_key, event["status"])
+        self._publish_fill_event(event)
+        self._purge_fill_states()
+
+    def _apply_deal_to_position_book(self, msg: dict, simulation: bool):
+        """Update the position book from a futures deal callback."""
+        book = self.position_books.get(simulation)
+        api = self.api_clients.get(simulation)
+        if book is None or api is None:
+            return
+
+        # Deals carry the product code plus delivery month; positions use the
+        # full contract code (e.g. MXF + 202601 -> MXFA6)
+        code = msg.get("full_code")
+        if not code:
+            symbol = f"{msg.get('code', '')}{msg.get('delivery_month', '')}"
+            contract = get_contract_registry(api).by_symbol.get(symbol)
+            if contract is None:
+                logger.warning(f"Deal for unknown contract {symbol}, position book will catch up on reconcile")
+                return
+            code = contract.code
+
+        action = msg.get("action")
+        book.apply_deal(code, getattr(action, "value", action), msg.get("quantity", 0))
+
+    def _fill_event(self, state: Dict[str, Any], simulation: bool) -> Dict[str, Any]:
+        """
+        Build a fill event from a fill state (caller holds _fill_lock).
+
+        The payload has the same shape as a CHECK_ORDER_STATUS response so the
+        API can apply both the same way.
+        """
+        state["updated"] = time.time()
+        deals = list(state["deals"])
+        total_value = sum(d["price"] * d["quantity"] for d in deals)
+        total_qty = sum(d["quantity"] for d in deals)
+
+        return {
+            "status": state["status"],
+            "status_code": state["status_code"],
+            "msg": state["msg"],
+            "order_id": state["order_id"],
+            "seqno": state["seqno"],
+            "ordno": state["ordno"],
+            "order_quantity": state["order_quantity"],
+            "deal_quantity": state["deal_quantity"],
+            "cancel_quantity": state["cancel_quantity"],
+            "fill_avg_price": total_value / total_qty if total_qty > 0 else 0.0,
+            "deals": deals,
+            "simulation": simulation,
+            "ts": state["updated"],
+        }
+
+    def _publish_fill_event(self, event: Dict[str, Any]):
+        """Append a fill event to the Redis stream consumed by the API."""
+        try:
+            self.redis.xadd(
+                FILL_EVENTS_STREAM,
+                {"data": json.dumps(event)},
+                maxlen=FILL_EVENTS_MAXLEN,
+                approximate=True,
+            )
+        except redis.RedisError as e:
+            # The API's fallback status polling will still pick the fill up
+            logger.error(f"Failed to publish fill event for {event['order_id']}: {e}")
+
+    def _purge_fill_states(self):
+        """Drop fill states that have not been updated within FILL_STATE_TTL."""
+        cutoff = time.time() - FILL_STATE_TTL
+        with self._fill_lock:
+            stale = [key for key, state in self._fill_states.items() if state["updated"] < cutoff]
+            for key in stale:
+                del self._fill_states[key]
+
     def _get_api_client(self, simulation: bool) -> sj.Shioaji:
         """
         Get or create an API client for the specified mode.
@@ -151,6 +477,35 @@ class TradingWorker:
         if self.api_clients[simulation] is not None:
             return self.api_clients[simulation]
 
+        # Requests run concurrently; make sure only one of them logs in
+        with self._login_locks[simulation]:
+            if self.api_clients[simulation] is not None:
+                return self.api_clients[simulation]
+            return self._connect(simulation)
+
+    def _connect(self, simulation: bool) -> sj.Shioaji:
+        """Log in and install a new API client (caller holds the login lock)."""
+        api, book = self._login(simulation)
+        self._install_connection(simulation, api, book)
+        return api
+
+    def _install_connection(self, simulation: bool, api: sj.Shioaji, book: PositionBook):
+        """Make a fully set-up session the one requests use."""
+        with self._connection_lock:
+            self.position_books[simulation] = book
+            self.api_clients[simulation] = api
+            self._session_started[simulation] = time.time()
+            self._session_resumed[simulation] = False
+            # Record successful connection time
+            self._last_successful_request[simulation] = time.time()
+        self._invalidate_reference_cache()
+
+    def _login(self, simulation: bool):
+        """
+        Log in and set up a new session without installing it.
+
+        Returns (api, position_book).
+        """
         api_key = os.getenv("API_KEY")
         secret_key = os.getenv("SECRET_KEY")
 
@@ -168,15 +523,27 @@ class TradingWorker:
 
                 # Set up event callbacks for session monitoring
                 self._setup_event_callbacks(api, simulation)
+
+                # Push order/deal updates to the API as they happen
+                self._setup_order_callbacks(api, simulation)
+
+                # Index contracts once per login, off the order path
+                get_contract_registry(api).code_to_symbol()
                 
                 # Activate CA for real trading
                 if not simulation:
                     self._activate_ca(api)
 
-                self.api_clients[simulation] = api
-                # Record successful connection time
-                self._last_successful_request[simulation] = time.time()
-                return api
+                # Seed the position book so the first order skips list_positions
+                book = self._new_position_book(api, mode_str)
+
+                # Pick up trades placed before a restart so they can still be checked
+                try:
+                    self.trade_stores[simulation].rehydrate(api)
+                except Exception as e:
+                    logger.warning(f"Could not rehydrate {mode_str} trades: {e}")
+
+                return api, book
 
             except (TokenError, SystemMaintenance, SjTimeoutError) as e:
                 logger.error(f"Login attempt {attempt} failed: {e}")
@@ -196,6 +563,179 @@ class TradingWorker:
 
         raise RuntimeError("Failed to connect to Shioaji after max attempts")
 
+    def _new_position_book(self, api: sj.Shioaji, mode_str: str) -> PositionBook:
+        """Create a position book for a session, seeded from the broker if possible."""
+        book = PositionBook(api)
+        try:
+            book.sync()
+            logger.info(f"Position book seeded ({mode_str} mode)")
+        except Exception as e:
+            # An unsynced book is stale, so the first read syncs it instead
+            logger.warning(f"Could not seed {mode_str} position book: {e}")
+        return book
+
+    def _get_position_book(self, simulation: bool, api: sj.Shioaji) -> PositionBook:
+        """Get the position book for the current session of a mode."""
+        book = self.position_books.get(simulation)
+        if book is None or book.api is not api:
+            mode_str = "simulation" if simulation else "real"
+            book = self._new_position_book(api, mode_str)
+            self.position_books[simulation] = book
+        return book
+
+    def _maybe_reconcile_positions(self):
+        """Re-sync position books from list_positions every POSITION_RECONCILE_INTERVAL."""
+        for simulation, book in list(self.position_books.items()):
+            if book is None or book.api is not self.api_clients.get(simulation):
+                continue
+            if time.time() - book.synced_at < POSITION_RECONCILE_INTERVAL:
+                continue
+            mode_str = "simulation" if simulation else "real"
+            try:
+                drift = book.sync()
+                if drift:
+                    logger.warning(f"Position book drift corrected ({mode_str} mode): {drift}")
+            except Exception as e:
+                logger.warning(f"Failed to reconcile {mode_str} position book: {e}")
+
+    def _reconcile_positions_loop(self):
+        """Position reconciliation thread: keeps running while orders are in flight."""
+        while self.running:
+            self._maybe_reconcile_positions()
+            deadline = time.time() + QUEUE_POLL_TIMEOUT
+            while self.running and time.time() < deadline:
+                time.sleep(0.5)
+
+    def _warm_up_modes(self) -> List[bool]:
+        """Modes logged in at startup: simulation, and real when a CA is configured."""
+        modes = [True]
+        if os.getenv("CA_PATH") and os.getenv("CA_PASSWORD"):
+            modes.append(False)
+        return modes
+
+    def _start_warm_up(self, simulation: bool):
+        """Warm up a mode in the background unless already warm or warming."""
+        if self._warmed[simulation] or simulation in self._warming:
+            return
+        if time.time() - self._last_warm_up[simulation] < WARM_UP_RETRY_INTERVAL:
+            return
+        self._warming.add(simulation)
+        self._last_warm_up[simulation] = time.time()
+        mode_str = "simulation" if simulation else "real"
+        threading.Thread(target=self._warm_up, args=(simulation,), name=f"warm-up-{mode_str}", daemon=True).start()
+
+    def _warm_up(self, simulation: bool):
+        """
+        Log in, index contracts and send a no-op request through the queue,
+        so the first real request of a mode never pays for any of it.
+        """
+        mode_str = "simulation" if simulation else "real"
+        start = time.time()
+        client = None
+        try:
+            api = self._get_api_client(simulation)
+            get_contract_registry(api).futures_overview()
+
+            # Same path as an API request: Redis, a lane thread and back
+            client = TradingQueueClient(transport=self.transport)
+            response = client.submit_request(
+                TradingOperation.PING,
+                simulation,
+                timeout=WARM_UP_PING_TIMEOUT,
+            )
+            if not response.success:
+                raise RuntimeError(response.error)
+
+            # The session may have been dropped while we were warming it
+            if self.api_clients.get(simulation) is not api:
+                raise RuntimeError("connection was replaced during warm-up")
+
+            self._warmed[simulation] = True
+            logger.info(f"{mode_str.capitalize()} connection ready ({time.time() - start:.1f}s warm-up)")
+            self._publish_heartbeat()
+        except Exception as e:
+            logger.warning(f"Warm-up of {mode_str} connection failed: {e}")
+        finally:
+            if client is not None:
+                client.close()
+            self._warming.discard(simulation)
+
+    def _mark_not_ready(self, simulation: bool):
+        """
+        Clear a mode's ready flag after its session was dropped or replaced,
+        and warm the mode up again right away instead of after the retry interval.
+        """
+        self._warmed[simulation] = False
+        self._last_warm_up[simulation] = 0.0
+        self._publish_heartbeat()
+        if self.running and simulation in self._warm_up_modes():
+            self._start_warm_up(simulation)
+
+    def _queue_depths(self) -> Dict[str, Optional[int]]:
+        """Requests waiting in each queue (not yet taken by a worker)."""
+        if self.transport != "streams":
+            with self.redis.pipeline(transaction=False) as pipe:
+                for queue in REQUEST_QUEUES:
+                    pipe.llen(queue)
+                return dict(zip(REQUEST_QUEUES, pipe.execute()))
+
+        depths = {}
+        for queue in REQUEST_QUEUES:
+            try:
+                groups = self.redis.xinfo_groups(stream_for_queue(queue))
+            except redis.ResponseError:
+                groups = []  # Stream not created yet
+            group = next((g for g in groups if g["name"] == REQUEST_GROUP), None)
+            depths[queue] = group.get("lag") if group else 0
+        return depths
+
+    def _publish_heartbeat(self):
+        """
+        Write (and keep alive) the heartbeat record.
+
+        The API gates orders on the "ready" flags and serves /health/live and
+        /health/ready from this record instead of pinging through the queue.
+        """
+        now = time.time()
+        connections = {}
+        for simulation in [True, False]:
+            connected = self.api_clients.get(simulation) is not None
+            connections["simulation" if simulation else "real"] = {
+                "connected": connected,
+                "session_age": round(now - self._session_started[simulation], 1) if connected else None,
+                "last_success": self._last_successful_request[simulation] or None,
+            }
+        record = {
+            "worker": self.consumer,
+            "updated": now,
+            "transport": self.transport,
+            "modes": ["simulation" if simulation else "real" for simulation in self._warm_up_modes()],
+            "ready": {"simulation": self._warmed[True], "real": self._warmed[False]},
+            "connections": connections,
+            "in_flight": self._in_flight,
+        }
+        try:
+            record["queue_depth"] = self._queue_depths()
+            self.redis.set(WORKER_HEARTBEAT_KEY, json.dumps(record), ex=WORKER_HEARTBEAT_TTL)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to publish heartbeat: {e}")
+
+        # The heartbeat timer also refreshes the exporter's gauges
+        for queue, depth in record.get("queue_depth", {}).items():
+            if depth is not None:
+                QUEUE_DEPTH.labels(queue).set(depth)
+        for simulation, store in self.trade_stores.items():
+            PENDING_TRADES.labels("simulation" if simulation else "real").set(len(store))
+        IN_FLIGHT_REQUESTS.set(self._in_flight)
+
+    def _heartbeat_loop(self):
+        """Heartbeat thread: refresh the heartbeat record every WORKER_HEARTBEAT_INTERVAL."""
+        while self.running:
+            self._publish_heartbeat()
+            deadline = time.time() + WORKER_HEARTBEAT_INTERVAL
+            while self.running and time.time() < deadline:
+                time.sleep(0.5)
+
     def _activate_ca(self, api: sj.Shioaji):
         """Activate CA certificate for real trading."""
         ca_path = os.getenv("CA_PATH")
@@ -246,43 +786,45 @@ class TradingWorker:
             old_api = self.api_clients[simulation]
             self.api_clients[simulation] = None
             
-            # Try to logout gracefully, but don't block for too long
             try:
-                # Use a thread to attempt logout with timeout
-                logout_done = threading.Event()
-                logout_error = [None]
-                
-                def do_logout():
-                    try:
-                        old_api.logout()
-                    except Exception as e:
-                        logout_error[0] = e
-                    finally:
-                        logout_done.set()
-                
-                logout_thread = threading.Thread(target=do_logout, daemon=True)
-                logout_thread.start()
-                
-                # Wait for logout with timeout
-                if logout_done.wait(timeout=CONNECTION_LOGOUT_TIMEOUT):
-                    if logout_error[0]:
-                        logger.debug(f"Logout completed with error: {logout_error[0]}")
-                    else:
-                        logger.debug(f"Logout completed successfully")
-                else:
-                    logger.warning(
-                        f"Logout timed out after {CONNECTION_LOGOUT_TIMEOUT}s, "
-                        f"abandoning old {mode_str} connection"
-                    )
-                    # Don't wait for the thread - it's a daemon thread and will be
-                    # cleaned up when the process exits
-                    
-            except Exception as e:
-                logger.debug(f"Error during logout attempt: {e}")
+                self._logout(old_api, mode_str)
             finally:
                 self._invalidating[simulation] = False
                 logger.info(f"{mode_str.capitalize()} connection invalidated, will reconnect on next request")
 
+        self._mark_not_ready(simulation)
+
+    def _logout(self, api: sj.Shioaji, mode_str: str):
+        """Log a session out, without blocking for long if it is already dead."""
+        # Use a thread to attempt logout with timeout
+        logout_done = threading.Event()
+        logout_error = [None]
+
+        def do_logout():
+            try:
+                api.logout()
+            except Exception as e:
+                logout_error[0] = e
+            finally:
+                logout_done.set()
+
+        logout_thread = threading.Thread(target=do_logout, daemon=True)
+        logout_thread.start()
+
+        # Wait for logout with timeout
+        if logout_done.wait(timeout=CONNECTION_LOGOUT_TIMEOUT):
+            if logout_error[0]:
+                logger.debug(f"Logout completed with error: {logout_error[0]}")
+            else:
+                logger.debug(f"Logout completed successfully")
+        else:
+            logger.warning(
+                f"Logout timed out after {CONNECTION_LOGOUT_TIMEOUT}s, "
+                f"abandoning old {mode_str} connection"
+            )
+            # Don't wait for the thread - it's a daemon thread and will be
+            # cleaned up when the process exits
+
     def _check_connection_health(self, simulation: bool) -> bool:
         """
         Check if an existing connection is still healthy.
@@ -318,26 +860,110 @@ class TradingWorker:
             logger.debug(f"{mode_str.capitalize()} connection health check had error: {e}")
             return True
 
-    def _maybe_refresh_connection(self, simulation: bool):
+    def _replace_connection(self, simulation: bool, reason: str):
         """
-        Check if connection needs to be refreshed and invalidate if necessary.
-        
-        This is called periodically to proactively detect stale connections.
+        Log in a replacement session in the background and swap it in.
+
+        Requests keep using the current session while the new one is set up;
+        the old session is logged out after SESSION_RETIRE_GRACE so requests
+        already running on it can finish.
         """
         mode_str = "simulation" if simulation else "real"
-        
+        logger.info(f"Replacing {mode_str} connection ({reason})...")
+
+        # Holding the login lock makes requests that lost their session wait
+        # for this login instead of starting their own
+        with self._login_locks[simulation]:
+            old_api = self.api_clients[simulation]
+            api, book = self._login(simulation)
+            self._install_connection(simulation, api, book)
+
+        if old_api is not None and old_api is not api:
+            self._retiring.append((old_api, mode_str, time.time() + SESSION_RETIRE_GRACE))
+        logger.info(f"{mode_str.capitalize()} connection replaced")
+        self._mark_not_ready(simulation)
+
+    def _retire_sessions(self, force: bool = False):
+        """Log out replaced sessions whose grace period is over."""
+        now = time.time()
+        for entry in list(self._retiring):
+            api, mode_str, logout_at = entry
+            if force or logout_at <= now:
+                self._retiring.remove(entry)
+                self._logout(api, mode_str)
+
+    def _supervise_connection(self, simulation: bool):
+        """Refresh an installed session before it expires or once it looks stale."""
+        mode_str = "simulation" if simulation else "real"
+
         if self.api_clients.get(simulation) is None:
-            return  # No connection to refresh
-            
-        last_success = self._last_successful_request[simulation]
-        time_since_success = time.time() - last_success
-        
+            return  # Not logged in yet; the first request or warm-up logs in
+        if time.time() < self._supervise_after[simulation]:
+            return
+
+        session_age = time.time() - self._session_started[simulation]
+        if session_age > SESSION_REFRESH_AGE:
+            self._replace_connection(simulation, f"session age {session_age:.0f}s")
+            return
+
+        time_since_success = time.time() - self._last_successful_request[simulation]
+        resumed = self._session_resumed[simulation]
         # If it's been a while since successful request, verify connection is still healthy
-        if time_since_success > HEALTH_CHECK_INTERVAL:
-            logger.info(f"Checking {mode_str} connection health (last success: {time_since_success:.0f}s ago)...")
+        if resumed or time_since_success > HEALTH_CHECK_INTERVAL:
+            self._session_resumed[simulation] = False
+            logger.info(
+                f"Checking {mode_str} connection health "
+                f"({'SDK reconnected' if resumed else f'last success: {time_since_success:.0f}s ago'})..."
+            )
             if not self._check_connection_health(simulation):
-                logger.warning(f"{mode_str.capitalize()} connection appears stale, invalidating...")
-                self._invalidate_connection(simulation)
+                self._replace_connection(simulation, "health check failed")
+
+    def _supervise_connections(self):
+        """Connection supervisor thread: keeps logins off the request path."""
+        while self.running:
+            for simulation in [True, False]:
+                try:
+                    self._supervise_connection(simulation)
+                except Exception as e:
+                    mode_str = "simulation" if simulation else "real"
+                    logger.error(f"Failed to refresh {mode_str} connection: {e}")
+                    # The current session keeps serving; retry later instead of every pass
+                    self._supervise_after[simulation] = time.time() + HEALTH_CHECK_INTERVAL
+            try:
+                self._retire_sessions()
+            except Exception as e:
+                logger.error(f"Error retiring replaced sessions: {e}")
+
+            deadline = time.time() + SUPERVISOR_INTERVAL
+            while self.running and time.time() < deadline:
+                time.sleep(0.5)
+
+        self._retire_sessions(force=True)
+
+    def _maybe_refresh_contracts(self):
+        """
+        Re-download contracts once per trading day so rolled-over front-month
+        contracts are resolvable without waiting for a re-login.
+        """
+        for simulation, api in list(self.api_clients.items()):
+            if api is None or not get_contract_registry(api).is_stale():
+                continue
+            mode_str = "simulation" if simulation else "real"
+            try:
+                refresh_contracts(api)
+                logger.info(f"Refreshed {mode_str} contracts for the new trading day")
+            except Exception as e:
+                # Re-index what we have so this is retried tomorrow, not on every idle poll
+                logger.warning(f"Failed to refresh {mode_str} contracts: {e}")
+                get_contract_registry(api, rebuild=True)
+            self._invalidate_reference_cache()
+
+    def _invalidate_reference_cache(self):
+        """Make the API drop reference data cached from the previous contracts."""
+        try:
+            invalidate_reference_cache(self.redis)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to invalidate reference cache: {e}")
 
     def _handle_request(self, request: TradingRequest) -> TradingResponse:
         """
@@ -436,17 +1062,10 @@ class TradingWorker:
 
             elif operation == TradingOperation.GET_POSITIONS.value:
                 positions = api.list_positions(api.futopt_account)
+                self._get_position_book(simulation, api).sync(positions)
                 
-                # Build code-to-symbol mapping from ALL futures contracts
-                code_to_symbol = {}
-                for product_name in dir(api.Contracts.Futures):
-                    if product_name.startswith("_"):
-                        continue
-                    product = getattr(api.Contracts.Futures, product_name)
-                    if hasattr(product, "__iter__"):
-                        for contract in product:
-                            if hasattr(contract, "code") and hasattr(contract, "symbol"):
-                                code_to_symbol[contract.code] = contract.symbol
+                # Code-to-symbol mapping over ALL futures contracts, built once per session
+                code_to_symbol = get_contract_registry(api).code_to_symbol()
                 
                 positions_data = []
                 for p in positions:
@@ -472,24 +1091,7 @@ class TradingWorker:
                 )
 
             elif operation == TradingOperation.GET_FUTURES_OVERVIEW.value:
-                futures = api.Contracts.Futures
-                products = []
-                for product_name in dir(futures):
-                    if product_name.startswith("_"):
-                        continue
-                    product = getattr(futures, product_name)
-                    if hasattr(product, "__iter__"):
-                        contracts = [
-                            {"symbol": c.symbol, "name": c.name, "code": c.code}
-                            for c in product
-                            if hasattr(c, "symbol")
-                        ]
-                        if contracts:
-                            products.append({
-                                "product": product_name,
-                                "contracts": contracts,
-                                "count": len(contracts),
-                            })
+                products = get_contract_registry(api).futures_overview()
                 return TradingResponse(
                     request_id=request.request_id,
                     success=True,
@@ -498,24 +1100,13 @@ class TradingWorker:
 
             elif operation == TradingOperation.GET_PRODUCT_CONTRACTS.value:
                 product = params["product"].upper()
-                product_contracts = getattr(api.Contracts.Futures, product, None)
-                if not product_contracts:
+                contracts = get_contract_registry(api).product_contracts(product)
+                if contracts is None:
                     return TradingResponse(
                         request_id=request.request_id,
                         success=False,
                         error=f"Product '{product}' not found",
                     )
-                contracts = [
-                    {
-                        "symbol": c.symbol,
-                        "code": c.code,
-                        "name": c.name,
-                        "delivery_month": c.delivery_month,
-                        "category": c.category,
-                    }
-                    for c in product_contracts
-                    if hasattr(c, "symbol")
-                ]
                 return TradingResponse(
                     request_id=request.request_id,
                     success=True,
@@ -528,9 +1119,15 @@ class TradingWorker:
             elif operation == TradingOperation.PLACE_EXIT_ORDER.value:
                 return self._handle_exit_order(api, request)
 
+            elif operation == TradingOperation.PLACE_ORDERS_BATCH.value:
+                return self._handle_orders_batch(api, request)
+
             elif operation == TradingOperation.CHECK_ORDER_STATUS.value:
                 return self._handle_check_order_status(api, request)
 
+            elif operation == TradingOperation.CHECK_ORDER_STATUS_BATCH.value:
+                return self._handle_check_order_status_batch(api, request)
+
             else:
                 return TradingResponse(
                     request_id=request.request_id,
@@ -550,24 +1147,7 @@ class TradingWorker:
             )
 
         except Exception as e:
-            error_str = str(e)
-            # Check for common connection-related error patterns in exception message
-            connection_error_patterns = [
-                "token is expired",
-                "token expired", 
-                "status_code': 401",
-                "statuscode: 401",
-                "not ready",
-                "session down",
-                "connection refused",
-                "connection reset",
-            ]
-            is_connection_error = any(
-                pattern in error_str.lower() 
-                for pattern in connection_error_patterns
-            )
-            
-            if is_connection_error:
+            if is_connection_error(e):
                 logger.error(f"[Attempt {attempt}] Detected connection error: {e}, invalidating connection...")
                 self._invalidate_connection(simulation)
                 return TradingResponse(
@@ -594,30 +1174,14 @@ class TradingWorker:
 
         try:
             contract = get_contract_from_symbol(api, symbol)
-            current_position = get_current_position(api, contract) or 0
+            with stage(request.trace, "position"):
+                current_position = self._get_position_book(request.simulation, api).get(contract.code)
 
-            # Adjust quantity for position reversal
             original_quantity = quantity
-            if action == sj.constant.Action.Buy and current_position < 0:
-                quantity = quantity - current_position
-            elif action == sj.constant.Action.Sell and current_position > 0:
-                quantity = quantity + current_position
-
-            order = api.Order(
-                action=action,
-                price=0.0,
-                quantity=quantity,
-                price_type=sj.constant.FuturesPriceType.MKT,
-                order_type=sj.constant.OrderType.IOC,
-                octype=sj.constant.FuturesOCType.Auto,
-                account=api.futopt_account,
-            )
+            quantity = self._entry_quantity(action, quantity, current_position)
 
-            result = api.place_order(contract, order)
-
-            # Store trade for later status checking
-            trade_key = f"{result.order.id}:{result.order.seqno}"
-            self.pending_trades[trade_key] = result
+            with stage(request.trace, "place_order"):
+                result = self._submit_order(api, request.simulation, contract, action, quantity)
 
             return TradingResponse(
                 request_id=request.request_id,
@@ -655,37 +1219,20 @@ class TradingWorker:
 
         try:
             contract = get_contract_from_symbol(api, symbol)
-            current_position = get_current_position(api, contract) or 0
-
-            # Determine exit action and quantity
-            if direction == sj.constant.Action.Buy and current_position > 0:
-                action = sj.constant.Action.Sell
-                quantity = current_position
-            elif direction == sj.constant.Action.Sell and current_position < 0:
-                action = sj.constant.Action.Buy
-                quantity = -current_position
-            else:
+            with stage(request.trace, "position"):
+                current_position = self._get_position_book(request.simulation, api).get(contract.code)
+
+            exit_order = self._exit_order(direction, current_position)
+            if exit_order is None:
                 return TradingResponse(
                     request_id=request.request_id,
                     success=True,
                     data={"message": "No position to exit", "order_id": None},
                 )
+            action, quantity = exit_order
 
-            order = api.Order(
-                action=action,
-                price=0.0,
-                quantity=quantity,
-                price_type=sj.constant.FuturesPriceType.MKT,
-                order_type=sj.constant.OrderType.IOC,
-                octype=sj.constant.FuturesOCType.Auto,
-                account=api.futopt_account,
-            )
-
-            result = api.place_order(contract, order)
-
-            # Store trade for later status checking
-            trade_key = f"{result.order.id}:{result.order.seqno}"
-            self.pending_trades[trade_key] = result
+            with stage(request.trace, "place_order"):
+                result = self._submit_order(api, request.simulation, contract, action, quantity)
 
             return TradingResponse(
                 request_id=request.request_id,
@@ -708,14 +1255,159 @@ class TradingWorker:
                 error=str(e),
             )
 
+    def _handle_orders_batch(self, api: sj.Shioaji, request: TradingRequest) -> TradingResponse:
+        """
+        Handle placement of several orders, e.g. a rebalance across symbols.
+
+        Positions are read once and every order is sized from that snapshot,
+        so a batch may hold at most one order per contract (a second one would
+        need the first one's fill); such a batch is rejected before anything
+        is placed. The orders are placed back-to-back and fail individually,
+        e.g. on an unknown symbol. Once an order has reached the exchange the
+        batch is never retried: any later error fails only its own order, and
+        a connection error fails the remaining ones.
+        """
+        orders = request.params["orders"]
+
+        # Resolve every contract first: symbols are aliases (MXFR1, MXF202601, ...)
+        contracts = []
+        for params in orders:
+            try:
+                contracts.append(get_contract_from_symbol(api, params["symbol"]))
+            except (TargetContractNotExistError, ValueError) as e:
+                contracts.append(e)
+        codes = [contract.code for contract in contracts if not isinstance(contract, Exception)]
+        duplicates = sorted({code for code in codes if codes.count(code) > 1})
+        if duplicates:
+            return TradingResponse(
+                request_id=request.request_id,
+                success=False,
+                error=f"Each contract may appear only once per batch: {', '.join(duplicates)}",
+            )
+
+        with stage(request.trace, "position"):
+            positions = self._get_position_book(request.simulation, api).snapshot()
+
+        results = []
+        placed = False
+        with stage(request.trace, "place_order"):
+            for index, (params, contract) in enumerate(zip(orders, contracts)):
+                if isinstance(contract, Exception):
+                    results.append({"success": False, "error": str(contract)})
+                    continue
+                try:
+                    result = self._place_batch_order(api, request.simulation, params, contract, positions)
+                except (TargetContractNotExistError, AccountNotSignError, AccountNotProvideError, ValueError) as e:
+                    results.append({"success": False, "error": str(e)})
+                    continue
+                except Exception as e:
+                    if not is_connection_error(e):
+                        logger.exception(f"Error placing order {index + 1}/{len(orders)} of a batch: {e}")
+                        results.append({"success": False, "error": str(e)})
+                        continue
+                    if not placed:
+                        raise  # nothing placed yet: safe to retry the whole batch
+                    logger.error(
+                        f"Connection error after placing part of a batch: {e}, "
+                        f"failing the remaining {len(orders) - index} orders"
+                    )
+                    self._invalidate_connection(request.simulation)
+                    error = f"Connection error ({type(e).__name__}): {e}"
+                    results.extend({"success": False, "error": error} for _ in orders[index:])
+                    break
+                results.append(result)
+                placed = placed or bool(result["data"].get("order_id"))
+
+        return TradingResponse(
+            request_id=request.request_id,
+            success=True,
+            data={"results": results},
+        )
+
+    def _place_batch_order(self, api: sj.Shioaji, simulation: bool, params: dict, contract,
+                           positions: Dict[str, int]) -> Dict[str, Any]:
+        """Place one order of a batch, sized from the batch's positions snapshot."""
+        current_position = positions.get(contract.code, 0)
+
+        if "position_direction" in params:
+            direction = sj.constant.Action.Buy if params["position_direction"] == "Buy" else sj.constant.Action.Sell
+            exit_order = self._exit_order(direction, current_position)
+            if exit_order is None:
+                return {"success": True, "data": {"message": "No position to exit", "order_id": None}}
+            action, quantity = exit_order
+            original_quantity = quantity
+        else:
+            action = sj.constant.Action.Buy if params["action"] == "Buy" else sj.constant.Action.Sell
+            original_quantity = params["quantity"]
+            quantity = self._entry_quantity(action, original_quantity, current_position)
+
+        result = self._submit_order(api, simulation, contract, action, quantity)
+        return {
+            "success": True,
+            "data": {
+                "order_id": result.order.id,
+                "seqno": result.order.seqno,
+                "ordno": getattr(result.order, "ordno", ""),
+                "action": action.value if hasattr(action, "value") else str(action),
+                "quantity": quantity,
+                "original_quantity": original_quantity,
+                "symbol": contract.symbol,
+                "code": contract.code,
+            },
+        }
+
+    @staticmethod
+    def _entry_quantity(action: sj.constant.Action, quantity: int, current_position: int) -> int:
+        """Entry order quantity, adding the opposite position so the order reverses it."""
+        if action == sj.constant.Action.Buy and current_position < 0:
+            return quantity - current_position
+        if action == sj.constant.Action.Sell and current_position > 0:
+            return quantity + current_position
+        return quantity
+
+    @staticmethod
+    def _exit_order(direction: sj.constant.Action, current_position: int):
+        """(action, quantity) closing a position in the given direction, or None if there is none."""
+        if direction == sj.constant.Action.Buy and current_position > 0:
+            return sj.constant.Action.Sell, current_position
+        if direction == sj.constant.Action.Sell and current_position < 0:
+            return sj.constant.Action.Buy, -current_position
+        return None
+
+    def _submit_order(self, api: sj.Shioaji, simulation: bool, contract, action: sj.constant.Action, quantity: int):
+        """Place an IOC market order and keep the trade for status checks."""
+        order = api.Order(
+            action=action,
+            price=0.0,
+            quantity=quantity,
+            price_type=sj.constant.FuturesPriceType.MKT,
+            order_type=sj.constant.OrderType.IOC,
+            octype=sj.constant.FuturesOCType.Auto,
+            account=api.futopt_account,
+        )
+
+        self._get_position_book(simulation, api).note_order(contract.code)
+        with PLACE_ORDER_SECONDS.labels("simulation" if simulation else "real").time():
+            result = api.place_order(contract, order)
+
+        # Store trade for later status checking
+        self.trade_stores[simulation].add(result, symbol=contract.symbol, code=contract.code)
+        return result
+
     def _handle_check_order_status(self, api: sj.Shioaji, request: TradingRequest) -> TradingResponse:
         """Handle order status check."""
         params = request.params
         order_id = params["order_id"]
         seqno = params["seqno"]
 
-        trade_key = f"{order_id}:{seqno}"
-        trade = self.pending_trades.get(trade_key)
+        trade_key = make_trade_key(order_id, seqno)
+        store = self.trade_stores[request.simulation]
+        trade = store.get(trade_key)
+
+        # Placed before a worker restart: reload it from the broker
+        if not trade and store.is_known(trade_key):
+            store.rehydrate(api)
+            trade = store.get(trade_key)
 
         if not trade:
             return TradingResponse(
@@ -726,119 +1418,442 @@ class TradingWorker:
 
         try:
             api.update_status(trade=trade)
+            return TradingResponse(
+                request_id=request.request_id,
+                success=True,
+                data=self._trade_status(store, trade_key, trade),
+            )
 
-            status_obj = trade.status
-            status_value = (
-                status_obj.status.value
-                if hasattr(status_obj.status, "value")
-                else str(status_obj.status)
+        except Exception as e:
+            logger.exception(f"Error checking order status: {e}")
+            return TradingResponse(
+                request_id=request.request_id,
+                success=False,
+                error=str(e),
             )
 
-            deals = status_obj.deals if status_obj.deals else []
-            deal_quantity = getattr(status_obj, "deal_quantity", 0)
+    def _handle_check_order_status_batch(self, api: sj.Shioaji, request: TradingRequest) -> TradingResponse:
+        """
+        Handle a status check of many orders.
+
+        One account-wide update_status refreshes every trade of the session,
+        instead of one broker call per trade. Trades held from an earlier
+        session (before a session swap, or rehydrated then) are not refreshed
+        by it: they are swapped for the current session's copy from
+        list_trades, or refreshed one by one if the session does not know them.
+        """
+        trade_keys = request.params["trade_keys"]
+        store = self.trade_stores[request.simulation]
+
+        trades = {key: store.get(key) for key in trade_keys}
+        # Placed before a worker restart: reload them from the broker
+        if any(trade is None and store.is_known(key) for key, trade in trades.items()):
+            store.rehydrate(api)
+            trades = {key: trade or store.get(key) for key, trade in trades.items()}
 
-            total_value = sum(d.price * d.quantity for d in deals) if deals else 0
-            total_qty = sum(d.quantity for d in deals) if deals else 0
-            fill_avg_price = total_value / total_qty if total_qty > 0 else 0.0
+        found = {key: trade for key, trade in trades.items() if trade is not None}
+        missing = [key for key, trade in trades.items() if trade is None]
 
+        try:
+            if found:
+                api.update_status(api.futopt_account)
+                session_trades = {
+                    make_trade_key(trade.order.id, trade.order.seqno): trade
+                    for trade in api.list_trades()
+                }
+                for key, trade in found.items():
+                    current = session_trades.get(key)
+                    if current is None:
+                        api.update_status(trade=trade)
+                    elif current is not trade:
+                        store.replace(key, current)
+                        found[key] = current
             return TradingResponse(
                 request_id=request.request_id,
                 success=True,
                 data={
-                    "status": status_value,
-                    "order_id": order_id,
-                    "seqno": seqno,
-                    "ordno": getattr(trade.order, "ordno", ""),
-                    "order_quantity": getattr(status_obj, "order_quantity", 0),
-                    "deal_quantity": deal_quantity,
-                    "cancel_quantity": getattr(status_obj, "cancel_quantity", 0),
-                    "fill_avg_price": fill_avg_price,
-                    "deals": [
-                        {
-                            "seq": getattr(d, "seq", ""),
-                            "price": d.price,
-                            "quantity": d.quantity,
-                            "ts": getattr(d, "ts", 0),
-                        }
-                        for d in deals
-                    ],
+                    "statuses": {
+                        key: self._trade_status(store, key, trade)
+                        for key, trade in found.items()
+                    },
+                    "missing": missing,
                 },
             )
 
         except Exception as e:
-            logger.exception(f"Error checking order status: {e}")
+            logger.exception(f"Error checking order status batch: {e}")
             return TradingResponse(
                 request_id=request.request_id,
                 success=False,
                 error=str(e),
             )
 
-    def run(self):
-        """Main loop - process requests from the queue."""
-        logger.info("Trading worker starting...")
-        logger.info(f"Supported futures: {SUPPORTED_FUTURES}")
+    def _trade_status(self, store: TradeStore, trade_key: str, trade) -> Dict[str, Any]:
+        """Build a CHECK_ORDER_STATUS payload from a freshly updated trade."""
+        status_obj = trade.status
+        status_value = (
+            status_obj.status.value
+            if hasattr(status_obj.status, "value")
+            else str(status_obj.status)
+        )
 
-        self.running = True
+        store.mark_status(trade_key, status_value)
+
+        deals = status_obj.deals if status_obj.deals else []
+        deal_quantity = getattr(status_obj, "deal_quantity", 0)
+
+        total_value = sum(d.price * d.quantity for d in deals) if deals else 0
+        total_qty = sum(d.quantity for d in deals) if deals else 0
+        fill_avg_price = total_value / total_qty if total_qty > 0 else 0.0
+
+        return {
+            "status": status_value,
+            "order_id": trade.order.id,
+            "seqno": trade.order.seqno,
+            "ordno": getattr(trade.order, "ordno", ""),
+            "order_quantity": getattr(status_obj, "order_quantity", 0),
+            "deal_quantity": deal_quantity,
+            "cancel_quantity": getattr(status_obj, "cancel_quantity", 0),
+            "fill_avg_price": fill_avg_price,
+            "deals": [
+                {
+                    "seq": getattr(d, "seq", ""),
+                    "price": d.price,
+                    "quantity": d.quantity,
+                    "ts": getattr(d, "ts", 0),
+                }
+                for d in deals
+            ],
+        }
 
-        # Initial connection attempt
-        try:
-            self._get_api_client(simulation=True)
-            logger.info("Initial simulation connection established")
-        except Exception as e:
-            logger.warning(f"Initial simulation connection failed: {e}")
+    def _submit_request(self, queue: str, request: TradingRequest) -> Future:
+        """
+        Hand a request to one of its lane's executors.
 
-        logger.info(f"Listening for requests on queue: {REQUEST_QUEUE}")
+        Orders for the same account/symbol always land on the same
+        single-threaded executor, so they are placed in FIFO order. A batch
+        runs on its first symbol's executor after the earlier orders for all
+        of its symbols, and later orders for those symbols wait for it. Waits
+        only go to earlier requests, so they cannot deadlock.
+        """
+        executors = self._lanes[queue]
+        if request.operation == TradingOperation.PLACE_ORDERS_BATCH.value:
+            symbols = sorted({order.get("symbol") for order in request.params.get("orders", [])}, key=str)
+        else:
+            symbols = [request.params.get("symbol")]
+        keys = [(request.simulation, symbol) for symbol in symbols or [None]]
+        executor = executors[hash(keys[0]) % len(executors)]
+
+        if request.operation not in {op.value for op in ORDER_OPERATIONS}:
+            return executor.submit(self._process_request, request)
+
+        tails = self._order_tails[queue]
+        after = [tails[key] for key in keys if key in tails and not tails[key].done()]
+        future = executor.submit(self._process_request, request, after)
+        for key in keys:
+            tails[key] = future
+        for key in [key for key, tail in tails.items() if tail.done()]:
+            del tails[key]
+        return future
+
+    def _dispatch_lane(self, queue: str):
+        """Pop requests from one priority lane and hand them to its executors."""
+        slots = self._lane_slots[queue]
 
-        last_health_check = time.time()
-        
         while self.running:
-            try:
-                # Block waiting for request with timeout
-                result = self.redis.blpop(REQUEST_QUEUE, timeout=QUEUE_POLL_TIMEOUT)
+            # Only take a request off Redis when a lane thread is free
+            if not slots.acquire(timeout=QUEUE_POLL_TIMEOUT):
+                continue
 
+            try:
+                result = self.redis.blpop(queue, timeout=QUEUE_POLL_TIMEOUT)
                 if result is None:
-                    # Timeout - good time to check connection health
-                    current_time = time.time()
-                    if current_time - last_health_check > HEALTH_CHECK_INTERVAL:
-                        logger.debug("Periodic health check during idle...")
-                        for sim_mode in [True, False]:
-                            if self.api_clients.get(sim_mode) is not None:
-                                self._maybe_refresh_connection(sim_mode)
-                        last_health_check = current_time
+                    slots.release()
                     continue
 
                 _, request_data = result
-                request = TradingRequest.from_json(request_data)
+                request = TradingRequest.decode(request_data)
 
-                logger.info(f"Received request: {request.operation} (id={request.request_id[:8]}...)")
+                future = self._submit_request(queue, request)
+                future.add_done_callback(lambda _: slots.release())
 
-                # Process request
-                response = self._handle_request(request)
-                
-                # Track successful requests for health monitoring
-                if response.success:
-                    self._last_successful_request[request.simulation] = time.time()
+            except redis.ConnectionError as e:
+                slots.release()
+                logger.error(f"Redis connection error on {queue}: {e}")
+                time.sleep(RECONNECT_DELAY)
 
-                # Send response
-                response_key = f"{RESPONSE_PREFIX}{request.request_id}"
-                self.redis.rpush(response_key, response.to_json())
-                self.redis.expire(response_key, 60)  # Clean up after 60s
+            except Exception as e:
+                slots.release()
+                logger.exception(f"Error dispatching request from {queue}: {e}")
+                time.sleep(1)
+
+    def _ensure_request_group(self, stream: str):
+        """Create the worker consumer group on a request stream if missing."""
+        try:
+            # Start from 0 so requests submitted before the group existed are handled
+            self.redis.xgroup_create(stream, REQUEST_GROUP, id="0", mkstream=True)
+            logger.info(f"Created consumer group '{REQUEST_GROUP}' on {stream}")
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _claim_stale_request(self, stream: str):
+        """Claim one request left unacknowledged by a crashed worker, if any."""
+        claimed = self.redis.xautoclaim(
+            stream,
+            REQUEST_GROUP,
+            self.consumer,
+            min_idle_time=REQUEST_CLAIM_IDLE_MS,
+            count=1,
+        )
+        for entry_id, fields in claimed[1]:
+            # Still running here; a slow request is not a lost one
+            if entry_id in self._stream_entries_in_flight:
+                continue
+            return entry_id, fields
+        return None
+
+    def _should_retry(self, entry_id: str, request: TradingRequest) -> bool:
+        """Decide whether a reclaimed request is handled again."""
+        if request.deadline is not None and request.deadline < time.time():
+            logger.warning(
+                f"Dropping reclaimed request {request.operation} (id={request.request_id[:8]}...): "
+                f"caller already timed out"
+            )
+            return False
+
+        # The previous attempt may have reached the exchange; never place an order twice
+        if request.operation in {op.value for op in ORDER_OPERATIONS}:
+            logger.error(f"Not retrying interrupted order request (id={request.request_id[:8]}..., entry={entry_id})")
+            self._send_response(request, TradingResponse(
+                request_id=request.request_id,
+                success=False,
+                error="Trading worker was interrupted while placing this order; check positions before retrying",
+            ))
+            return False
+
+        logger.info(f"Retrying reclaimed request {request.operation} (id={request.request_id[:8]}...)")
+        return True
+
+    def _finish_stream_entry(self, stream: str, entry_id: str):
+        """Acknowledge a handled request entry."""
+        self._stream_entries_in_flight.discard(entry_id)
+        try:
+            self.redis.xack(stream, REQUEST_GROUP, entry_id)
+        except redis.RedisError as e:
+            logger.error(f"Failed to acknowledge {entry_id} on {stream}: {e}")
+
+    def _dispatch_stream(self, queue: str):
+        """
+        Read requests of one priority lane from its stream (streams transport).
+
+        Entries are acknowledged only after the response is sent, so requests
+        of a worker that dies mid-request stay pending and are reclaimed.
+        """
+        stream = stream_for_queue(queue)
+        slots = self._lane_slots[queue]
+        group_ready = False
+        last_claim = 0.0
 
-                logger.info(
-                    f"Completed request: {request.operation} "
-                    f"(success={response.success}, id={request.request_id[:8]}...)"
+        while self.running:
+            if not slots.acquire(timeout=QUEUE_POLL_TIMEOUT):
+                continue
+
+            try:
+                if not group_ready:
+                    self._ensure_request_group(stream)
+                    group_ready = True
+
+                entry, reclaimed = None, False
+                if time.time() - last_claim > REQUEST_CLAIM_INTERVAL:
+                    last_claim = time.time()
+                    entry = self._claim_stale_request(stream)
+                    reclaimed = entry is not None
+
+                if entry is None:
+                    result = self.redis.xreadgroup(
+                        REQUEST_GROUP,
+                        self.consumer,
+                        {stream: ">"},
+                        count=1,
+                        block=QUEUE_POLL_TIMEOUT * 1000,
+                    )
+                    if not result:
+                        slots.release()
+                        continue
+                    entry = result[0][1][0]
+
+                entry_id, fields = entry
+                if not fields:
+                    # Trimmed from the stream before it was handled
+                    slots.release()
+                    self._finish_stream_entry(stream, entry_id)
+                    continue
+
+                request = TradingRequest.decode(fields["data"])
+                if reclaimed and not self._should_retry(entry_id, request):
+                    slots.release()
+                    self._finish_stream_entry(stream, entry_id)
+                    continue
+
+                self._stream_entries_in_flight.add(entry_id)
+                future = self._submit_request(queue, request)
+                future.add_done_callback(
+                    lambda _, entry_id=entry_id: (slots.release(), self._finish_stream_entry(stream, entry_id))
                 )
 
             except redis.ConnectionError as e:
-                logger.error(f"Redis connection error: {e}")
+                slots.release()
+                logger.error(f"Redis connection error on {stream}: {e}")
                 time.sleep(RECONNECT_DELAY)
 
+            except redis.ResponseError as e:
+                slots.release()
+                # e.g. NOGROUP after the stream was deleted
+                logger.error(f"Redis error on {stream}: {e}")
+                group_ready = False
+                time.sleep(1)
+
             except Exception as e:
-                logger.exception(f"Error in main loop: {e}")
+                slots.release()
+                logger.exception(f"Error dispatching request from {stream}: {e}")
                 time.sleep(1)
 
-        # Cleanup - use _invalidate_connection for proper cleanup with timeout handling
+    def _send_response(self, request: TradingRequest, response: TradingResponse):
+        """Deliver a response to the caller's reply inbox or per-request key."""
+        with self.redis.pipeline(transaction=False) as pipe:
+            if request.reply_to and self.transport == "streams":
+                pipe.xadd(
+                    request.reply_to,
+                    {"data": response.encode()},
+                    maxlen=RESPONSE_STREAM_MAXLEN,
+                    approximate=True,
+                )
+                pipe.expire(request.reply_to, RESPONSE_INBOX_TTL)
+            elif request.reply_to:
+                pipe.rpush(request.reply_to, response.encode())
+                pipe.expire(request.reply_to, RESPONSE_INBOX_TTL)
+            else:
+                response_key = f"{RESPONSE_PREFIX}{request.request_id}"
+                pipe.rpush(response_key, response.encode())
+                pipe.expire(response_key, 60)  # Clean up after 60s
+            pipe.execute()
+
+    def _process_request(self, request: TradingRequest, after: List[Future] = ()):
+        """Handle a request on a lane thread, once the requests in after are done, and push its response."""
+        if after:
+            wait_for_futures(after)
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+
+        try:
+            logger.info(f"Received request: {request.operation} (id={request.request_id[:8]}...)")
+            if request.enqueued_at:
+                QUEUE_WAIT_SECONDS.labels(request.operation).observe(max(0.0, time.time() - request.enqueued_at))
+                stamp(request.trace, "enqueued", request.enqueued_at)
+            stamp(request.trace, "dequeued")
+
+            # Process request
+            with SERVICE_SECONDS.labels(request.operation).time():
+                response = self._handle_request(request)
+            stamp(request.trace, "responded")
+            response.trace = request.trace
+
+            # Track successful requests for health monitoring
+            if response.success:
+                self._last_successful_request[request.simulation] = time.time()
+
+            self._send_response(request, response)
+
+            logger.info(
+                f"Completed request: {request.operation} "
+                f"(success={response.success}, id={request.request_id[:8]}...)"
+            )
+
+        except redis.ConnectionError as e:
+            logger.error(f"Redis connection error sending response: {e}")
+
+        except Exception as e:
+            logger.exception(f"Error processing request {request.request_id[:8]}...: {e}")
+
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+
+    def run(self):
+        """Main loop - drain the request lanes and run periodic maintenance."""
+        logger.info("Trading worker starting...")
+        logger.info(f"Supported futures: {SUPPORTED_FUTURES}")
+
+        self.running = True
+        try:
+            start_worker_exporter()
+            logger.info(f"Serving metrics on port {WORKER_METRICS_PORT}")
+        except OSError as e:
+            logger.warning(f"Could not start metrics exporter: {e}")
+        self._publish_heartbeat()
+
+        dispatch = self._dispatch_stream if self.transport == "streams" else self._dispatch_lane
+        dispatchers = [
+            threading.Thread(target=dispatch, args=(queue,), name=f"dispatch-{queue}", daemon=True)
+            for queue in REQUEST_QUEUES
+        ]
+        for dispatcher in dispatchers:
+            dispatcher.start()
+
+        logger.info(
+            f"Listening for requests ({self.transport} transport) on queues: {', '.join(REQUEST_QUEUES)} "
+            f"(threads: orders={ORDER_LANE_THREADS}, status={STATUS_LANE_THREADS}, "
+            f"reference={REFERENCE_LANE_THREADS})"
+        )
+
+        # Log in all modes in parallel; the warm-up round trip needs the lanes running
+        warm_up_modes = self._warm_up_modes()
+        for simulation in warm_up_modes:
+            self._start_warm_up(simulation)
+
+        # Session refresh and health checks run beside the request lanes
+        supervisor = threading.Thread(target=self._supervise_connections, name="connection-supervisor", daemon=True)
+        supervisor.start()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True)
+        heartbeat.start()
+        reconciler = threading.Thread(target=self._reconcile_positions_loop, name="position-reconciler", daemon=True)
+        reconciler.start()
+
+        while self.running:
+            time.sleep(QUEUE_POLL_TIMEOUT)
+
+            # Maintenance may replace connections, so only run it while idle
+            if self._in_flight:
+                continue
+
+            try:
+                for simulation in warm_up_modes:
+                    self._start_warm_up(simulation)
+                self._maybe_refresh_contracts()
+                for store in self.trade_stores.values():
+                    store.purge()
+
+            except Exception as e:
+                logger.exception(f"Error in main loop: {e}")
+
+        # Let in-flight requests finish before tearing down connections
         logger.info("Shutting down trading worker...")
+        heartbeat.join()
+        try:
+            self.redis.delete(WORKER_HEARTBEAT_KEY)
+        except redis.RedisError:
+            pass
+        for dispatcher in dispatchers:
+            dispatcher.join()
+        supervisor.join()
+        reconciler.join()
+        for executors in self._lanes.values():
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+        # Cleanup - use _invalidate_connection for proper cleanup with timeout handling
         for simulation in [True, False]:
             if self.api_clients.get(simulation) is not None:
                 mode = "simulation" if simulation else "real"